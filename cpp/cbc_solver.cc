@@ -0,0 +1,90 @@
+#include "cbc_solver.h"
+
+#include <sstream>
+#include <stdexcept>
+
+#include "CbcModel.hpp"
+#include "CbcSolver.hpp"
+#include "OsiSolverInterface.hpp"
+
+#include "prog_translator.h"
+#include "solver_factory.h"
+
+namespace cyclopts {
+
+template <class T>
+std::string ToString(T val) {
+  std::stringstream ss;
+  ss << val;
+  return ss.str();
+}
+
+std::vector<std::string> CbcSolver::Args(const Solver& solver, bool verbose) {
+  std::vector<std::string> args;
+  args.push_back("cyclopts");
+  if (!verbose) {
+    args.push_back("-log");
+    args.push_back("0");
+  }
+  if (solver.threads > 0) {
+    args.push_back("-threads");
+    args.push_back(ToString(solver.threads));
+  }
+  if (solver.gap >= 0) {
+    args.push_back("-ratioGap");
+    args.push_back(ToString(solver.gap));
+  }
+  if (solver.node_limit >= 0) {
+    args.push_back("-maxNodes");
+    args.push_back(ToString(solver.node_limit));
+  }
+  if (solver.time_limit > 0) {
+    args.push_back("-seconds");
+    args.push_back(ToString(solver.time_limit));
+  }
+  if (!solver.presolve) {
+    args.push_back("-presolve");
+    args.push_back("off");
+    args.push_back("-preprocess");
+    args.push_back("off");
+  }
+  args.push_back("-solve");
+  args.push_back("-quit");
+  return args;
+}
+
+bool CbcSolver::Required(const Solver& solver) {
+  return solver.threads > 0 || solver.gap >= 0 || solver.node_limit >= 0 ||
+      !solver.presolve;
+}
+
+double CbcSolver::SolveGraph() {
+  cyclus::SolverFactory sf("cbc");
+  OsiSolverInterface* iface = sf.get();
+  double ret;
+  try {
+    cyclus::ProgTranslator xlator(graph_, iface, exclusive_orders_);
+    xlator.ToProg();
+
+    std::vector<std::string> args = Args(solver_, verbose_);
+    std::vector<const char*> argv;
+    for (int i = 0; i < args.size(); i++)
+      argv.push_back(args[i].c_str());
+    CbcModel model(*iface);
+    CbcMain0(model);
+    CbcMain1(argv.size(), &argv[0], model);
+    if (model.bestSolution() == NULL)
+      throw std::runtime_error("CBC found no solution");
+    iface->setColSolution(model.bestSolution());
+    ret = model.getObjValue();
+
+    xlator.FromProg();
+  } catch(...) {
+    delete iface;
+    throw;
+  }
+  delete iface;
+  return ret;
+}
+
+} // namespace cyclopts
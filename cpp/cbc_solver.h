@@ -0,0 +1,42 @@
+#ifndef CYCLOPTS_CBC_SOLVER_H_
+#define CYCLOPTS_CBC_SOLVER_H_
+
+#include <string>
+#include <vector>
+
+#include "exchange_solver.h"
+
+#include "problem.h"
+
+class OsiSolverInterface;
+
+namespace cyclopts {
+
+/// An exchange solver that solves the program of an exchange graph with CBC
+/// using options that the cyclus ProgSolver does not expose, e.g., thread
+/// count, relative gap, node limit, and presolve.
+class CbcSolver: public cyclus::ExchangeSolver {
+ public:
+  /// @param solver the solver options
+  /// @param exclusive_orders whether to solve with exclusive orders
+  CbcSolver(const Solver& solver, bool exclusive_orders = true)
+    : cyclus::ExchangeSolver(exclusive_orders),
+      solver_(solver) { };
+
+  /// @return the command line arguments passed to CBC for a set of solver
+  /// options
+  static std::vector<std::string> Args(const Solver& solver, bool verbose);
+
+  /// @return whether the options of a solver require a CbcSolver
+  static bool Required(const Solver& solver);
+
+ protected:
+  virtual double SolveGraph();
+
+ private:
+  Solver solver_;
+};
+
+} // namespace cyclopts
+
+#endif // CYCLOPTS_CBC_SOLVER_H_
@@ -16,6 +16,7 @@
 #elif defined(__unix__) || defined(__unix) || defined(unix) || (defined(__APPLE__) && defined(__MACH__))
 #include <unistd.h>
 #include <sys/resource.h>
+#include <sys/time.h>
 #include <sys/times.h>
 #include <time.h>
 
@@ -119,5 +120,15 @@ static inline double CoinCpuTime()
   return cpu_temp;
 }
 
+/**
+ * Returns the wall clock time, in seconds since the epoch.
+ */
+static inline double WallTime()
+{
+  struct timeval tv;
+  gettimeofday(&tv, NULL);
+  return static_cast<double>(tv.tv_sec) +
+      1.0e-6 * static_cast<double>(tv.tv_usec);
+}
 
 #endif // CYCLOPTS_CPU_TIME_H_
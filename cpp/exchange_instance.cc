@@ -1,23 +1,71 @@
 #include "exchange_instance.h"
 
+#include <algorithm>
 #include <stdexcept>
 
+#include <boost/scoped_ptr.hpp>
+#include <boost/unordered_map.hpp>
+
 #include "exchange_graph.h"
 #include "greedy_solver.h"
 #include "prog_solver.h"
 #include "version.h"
 #include "capacity_types.h"
 
+#include "cbc_solver.h"
 #include "cpu_time.h"
 
 namespace cyclopts {
 
+/// A mapping from integer ids to values. Ids in [0, n), where n is the expected
+/// number of ids, are stored in a vector indexed by id and any others fall back
+/// to a map. Dense ids, e.g., those generated by a Cyclopts Incrementer, are
+/// therefore found in constant time.
+template <class T>
+class IdIndex {
+ public:
+  explicit IdIndex(int n = 0) : dense_(n) { };
+
+  /// returns the value for an id, default constructing it if not present
+  inline T& operator[](int id) {
+    if (id >= 0 && id < dense_.size())
+      return dense_[id];
+    return sparse_[id];
+  }
+
+ private:
+  std::vector<T> dense_;
+  std::map<int, T> sparse_;
+};
+
+/// an arc's identity, its (u, v) node pair
+typedef std::pair<cyclus::ExchangeNode*, cyclus::ExchangeNode*> ArcKey;
+
+inline ArcKey Key(const cyclus::Arc& a) {
+  return std::make_pair(a.unode().get(), a.vnode().get());
+}
+
 struct ExXlationCtx {
-  std::map<int, cyclus::ExchangeNode::Ptr> id_to_node;
-  std::map<int, cyclus::ExchangeNodeGroup::Ptr> id_to_grp;
-  std::map<ExArc, cyclus::Arc> arc_map;
+  ExXlationCtx(int n_grps = 0, int n_nodes = 0)
+    : id_to_grp(n_grps),
+      id_to_node(n_nodes) { };
+
+  IdIndex<cyclus::ExchangeNodeGroup::Ptr> id_to_grp;
+  IdIndex<cyclus::ExchangeNode::Ptr> id_to_node;
+  /// translated arcs in the order they were added
+  std::vector<cyclus::Arc> arcs;
+  /// the position of each translated arc in arcs
+  boost::unordered_map<ArcKey, int> arc_idx;
 };
 
+/// adds a translated arc to the graph and context
+inline void AddArc(cyclus::Arc& a, ExXlationCtx& ctx,
+                   cyclus::ExchangeGraph& g) {
+  g.AddArc(a);
+  ctx.arc_idx[Key(a)] = ctx.arcs.size();
+  ctx.arcs.push_back(a);
+}
+
 void AddGroups(std::vector<ExGroup>& groups,
                ExXlationCtx& ctx,
                cyclus::ExchangeGraph& g) {
@@ -77,12 +125,13 @@ void AddArcs(std::vector<ExArc>& arcs,
              cyclus::ExchangeGraph& g) {
   std::vector<ExArc>::iterator ait;
   cyclus::ExchangeNode::Ptr u, v;
+  ctx.arcs.reserve(arcs.size());
+  ctx.arc_idx.rehash(arcs.size());
   for (ait = arcs.begin(); ait != arcs.end(); ++ait) {
     u = ctx.id_to_node[ait->uid];
     v = ctx.id_to_node[ait->vid];
     cyclus::Arc a(u, v);
-    g.AddArc(a);
-    ctx.arc_map[*ait] = a;
+    AddArc(a, ctx, g);
     u->unit_capacities[a] = ait->ucaps;
     u->prefs[a] = ait->pref;
     v->unit_capacities[a] = ait->vcaps;
@@ -93,7 +142,14 @@ cyclus::ExchangeSolver* SolverFactory(Solver& solver) {
   std::string type = solver.type == "" ? "cbc" : solver.type;
   cyclus::ExchangeSolver* ret;
   bool excl_orders = true;
-  if (type == "cbc")
+  bool verbose = false;
+  bool mps = false;
+  double tmax = solver.time_limit;
+  if (type == "cbc" && CbcSolver::Required(solver))
+    ret = new CbcSolver(solver, excl_orders);
+  else if (type == "cbc" && tmax > 0)
+    ret = new cyclus::ProgSolver(type, tmax, excl_orders, verbose, mps);
+  else if (type == "cbc")
     ret = new cyclus::ProgSolver(type, excl_orders);
   else if (type == "clp")
     ret = new cyclus::ProgSolver(type, !excl_orders);
@@ -106,47 +162,319 @@ cyclus::ExchangeSolver* SolverFactory(Solver& solver) {
   return ret;
 }
 
-ExSolution Run(std::vector<ExGroup>& groups, std::vector<ExNode>& nodes,
-               std::vector<ExArc>& arcs, Solver& solver, bool verbose) {
-  ExXlationCtx ctx;
-  cyclus::ExchangeGraph g;
-
-  // construct
+void Translate(std::vector<ExGroup>& groups, std::vector<ExNode>& nodes,
+               std::vector<ExArc>& arcs, ExXlationCtx& ctx,
+               cyclus::ExchangeGraph& g) {
   AddGroups(groups, ctx, g);
   AddNodes(nodes, ctx, g);
   AddArcs(arcs, ctx, g);
-  
+}
+
+/// the value of a field in row i of a strided column
+template <class T>
+inline T At(const char* col, long stride, int i) {
+  return *reinterpret_cast<const T*>(col + i * stride);
+}
+
+void AddGroups(const ExCols& cols,
+               ExXlationCtx& ctx,
+               cyclus::ExchangeGraph& g) {
+  cyclus::RequestGroup::Ptr rg;
+  cyclus::ExchangeNodeGroup::Ptr bg;
+  long stride = cols.grp_stride;
+  for (int i = 0; i < cols.n_grps; ++i) {
+    if (At<char>(cols.grp_kind, stride, i)) { // true == request
+      rg = cyclus::RequestGroup::Ptr(
+          new cyclus::RequestGroup(At<double>(cols.grp_qty, stride, i)));
+      g.AddRequestGroup(rg);
+      bg = rg;
+    } else { // false == bid
+      bg = cyclus::ExchangeNodeGroup::Ptr(new cyclus::ExchangeNodeGroup());
+      g.AddSupplyGroup(bg);
+    }
+    ctx.id_to_grp[At<long long>(cols.grp_id, stride, i)] = bg;
+    cyclus::cap_t t;
+    long long j;
+    for (j = cols.grp_cap_offsets[i]; j < cols.grp_cap_offsets[i + 1]; ++j) {
+      t = cols.grp_cap_dirs[j] ? cyclus::GTEQ : cyclus::LTEQ;
+      bg->AddCapacity(cols.grp_caps[j], t);
+    }
+  }
+}
+
+void AddNodes(const ExCols& cols,
+              ExXlationCtx& ctx,
+              cyclus::ExchangeGraph& g) {
+  cyclus::ExchangeNode::Ptr n;
+  cyclus::ExchangeNodeGroup::Ptr grp;
+  // mapping group id and excl set id to the collection of nodes
+  std::map<std::pair<int, int>,
+           std::vector<cyclus::ExchangeNode::Ptr> > excl_grps; 
+
+  long stride = cols.node_stride;
+  for (int i = 0; i < cols.n_nodes; ++i) {
+    int gid = At<long long>(cols.node_gid, stride, i);
+    int excl_id = At<long long>(cols.node_excl_id, stride, i);
+    n = cyclus::ExchangeNode::Ptr(
+        new cyclus::ExchangeNode(At<double>(cols.node_qty, stride, i),
+                                 At<char>(cols.node_excl, stride, i) != 0));
+    grp = ctx.id_to_grp[gid];
+    grp->AddExchangeNode(n);
+    ctx.id_to_node[At<long long>(cols.node_id, stride, i)] = n;
+    if (excl_id > 0) {
+      excl_grps[std::make_pair(gid, excl_id)].push_back(n);
+    }
+  }
+
+  std::map<std::pair<int, int>,
+           std::vector<cyclus::ExchangeNode::Ptr> >::iterator git;
+  for (git = excl_grps.begin(); git != excl_grps.end(); ++git) {
+    grp = ctx.id_to_grp[git->first.first];
+    grp->AddExclGroup(git->second);
+  }
+}    
+
+void AddArcs(const ExCols& cols,
+             ExXlationCtx& ctx,
+             cyclus::ExchangeGraph& g) {
+  cyclus::ExchangeNode::Ptr u, v;
+  long stride = cols.arc_stride;
+  ctx.arcs.reserve(cols.n_arcs);
+  ctx.arc_idx.rehash(cols.n_arcs);
+  for (int i = 0; i < cols.n_arcs; ++i) {
+    u = ctx.id_to_node[At<long long>(cols.arc_uid, stride, i)];
+    v = ctx.id_to_node[At<long long>(cols.arc_vid, stride, i)];
+    cyclus::Arc a(u, v);
+    AddArc(a, ctx, g);
+    u->unit_capacities[a] = std::vector<double>(
+        cols.arc_ucaps + cols.arc_ucap_offsets[i],
+        cols.arc_ucaps + cols.arc_ucap_offsets[i + 1]);
+    u->prefs[a] = At<double>(cols.arc_pref, stride, i);
+    v->unit_capacities[a] = std::vector<double>(
+        cols.arc_vcaps + cols.arc_vcap_offsets[i],
+        cols.arc_vcaps + cols.arc_vcap_offsets[i + 1]);
+  }
+}
+
+ExSolution Solve(cyclus::ExchangeGraph& g, Solver& solver, bool verbose) {
   // solve and get time
   cyclus::ExchangeSolver* s = SolverFactory(solver);
   if (verbose)
     s->verbose();
-  double start, stop;
+  double start, stop, wall_start;
   // start = getCPUTime();
   start = CoinCpuTime();
+  wall_start = WallTime();
   double obj = s->cyclus::ExchangeSolver::Solve(&g);
   // stop = getCPUTime();
   stop = CoinCpuTime();
+  double wall = WallTime() - wall_start;
   double dur = stop - start; // in seconds
   delete  s;
   std::string type = "ResourceExchange";
   ExSolution soln(dur, obj, type, cyclus::version::describe());
+  soln.solve_wall_time = wall;
+  return soln;
+}
 
-  // update flows on ExArcs
+/// populates the flow along each translated arc, in the order arcs were added
+void GetFlows(cyclus::ExchangeGraph& g, ExXlationCtx& ctx,
+              std::vector<double>& flows) {
+  flows.assign(ctx.arcs.size(), 0);
   const std::vector<cyclus::Match>& matches = g.matches();
-  std::map<cyclus::Arc, double> flows;
+  boost::unordered_map<ArcKey, int>::iterator it;
   for (int i = 0; i != matches.size(); i++) {
-    flows.insert(matches[i]);
+    it = ctx.arc_idx.find(Key(matches[i].first));
+    if (it != ctx.arc_idx.end())
+      flows[it->second] = matches[i].second;
   }
-  std::vector<ExArc>::iterator ait;
-  for (ait = arcs.begin(); ait != arcs.end(); ++ait) {
-    ExArc& exa = *ait;
-    double flow = flows[ctx.arc_map[exa]];
-    soln.flows[exa.id] = flow;
+}
+
+/// sorts a solution's arc_ids and arc_flows by id
+void SortFlows(ExSolution& soln) {
+  std::vector<int>& ids = soln.arc_ids;
+  std::vector<double>& flows = soln.arc_flows;
+  int n = ids.size();
+  bool sorted = true;
+  for (int i = 1; i < n && sorted; ++i) {
+    sorted = ids[i - 1] <= ids[i];
+  }
+  if (!sorted) {
+    std::vector<std::pair<int, double> > pairs(n);
+    for (int i = 0; i < n; ++i) {
+      pairs[i] = std::make_pair(ids[i], flows[i]);
+    }
+    std::sort(pairs.begin(), pairs.end());
+    for (int i = 0; i < n; ++i) {
+      ids[i] = pairs[i].first;
+      flows[i] = pairs[i].second;
+    }
+  }
+}
+
+void FillFlows(ExSolution& soln) {
+  std::vector<int>& ids = soln.arc_ids;
+  std::vector<double>& flows = soln.arc_flows;
+  soln.flows.clear();
+  // ids are sorted, so each insertion is amortized constant time
+  for (int i = 0; i < ids.size(); ++i) {
+    soln.flows.insert(soln.flows.end(), std::make_pair(ids[i], flows[i]));
+  }
+}
+
+void AddFlows(std::vector<ExArc>& arcs, ExXlationCtx& ctx,
+              cyclus::ExchangeGraph& g, ExSolution& soln) {
+  // update flows on ExArcs
+  std::vector<double> flows;
+  GetFlows(g, ctx, flows);
+  soln.arc_ids.reserve(arcs.size());
+  soln.arc_flows.reserve(arcs.size());
+  for (int i = 0; i < arcs.size(); ++i) {
+    ExArc& exa = arcs[i];
+    double flow = flows[i];
+    soln.arc_ids.push_back(exa.id);
+    soln.arc_flows.push_back(flow);
     soln.pref_flow += exa.pref * flow;
     soln.cost_flow += 1 / exa.pref * flow;
   }
+  SortFlows(soln);
+}
 
+void AddFlows(const ExCols& cols, ExXlationCtx& ctx,
+              cyclus::ExchangeGraph& g, ExSolution& soln) {
+  std::vector<double> flows;
+  GetFlows(g, ctx, flows);
+  long stride = cols.arc_stride;
+  soln.arc_ids.reserve(cols.n_arcs);
+  soln.arc_flows.reserve(cols.n_arcs);
+  for (int i = 0; i < cols.n_arcs; ++i) {
+    double pref = At<double>(cols.arc_pref, stride, i);
+    double flow = flows[i];
+    soln.arc_ids.push_back(At<long long>(cols.arc_id, stride, i));
+    soln.arc_flows.push_back(flow);
+    soln.pref_flow += pref * flow;
+    soln.cost_flow += 1 / pref * flow;
+  }
+  SortFlows(soln);
+}
+
+ExSolution Run(std::vector<ExGroup>& groups, std::vector<ExNode>& nodes,
+               std::vector<ExArc>& arcs, Solver& solver, bool verbose) {
+  ExXlationCtx ctx(groups.size(), nodes.size());
+  cyclus::ExchangeGraph g;
+  double start = WallTime();
+  Translate(groups, nodes, arcs, ctx, g);
+  double xlate = WallTime() - start;
+  ExSolution soln = Solve(g, solver, verbose);
+  soln.xlate_time = xlate;
+  start = WallTime();
+  AddFlows(arcs, ctx, g, soln);
+  soln.extract_time = WallTime() - start;
   return soln;
 }
 
+/// Returns whether a solver changes the state of the graph it solves beyond
+/// its matches. The greedy solver conditions the graph, reordering its groups
+/// and nodes, and consumes the capacities of the groups and nodes it matches,
+/// so a graph it has solved must be translated anew before it is solved again.
+inline bool ConsumesGraph(const Solver& solver) {
+  return solver.type == "greedy";
+}
+
+/// Solves the graph of an instance, translated by an xlator, once with each
+/// solver. The graph is translated once and reused by each solve, after its
+/// matches are cleared, unless the previous solver consumed it.
+template <class Xlator>
+std::vector<ExSolution> SolveEach(Xlator& xlator, std::vector<Solver>& solvers,
+                                  bool verbose) {
+  boost::scoped_ptr<ExXlationCtx> ctx;
+  boost::scoped_ptr<cyclus::ExchangeGraph> g;
+  double xlate_time = 0;
+  bool stale = true;
+  std::vector<ExSolution> solns;
+  solns.reserve(solvers.size());
+  std::vector<Solver>::iterator sit;
+  for (sit = solvers.begin(); sit != solvers.end(); ++sit) {
+    double start = WallTime();
+    if (stale) {
+      ctx.reset(xlator.NewCtx());
+      g.reset(new cyclus::ExchangeGraph());
+      xlator.Translate(*ctx, *g);
+      xlate_time = WallTime() - start;
+    } else {
+      // matches from a previous solve must not leak into the next solution
+      g->ClearMatches();
+    }
+    solns.push_back(Solve(*g, *sit, verbose));
+    stale = ConsumesGraph(*sit);
+    ExSolution& soln = solns.back();
+    soln.xlate_time = xlate_time;
+    start = WallTime();
+    xlator.Extract(*ctx, *g, soln);
+    soln.extract_time = WallTime() - start;
+  }
+  return solns;
+}
+
+/// translates and extracts the flows of an instance of ExGroups, ExNodes, and
+/// ExArcs
+struct ObjXlator {
+  ObjXlator(std::vector<ExGroup>& groups, std::vector<ExNode>& nodes,
+            std::vector<ExArc>& arcs)
+    : groups(groups), nodes(nodes), arcs(arcs) { };
+
+  ExXlationCtx* NewCtx() {
+    return new ExXlationCtx(groups.size(), nodes.size());
+  }
+
+  void Translate(ExXlationCtx& ctx, cyclus::ExchangeGraph& g) {
+    cyclopts::Translate(groups, nodes, arcs, ctx, g);
+  }
+
+  void Extract(ExXlationCtx& ctx, cyclus::ExchangeGraph& g, ExSolution& soln) {
+    AddFlows(arcs, ctx, g, soln);
+  }
+
+  std::vector<ExGroup>& groups;
+  std::vector<ExNode>& nodes;
+  std::vector<ExArc>& arcs;
+};
+
+/// translates and extracts the flows of a columnar instance
+struct ColXlator {
+  explicit ColXlator(const ExCols& cols) : cols(cols) { };
+
+  ExXlationCtx* NewCtx() {
+    return new ExXlationCtx(cols.n_grps, cols.n_nodes);
+  }
+
+  void Translate(ExXlationCtx& ctx, cyclus::ExchangeGraph& g) {
+    AddGroups(cols, ctx, g);
+    AddNodes(cols, ctx, g);
+    AddArcs(cols, ctx, g);
+  }
+
+  void Extract(ExXlationCtx& ctx, cyclus::ExchangeGraph& g, ExSolution& soln) {
+    AddFlows(cols, ctx, g, soln);
+  }
+
+  const ExCols& cols;
+};
+
+std::vector<ExSolution> RunMany(std::vector<ExGroup>& groups,
+                                std::vector<ExNode>& nodes,
+                                std::vector<ExArc>& arcs,
+                                std::vector<Solver>& solvers,
+                                bool verbose) {
+  ObjXlator xlator(groups, nodes, arcs);
+  return SolveEach(xlator, solvers, verbose);
+}
+
+std::vector<ExSolution> RunCols(const ExCols& cols,
+                                std::vector<Solver>& solvers,
+                                bool verbose) {
+  ColXlator xlator(cols);
+  return SolveEach(xlator, solvers, verbose);
+}
+
 } // namespace cyclopts
@@ -115,23 +115,118 @@ class ExArc {
   double pref;
 };
 
+/// A columnar (struct of arrays) view of an exchange instance. Scalar members
+/// of groups, nodes, and arcs are read in place from strided buffers, e.g., the
+/// fields of NumPy structured arrays, where each pointer refers to the first
+/// row's field and each stride is the byte distance between rows. Capacities
+/// are stored contiguously with compressed-row offsets, i.e., the capacities
+/// of row i are caps[offsets[i]] to caps[offsets[i + 1] - 1]. Integer fields
+/// are 64 bit, floating point fields are doubles, and boolean fields are single
+/// bytes. No data is owned by this class.
+class ExCols {
+ public:
+  ExCols()
+    : n_grps(0), grp_stride(0),
+      grp_id(NULL), grp_kind(NULL), grp_qty(NULL),
+      grp_cap_offsets(NULL), grp_caps(NULL), grp_cap_dirs(NULL),
+      n_nodes(0), node_stride(0),
+      node_id(NULL), node_gid(NULL), node_qty(NULL),
+      node_excl(NULL), node_excl_id(NULL),
+      n_arcs(0), arc_stride(0),
+      arc_id(NULL), arc_uid(NULL), arc_vid(NULL), arc_pref(NULL),
+      arc_ucap_offsets(NULL), arc_ucaps(NULL),
+      arc_vcap_offsets(NULL), arc_vcaps(NULL) { };
+
+  int n_grps;
+  long grp_stride;
+  const char* grp_id;
+  const char* grp_kind;
+  const char* grp_qty;
+  const long long* grp_cap_offsets;
+  const double* grp_caps;
+  const char* grp_cap_dirs;
+
+  int n_nodes;
+  long node_stride;
+  const char* node_id;
+  const char* node_gid;
+  const char* node_qty;
+  const char* node_excl;
+  const char* node_excl_id;
+
+  int n_arcs;
+  long arc_stride;
+  const char* arc_id;
+  const char* arc_uid;
+  const char* arc_vid;
+  const char* arc_pref;
+  const long long* arc_ucap_offsets;
+  const double* arc_ucaps;
+  const long long* arc_vcap_offsets;
+  const double* arc_vcaps;
+};
+
 /// A simple container class for exchange solutions.
 class ExSolution: public ProbSolution {
  public:
   ExSolution(double time = 0, double objective = 0, std::string type = "",
              std::string cyclus_version = "")
     : ProbSolution(time, objective, type),
-      cyclus_version(cyclus_version) { };
+      cyclus_version(cyclus_version),
+      pref_flow(0),
+      cost_flow(0),
+      marshal_time(0),
+      xlate_time(0),
+      solve_wall_time(0),
+      extract_time(0) { };
 
   std::string cyclus_version;
+  /// the flow along each arc keyed by arc id, which is not populated by a
+  /// solve, see FillFlows()
   std::map<int, double> flows;
+  /// arc ids in ascending order
+  std::vector<int> arc_ids;
+  /// the flow along each arc in arc_ids
+  std::vector<double> arc_flows;
   double pref_flow; // sum (preferences * flow) 
   double cost_flow; // sum (cost * flow) 
+
+  // phase timings in seconds, the cpu time of the solve is stored in time.
+  // solutions from a single call to RunMany or RunCols share marshal times,
+  // and translation times unless the graph is translated anew after a greedy
+  // solve.
+  double marshal_time; // copying input and output across the language boundary
+  double xlate_time; // translating the instance into an exchange graph
+  double solve_wall_time; // the solve's wall clock time
+  double extract_time; // extracting flows from the solved graph
 };
 
+/// Populates a solution's flows from its arc_ids and arc_flows, replacing any
+/// existing flows. Solves populate only the latter, and flows are populated on
+/// demand, e.g., when first accessed from Python.
+void FillFlows(ExSolution& soln);
+
 ExSolution Run(std::vector<ExGroup>& groups, std::vector<ExNode>& nodes,
                std::vector<ExArc>& arcs, Solver& solver, bool verbose=false);
 
+/// Translates an instance into a single exchange graph and solves it once with
+/// each solver, returning one solution per solver in the same order. Matches
+/// are cleared between solves, and the graph is translated anew after a solver
+/// that changes its state, i.e., the greedy solver, which reorders the graph
+/// and consumes its capacities.
+std::vector<ExSolution> RunMany(std::vector<ExGroup>& groups,
+                                std::vector<ExNode>& nodes,
+                                std::vector<ExArc>& arcs,
+                                std::vector<Solver>& solvers,
+                                bool verbose=false);
+
+/// Translates a columnar instance into a single exchange graph and solves it
+/// once with each solver, returning one solution per solver in the same order,
+/// as in RunMany.
+std::vector<ExSolution> RunCols(const ExCols& cols,
+                                std::vector<Solver>& solvers,
+                                bool verbose=false);
+
 } // namespace cyclopts
 
 #endif // CYCLOPTS_INSTANCE_H_
@@ -7,6 +7,12 @@ ProbSolution::ProbSolution(double time, double objective, std::string type)
       objective(objective), 
       type(type) { };
 
-Solver::Solver(std::string type) : type(type) { };
+Solver::Solver(std::string type, double time_limit)
+    : type(type),
+      time_limit(time_limit),
+      threads(0),
+      gap(-1),
+      node_limit(-1),
+      presolve(true) { };
 
 } // namespace cyclopts
@@ -18,13 +18,21 @@ class ProbSolution {
   std::string type;
 };
 
-/// A container class for solver indentifying parameters.
+/// A container class for solver indentifying parameters and options. Options
+/// with negative values use the solver's default.
 class Solver {
  public:
   /// @param type the type of solver
-  explicit Solver(std::string type = "cbc");
+  /// @param time_limit the maximum solve time in seconds, a nonpositive value
+  /// uses the solver's default
+  explicit Solver(std::string type = "cbc", double time_limit = -1);
 
   std::string type;
+  double time_limit;
+  int threads; // the number of threads, 0 uses the solver's default
+  double gap; // the relative gap at which a MIP solve terminates
+  int node_limit; // the maximum number of branch and bound nodes
+  bool presolve; // whether to presolve and preprocess the problem
 };
 
 } // namespace cyclopts
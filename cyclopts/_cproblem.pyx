@@ -9,6 +9,7 @@
 """
 """
 from libc.stdlib cimport free
+from libcpp cimport bool as cpp_bool
 from libcpp.string cimport string as std_string
 
 
@@ -28,12 +29,12 @@ cdef class Solver:
         # cached property defaults
 
 
-    def __init__(self, type='cbc'):
-        """Solver(self, type='cbc')
+    def __init__(self, type='cbc', time_limit=-1):
+        """Solver(self, type='cbc', time_limit=-1)
         """
         cdef char * type_proxy
         type_bytes = type.encode()
-        self._inst = new cpp__cproblem.Solver(std_string(<char *> type_bytes))
+        self._inst = new cpp__cproblem.Solver(std_string(<char *> type_bytes), <double> time_limit)
     
     
     def __dealloc__(self):
@@ -41,6 +42,51 @@ cdef class Solver:
             free(self._inst)
 
     # attributes
+    property gap:
+        """no docstring for gap, please file a bug report!"""
+        def __get__(self):
+            return float((<cpp__cproblem.Solver *> self._inst).gap)
+    
+        def __set__(self, value):
+            (<cpp__cproblem.Solver *> self._inst).gap = <double> value
+    
+    
+    property node_limit:
+        """no docstring for node_limit, please file a bug report!"""
+        def __get__(self):
+            return int((<cpp__cproblem.Solver *> self._inst).node_limit)
+    
+        def __set__(self, value):
+            (<cpp__cproblem.Solver *> self._inst).node_limit = <int> value
+    
+    
+    property presolve:
+        """no docstring for presolve, please file a bug report!"""
+        def __get__(self):
+            return bool((<cpp__cproblem.Solver *> self._inst).presolve)
+    
+        def __set__(self, value):
+            (<cpp__cproblem.Solver *> self._inst).presolve = <bint> value
+    
+    
+    property threads:
+        """no docstring for threads, please file a bug report!"""
+        def __get__(self):
+            return int((<cpp__cproblem.Solver *> self._inst).threads)
+    
+        def __set__(self, value):
+            (<cpp__cproblem.Solver *> self._inst).threads = <int> value
+    
+    
+    property time_limit:
+        """no docstring for time_limit, please file a bug report!"""
+        def __get__(self):
+            return float((<cpp__cproblem.Solver *> self._inst).time_limit)
+    
+        def __set__(self, value):
+            (<cpp__cproblem.Solver *> self._inst).time_limit = <double> value
+    
+    
     property type:
         """no docstring for type, please file a bug report!"""
         def __get__(self):
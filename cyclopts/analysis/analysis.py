@@ -118,8 +118,13 @@ def multi_scatter(x, ys, colors=None, ax=None):
         ax.get_yaxis().get_major_formatter().set_powerlimits((0, 1))    
     return ax    
 
+def _uuid_rows(tbl):
+    """Returns the rows of a table with integer ids replaced by uuids, so that 
+    they may be joined with the rows of tables that store uuids."""
+    return io_tools.with_uuids(tbl._v_file, tbl.read())
+
 def plot_xy(props, xhandle, yvals):
-    vals = {x['instid']: x[xhandle] for x in props.iterrows()}
+    vals = {x['instid']: x[xhandle] for x in _uuid_rows(props)}
     
     m_it = imarkers()
     c_it = icolors()
@@ -144,11 +149,11 @@ def plot_xy(props, xhandle, yvals):
     return ax
 
 def plot_xyz(xtbl, xhandle, ytbl, yhandle, zvals, toinst=None, fromkey=None):
-    xvals = {x['instid']: x[xhandle] for x in xtbl.iterrows()}
+    xvals = {x['instid']: x[xhandle] for x in _uuid_rows(xtbl)}
     if toinst is None:
-        yvals = {x['instid']: x[yhandle] for x in ytbl.iterrows()}
+        yvals = {x['instid']: x[yhandle] for x in _uuid_rows(ytbl)}
     else:
-        yvals = {toinst[x[fromkey]]: x[yhandle] for x in ytbl.iterrows()}
+        yvals = {toinst[x[fromkey]]: x[yhandle] for x in _uuid_rows(ytbl)}
     
     m_it = imarkers()
     c_it = icolors()
@@ -735,19 +740,35 @@ def fam_and_sp_cls(fam_mod, fam_cls, sp_mod, sp_class):
 def idx_map(h5file, fam, sp):
     """return a mapping from all unique ids to an index, where each index
     corresponds to a specific solution"""
-    sids = set(io_tools.grab_data(h5file, '/Results', 'solnid'))
-    soln_idxs = {sid: i for i, sid in enumerate(sids)}
-    pid_to_iids = io_tools.param_mapping(
-        h5file, '/'.join([fam.io_prefix, fam.property_table_name]), 
-        'paramid', 'instid')
-    iid_to_sids = io_tools.param_mapping(h5file, '/Results', 'instid', 'solnid')
+    # ids are joined as integer keys and translated to uuids once per id
+    res = h5file.get_node('/Results')
+    props = h5file.get_node('/'.join([fam.io_prefix, fam.property_table_name]))
     idx_map = defaultdict(list)
-    for p, iids in pid_to_iids.items():
-        for i in iids:
-            for s in iid_to_sids[i]:
-                 idx_map[p].append(soln_idxs[s])
-                 idx_map[i].append(soln_idxs[s])
-                 idx_map[s].append(soln_idxs[s])
+    if res.nrows == 0 or props.nrows == 0:
+        return idx_map
+    pairs = np.empty(res.nrows, dtype=[('instid', np.int64), 
+                                       ('solnid', np.int64)])
+    pairs['instid'] = io_tools.as_keys(res.col('instid'))
+    pairs['solnid'] = io_tools.as_keys(res.col('solnid'))
+    pairs, idx = np.unique(pairs, return_index=True)
+    r_sids = res.col('solnid')[idx]
+    usids, soln_idxs = np.unique(pairs['solnid'], return_inverse=True)
+    
+    # the param of each solution's instance
+    p_iids = io_tools.as_keys(props.col('instid'))
+    order = np.argsort(p_iids, kind='mergesort')
+    pos = np.searchsorted(p_iids, pairs['instid'], sorter=order)
+    pos = order[np.minimum(pos, len(order) - 1)]
+    found = p_iids[pos] == pairs['instid']
+    pos, soln_idxs = pos[found], soln_idxs[found]
+    
+    cols = [io_tools.id_values(h5file, props.col('paramid'))[pos],
+            io_tools.id_values(h5file, props.col('instid'))[pos],
+            io_tools.id_values(h5file, r_sids)[found]]
+    for ids in cols:
+        keys, idxs = io_tools.grouped(ids, soln_idxs)
+        for k, v in zip(keys, idxs):
+            idx_map[k].extend(v.tolist())
     return idx_map
 
 def Tree(): return defaultdict(Tree)
@@ -822,14 +843,15 @@ def cyclopts_data(fname, fam, sp):
         [cycio.TblDesc('/Results', 'soln', 'solnid')]
     id_to_idxs = idx_map(h5file, fam, sp)
     nsolns = h5file.get_node('/Results').nrows
-    dtypes = [h5file.get_node(x.path).dtype.descr for x in tbl_descs]
+    dtypes = [io_tools.uuid_dtype(h5file.get_node(x.path).dtype).descr \
+                  for x in tbl_descs]
     dtype = list(set(sum((x for x in dtypes), [])))
 
     data = np.empty(shape=(nsolns,), dtype=dtype)
     for desc in tbl_descs:
         tbl = h5file.get_node(desc.path)
         keys = tbl.coltypes.keys()
-        for row in tbl.read():
+        for row in io_tools.with_uuids(h5file, tbl.read()):
             idxs = id_to_idxs[row[desc.idcol]]
             for i in idxs:
                 for k in keys:
@@ -1150,6 +1172,26 @@ def compare_plot_data(data, xcol, ycol, base, compare, agg=False, maxn=None):
             ys.append((yavgs[0] - yavgs[1]) / yavgs[1])
     return xs, ys
 
+def _id_rows(h5file, path, idcol, x):
+    """Returns the rows of an id, either from its table in a group of tables per
+    id or from a single table of all ids."""
+    node = h5file.get_node(path)
+    if isinstance(node, t.Group):
+        return node._f_get_child('id_' + tools.str_to_uuid(x).hex).read()
+    return cycio.uuid_rows(node, tools.str_to_uuid(x), colname=idcol)
+
+def _id_col(h5file, path, idcol, x, col):
+    """Returns a column of the rows of an id."""
+    return _id_rows(h5file, path, idcol, x)[col]
+
+def _flows(h5file, path, sid, narcs):
+    """Returns the flows of all arcs of a solution, of which only non-zero 
+    flows may be stored."""
+    rows = _id_rows(h5file, path, 'solnid', sid)
+    ret = np.zeros(narcs)
+    ret[rows['arc_id']] = rows['flow']
+    return ret
+
 def flow_rms(fname, id_tree, species_name):
     """Take the root-mean-square of flow values of all solutions in an ID Tree.
 
@@ -1168,15 +1210,16 @@ def flow_rms(fname, id_tree, species_name):
     n = ninsts(id_tree) 
     ret = {'flows': {s: np.zeros(n) for s in solvers},
            'cflows': {s: np.zeros(n) for s in solvers}}
-    convert = lambda x: 'id_' + tools.str_to_uuid(x).hex 
     i = 0
     
     with t.open_file(fname, mode='r') as f:
         for pid, pst in subtrees(id_tree):
             for iid, ist in subtrees(pst):
-                cprefs = f.get_node(cpath + '/' + convert(iid)).col('pref_c')
+                cprefs = cycio.inst_cache.get(
+                    cycio.cache_key(f, cpath, 'pref_c', iid), 
+                    lambda: _id_col(f, cpath, 'instid', iid, 'pref_c'))
                 for sid, solver in subtrees(ist):
-                    flows = f.get_node(fpath + '/' + convert(sid)).col('flow')
+                    flows = _flows(f, fpath, sid, len(cprefs))
                     ret['flows'][solver][i] = rms(flows)
                     ret['cflows'][solver][i] = rms(cprefs * flows)
                 i += 1
@@ -1203,15 +1246,16 @@ def flow_rms_diff(fname, id_tree, species_name, base_solver='cbc'):
     n = ninsts(id_tree) 
     ret = {'flows': {s: np.zeros(n) for s in solvers},
            'cflows': {s: np.zeros(n) for s in solvers}}
-    convert = lambda x: 'id_' + tools.str_to_uuid(x).hex 
     i = 0
     
     with t.open_file(fname, mode='r') as f:
         for pid, pst in subtrees(id_tree):
             for iid, ist in subtrees(pst):
-                cprefs = f.get_node(cpath + '/' + convert(iid)).col('pref_c')
+                cprefs = cycio.inst_cache.get(
+                    cycio.cache_key(f, cpath, 'pref_c', iid), 
+                    lambda: _id_col(f, cpath, 'instid', iid, 'pref_c'))
                 flows = {
-                    solver: f.get_node(fpath + '/' + convert(sid)).col('flow') \
+                    solver: _flows(f, fpath, sid, len(cprefs)) \
                         for sid, solver in subtrees(ist)}
                 for solver in solvers:
                     diff = flows[base_solver] - flows[solver]
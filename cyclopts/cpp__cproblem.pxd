@@ -8,6 +8,7 @@
 ################################################
 
 
+from libcpp cimport bool as cpp_bool
 from libcpp.string cimport string as std_string
 
 cdef extern from "problem.h" namespace "cyclopts":
@@ -36,8 +37,14 @@ cdef extern from "problem.h" namespace "cyclopts":
         # constructors
         Solver() except +
         Solver(std_string) except +
+        Solver(std_string, double) except +
 
         # attributes
+        double gap
+        int node_limit
+        cpp_bool presolve
+        int threads
+        double time_limit
         std_string type
 
         # methods
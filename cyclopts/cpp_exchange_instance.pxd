@@ -28,8 +28,12 @@ cdef extern from "exchange_instance.h" namespace "cyclopts":
         # attributes
         double cost_flow
         std_string cyclus_version
+        double extract_time
         cpp_map[int, double] flows
+        double marshal_time
         double pref_flow
+        double solve_wall_time
+        double xlate_time
 
         # methods
 
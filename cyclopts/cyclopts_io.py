@@ -2,27 +2,243 @@
 
 :author: Matthew Gidden <matthew.gidden _at_ gmail.com>
 """
+import os
+import sys
+import weakref
 import numpy as np
 import tables as t
 import math
 import datetime
-from collections import defaultdict, namedtuple
+from Queue import Queue
+from threading import Thread, Lock, RLock
+from collections import defaultdict, namedtuple, OrderedDict
 
 import cyclopts
 import cyclopts.tools as tools
 import cyclopts.io_tools as io_tools
+from cyclopts.problems import canonical_spec
 
 def rows_where(tbl, cond, condvars=None):
     tbl = tbl._tbl if isinstance(tbl, Table) else tbl
     return tbl.read_where(cond, condvars=condvars)
         
+def _id_value(uuid, dt):
+    """Returns the value of a uuid in an id column of a dtype, which is its
+    integer key if the column holds integer ids."""
+    return io_tools.id_key(uuid) if dt.kind in 'iu' else uuid.bytes
+
 def uuid_rows(tbl, uuid, colname='instid'):
-    condvars = {'uuid': uuid.bytes}
+    tbl = tbl._tbl if isinstance(tbl, Table) else tbl
+    condvars = {'uuid': _id_value(uuid, tbl.coldtypes[colname])}
     return rows_where(tbl, """{0} == uuid""".format(colname), 
                       condvars=condvars)
 
+def keep_rows(tbl, colname, values):
+    """Removes all rows of a table whose value in a column is not in a
+    collection of values. Returns the number of rows removed."""
+    tbl = tbl._tbl if isinstance(tbl, Table) else tbl
+    if tbl is None or tbl.nrows == 0:
+        return 0
+    data = tbl.read()
+    values = io_tools.id_keys(list(values)) \
+        if io_tools.is_key(data.dtype, colname) \
+        else np.array(list(values), dtype=data.dtype[colname])
+    keep = np.in1d(data[colname], values)
+    n = len(data) - np.count_nonzero(keep)
+    if n > 0:
+        tbl.truncate(0)
+        tbl.append(data[keep])
+        tbl.flush()
+    return n
+
+def slice_rows(tbl, uuid, start, stop, colname='instid'):
+    """Returns the rows in [start, stop) of a table if they are exactly those
+    whose column value is a uuid, otherwise None. This validates offsets that
+    may be stale, e.g., after tables have been merged."""
+    tbl = tbl._tbl if isinstance(tbl, Table) else tbl
+    if tbl is None or stop <= start or stop > tbl.nrows:
+        return None
+    lo, hi = max(start - 1, 0), min(stop + 1, tbl.nrows)
+    rows = tbl.read(lo, hi)
+    ids = rows[colname]
+    key = np.array(_id_value(uuid, ids.dtype), dtype=ids.dtype)
+    i, j = start - lo, stop - lo
+    if not (ids[i:j] == key).all() or (i > 0 and ids[0] == key) or \
+            (j < len(ids) and ids[j] == key):
+        return None
+    return rows[i:j]
+
+def offset_rows(tbl, uuid, offsets=None, name=None, colname='instid'):
+    """Returns the rows of a table whose column value is a uuid, read as a
+    single slice if their range is recorded in an OffsetTable and valid,
+    otherwise by searching."""
+    rng = None if offsets is None else offsets.lookup(uuid, name)
+    rows = None if rng is None else \
+        slice_rows(tbl, uuid, rng[0], rng[1], colname=colname)
+    return rows if rows is not None else uuid_rows(tbl, uuid, colname=colname)
+
+def id_ranges(ids):
+    """Returns the values of an id column in order of appearance and the
+    [start, stop) row range of the run of each value."""
+    ids = np.asarray(ids)
+    if len(ids) == 0:
+        return ids, np.zeros((0, 2), dtype=np.int64)
+    bounds = np.flatnonzero(ids[1:] != ids[:-1]) + 1
+    starts = np.concatenate(([0], bounds))
+    stops = np.concatenate((bounds, [len(ids)]))
+    return ids[starts], np.column_stack((starts, stops))
+
+def is_group(h5file, path):
+    """Returns whether a node in a file is a group, e.g., to detect a layout
+    with one table per id in that group."""
+    return h5file is not None and path in h5file and \
+        isinstance(h5file.get_node(path), t.Group)
+
+def _rebuild_offsets(tbl):
+    """Rewrites an offset table from the tables it offsets."""
+    h5file = tbl._v_file
+    idcol, names = tbl.colnames[0], tbl.colnames[1:]
+    ranges = {}
+    order = []
+    for name, path in zip(names, tbl.attrs.offset_paths):
+        if path not in h5file:
+            continue
+        ids, rngs = id_ranges(h5file.get_node(path).col(idcol))
+        for x, rng in zip(ids, rngs):
+            if x not in ranges:
+                ranges[x] = {}
+                order.append(x)
+            ranges[x][name] = rng
+    data = np.zeros(len(order), dtype=tbl.dtype)
+    data[idcol] = order
+    for i, x in enumerate(order):
+        for name, rng in ranges[x].items():
+            data[name][i] = rng
+    tbl.truncate(0)
+    tbl.append(data)
+    tbl.flush()
+
+def rebuild_offsets(h5file):
+    """Rewrites all offset tables in a file from the tables they offset, e.g.,
+    after tables have been merged. Returns the number of tables rewritten."""
+    tbls = [x for x in h5file.walk_nodes('/', classname='Table') \
+                if 'offset_paths' in x.attrs]
+    for tbl in tbls:
+        _rebuild_offsets(tbl)
+    return len(tbls)
+
+def index_tables(h5file, cols=('instid', 'solnid'), 
+                 where=('/Family', '/Species')):
+    """Creates PyTables indexes on the id columns of all tables in groups of a
+    file, so that queries for a single id, e.g., with uuid_rows(), do not scan
+    entire tables. Indexes are updated automatically as rows are appended
+    afterwards. By default only family and species tables are indexed, as the
+    generic tables at the root of a file, e.g., results, are always read whole.
+    Returns the number of indexes created."""
+    n = 0
+    for path in [x for x in where if x in h5file]:
+        for tbl in h5file.walk_nodes(path, classname='Table'):
+            for name in cols:
+                if name not in tbl.colnames:
+                    continue
+                col = tbl.cols._f_col(name)
+                if not col.is_indexed:
+                    col.create_index()
+                    n += 1
+    return n
+
 TblDesc = namedtuple('TblDesc', ['path', 'kind', 'idcol'])
         
+class AsyncWriter(object):
+    """A background thread that writes the cached data of Tables in a file, so
+    that writing, including compression, overlaps with work on the calling
+    thread. Writes are queued in order, and submitting blocks when the queue is
+    full. All other HDF5 access to the file must hold the writer's lock, see
+    io_tools.file_lock(). Errors raised while writing are raised on the calling
+    thread by the next submit(), wait(), or close().
+    """
+
+    def __init__(self, maxsize=4):
+        """Parameters
+        ----------
+        maxsize : int, optional
+            the maximum number of queued writes
+        """
+        self.lock = RLock()
+        self._queue = Queue(maxsize)
+        self._errors = []
+        self._thread = None
+
+    def submit(self, tbl, data, n, recycle=False):
+        """Queues the first n rows of data to be appended to a Table. If 
+        recycle, data is a cache buffer of the table that is returned to it 
+        after being written."""
+        self._raise()
+        if self._thread is None:
+            self._thread = Thread(target=self._run)
+            self._thread.daemon = True
+            self._thread.start()
+        with self.lock:
+            tbl._pending += n
+        self._queue.put((tbl, data, n, recycle))
+
+    def wait(self):
+        """Blocks until all queued writes are complete."""
+        self._queue.join()
+        self._raise()
+
+    def _raise(self):
+        if len(self._errors) > 0:
+            e = self._errors.pop(0)
+            raise e
+
+    def close(self):
+        """Blocks until all queued writes are complete and stops the writer's
+        thread. The thread is started again by the next submit()."""
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+        self._raise()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                self._queue.task_done()
+                return
+            tbl, data, n, recycle = item
+            try:
+                with self.lock:
+                    tbl._pending -= n
+                    tbl._tbl.append(tbl._stored(data[:n]))
+                    tbl._tbl.flush()
+                    tbl.n_writes += 1
+            except Exception as e:
+                self._errors.append(e)
+            finally:
+                if recycle:
+                    tbl._free.put(data)
+                self._queue.task_done()
+
+_writers = weakref.WeakKeyDictionary()
+
+def async_writer(h5file):
+    """Returns the AsyncWriter of a file, which is shared by all of the file's
+    IOManagers."""
+    if h5file not in _writers:
+        _writers[h5file] = AsyncWriter()
+        io_tools.set_file_lock(h5file, _writers[h5file].lock)
+    return _writers[h5file]
+
+_id_tables = weakref.WeakKeyDictionary()
+
+def id_table(h5file):
+    """Returns the IdTable of a file with integer ids."""
+    if h5file not in _id_tables:
+        _id_tables[h5file] = IdTable(h5file)
+    return _id_tables[h5file]
+
 class Group(object):
     """A thin wrapper for a PyTables Group to be used by Cyclopts.
     """
@@ -41,13 +257,23 @@ class Group(object):
             self.prefix = '/{0}'.format(self.prefix)
         self.name = self.path.split('/')[-1]
         
-        if self.h5file is not None and self.path in self.h5file:
-            self._grp = self.h5file.get_node(self.path)
-        else:
-            self._grp = None
+        with self.lock:
+            if self.h5file is not None and self.path in self.h5file:
+                self._grp = self.h5file.get_node(self.path)
+            else:
+                self._grp = None
+
+    @property
+    def lock(self):
+        """The lock that must be held to access the group's file."""
+        return io_tools.file_lock(self.h5file)
 
     def create(self):
         """Creates a group in the h5file."""
+        with self.lock:
+            self._create()
+
+    def _create(self):
         groups = [x for x in self.prefix.split('/') if x]
         prefix = ''
         for name in groups:
@@ -55,20 +281,21 @@ class Group(object):
             prefix = '/' if not prefix else prefix
             if not path in self.h5file:
                 self.h5file.create_group(prefix, name, title=name, 
-                                         filters=tools.FILTERS)
+                                         filters=tools.filters())
                 self.h5file.flush()
             prefix = path
 
         self.h5file.create_group(self.prefix, self.name, title=self.name, 
-                                 filters=tools.FILTERS)
+                                 filters=tools.filters())
         self.h5file.flush()
 
         self._grp = self.h5file.get_node(self.path)
 
     def cond_create(self):
         """Create the group if it does not already exist in the h5file."""
-        if self.path not in self.h5file and self.h5file.mode is not 'r':
-            self.create()
+        with self.lock:
+            if self.path not in self.h5file and self.h5file.mode is not 'r':
+                self._create()
 
     def group(self):
         return self._grp
@@ -76,6 +303,11 @@ class Group(object):
 class Table(object):
     """A thin wrapper for a PyTables Table to be used by Cyclopts.
     """
+    
+    # whether the table stores integer ids in databases with integer ids, see
+    # io_tools.int_ids()
+    keyed = True
+
 
     def __init__(self, h5file=None, path=None, dt=None, chunksize=None, 
                  cachesize=None):
@@ -88,8 +320,8 @@ class Table(object):
         dt : np.dtype, optional
             the dtype for the table
         chunksize : int, optional
-            the table chunksize, Cyclopts will optimize for a 32Kb L1 cache by
-            default
+            the table chunksize, defaults to the chunk size of the table's kind
+            in the current storage profile
         cachesize : int, optional
             the size of data to cache before writing, defaults to 100 times the 
             chunksize
@@ -97,10 +329,15 @@ class Table(object):
         self.h5file = h5file
         self.path = path if path is not None else '/'
         self.dt = dt if dt is not None else np.dtype(None) 
-        # l1 cache size / row size / 2
-        # factor of 2 is ideal for reading/writing speed (per @scopatz's advice)
+        if self.dt.names is not None:
+            # rows are cached with uuids, integer ids are only stored
+            self.dt = io_tools.uuid_dtype(self.dt)
+        self.kind = tools.table_kind(self.dt)
+        # the default profile's 16 KB is half of a 32 KB l1 cache, which is 
+        # ideal for reading/writing speed (per @scopatz's advice)
+        chunk_kb = tools.storage(self.kind).chunk_kb
         chunksize = chunksize if chunksize is not None \
-            else math.floor(32 * 1024 / float(dt.itemsize) / 2)
+            else max(math.floor(chunk_kb * 1024 / float(self.dt.itemsize)), 1)
         self.chunksize = int(chunksize)
         # 100 seems right, eh?
         factor = int(1e2)
@@ -112,17 +349,42 @@ class Table(object):
         self._data = np.empty(shape=(self.cachesize), dtype=self.dt)
         self._idx = 0
         self.n_writes = 0
+        # set by an IOManager with asynchronous writes
+        self.writer = None
+        self._pending = 0
+        self._free = None
         
-        if self.h5file is not None and self.path in self.h5file:
-            self._tbl = self.h5file.get_node(self.path)
-        else:
-            self._tbl = None
+        with self.lock:
+            if self.h5file is not None and self.path in self.h5file:
+                self._tbl = self.h5file.get_node(self.path)
+            else:
+                self._tbl = None
+
+            # the id columns that store integer ids
+            names = self.dt.names or ()
+            if self._tbl is not None:
+                self._keys = [x for x in names \
+                                  if x in self._tbl.dtype.names and \
+                                  io_tools.is_key(self._tbl.dtype, x)]
+            elif self.keyed and io_tools.int_ids(self.h5file):
+                self._keys = [x for x in names if x in io_tools.id_cols]
+            else:
+                self._keys = []
 
     def __del__(self):
         del self._data
 
+    @property
+    def lock(self):
+        """The lock that must be held to access the table's file."""
+        return io_tools.file_lock(self.h5file)
+
     def create(self):
         """Creates a table in the h5file. This must be called before writing."""
+        with self.lock:
+            self._create()
+
+    def _create(self):
         groups = [x for x in self.prefix.split('/') if x]
         prefix = ''
         for name in groups:
@@ -130,22 +392,24 @@ class Table(object):
             prefix = '/' if not prefix else prefix
             if not path in self.h5file:
                 self.h5file.create_group(prefix, name, title=name, 
-                                         filters=tools.FILTERS)
+                                         filters=tools.filters())
                 self.h5file.flush()
             prefix = path
 
         self.h5file.create_table(self.prefix, 
                                  self.name, 
-                                 description=self.dt, 
-                                 filters=tools.FILTERS, 
+                                 description=io_tools.key_dtype(self.dt, 
+                                                                self._keys), 
+                                 filters=tools.filters(self.kind), 
                                  chunkshape=(self.chunksize,))
 
         self._tbl = self.h5file.get_node(self.path)
 
     def cond_create(self):
         """Create the table if it does not already exist in the h5file."""
-        if self.path not in self.h5file and self.h5file.mode is not 'r':
-            self.create()
+        with self.lock:
+            if self.path not in self.h5file and self.h5file.mode is not 'r':
+                self._create()
 
     def table(self):
         return self._tbl
@@ -159,7 +423,9 @@ class Table(object):
 
     def append_data(self, data):
         """Appends data to the Table. If the cachesize limit is reached, data is
-        written to disc.
+        written to disc. Data at least as large as the cache is written in a 
+        single append without being copied through the cache, except for a 
+        remainder smaller than the cache, which is cached.
 
         Parameters
         ----------
@@ -175,22 +441,39 @@ class Table(object):
             self._data[idx:self._idx] = data
             return
 
-        # writing
-        space = arylen - idx
-        n_writes = 1 + int(math.floor(float(ndata - space) / arylen))
-        self._data[idx:arylen] = data[:space]
-        self._idx = arylen
-        self.flush()
-        for i in range(n_writes - 1):
-            start = i * arylen + space
-            stop = (i + 1) * arylen + space
-            self.flush(data[start:stop])
-        self._idx = ndata - (n_writes - 1) * arylen - space
+        # writing through the cache
+        if ndata < arylen:
+            space = arylen - idx
+            self._data[idx:arylen] = data[:space]
+            self._idx = arylen
+            self.flush()
+            self._idx = ndata - space
+            self._data[:self._idx] = data[space:]
+            return
+        
+        # writing directly
+        if idx > 0:
+            self.flush()
+        n = ndata - ndata % arylen
+        self.flush(data[:n])
+        self._idx = ndata - n
         if self._idx > 0:
-            self._data[:self._idx] = data[-self._idx:]
+            self._data[:self._idx] = data[n:]
+
+    def n_rows(self):
+        """Returns the number of rows in the table, including cached rows."""
+        with self.lock:
+            nrows = self._tbl.nrows if self._tbl is not None else 0
+            return nrows + self._pending + self._idx
+
+    def sync(self):
+        """Blocks until all of the table's asynchronous writes are complete."""
+        if self.writer is not None:
+            self.writer.wait()
 
     def writeable(self):
-        return self._tbl is not None and self._tbl._v_file._iswritable()
+        with self.lock:
+            return self._tbl is not None and self._tbl._v_file._iswritable()
             
     def flush(self, data=None):
         """Writes cached data to the table."""
@@ -203,29 +486,70 @@ class Table(object):
             # not writeable, don't do anything
             return
 
-        if data is None:
-            self._tbl.append(self._data[:self._idx])
-            self._idx = 0
-        else:
-            self._tbl.append(data)
-        self._tbl.flush()        
-        self.n_writes += 1
+        if self.writer is not None:
+            self._flush_async(data)
+            return
+
+        with self.lock:
+            if data is None:
+                self._tbl.append(self._stored(self._data[:self._idx]))
+                self._idx = 0
+            else:
+                self._tbl.append(self._stored(data))
+            self._tbl.flush()        
+            self.n_writes += 1
+
+    def _stored(self, rows):
+        """Returns rows as stored, with uuids replaced by integer ids, which are
+        recorded in the file's IdTable."""
+        if len(self._keys) == 0:
+            return rows
+        rows = np.asarray(rows, dtype=self.dt)
+        ret = np.empty(len(rows), dtype=self._tbl.dtype)
+        for name in self.dt.names:
+            if name in self._keys:
+                ret[name] = io_tools.id_keys(rows[name])
+                id_table(self.h5file).record(ret[name], rows[name])
+            else:
+                ret[name] = rows[name]
+        return ret
+
+    def _flush_async(self, data):
+        """Queues a copy of data, or the cache, to be written. The cache is 
+        double buffered, so that rows can be cached while the previous cache is
+        written."""
+        if data is not None:
+            self.writer.submit(self, np.array(data, dtype=self.dt), len(data))
+            return
+        if self._idx == 0:
+            return
+        if self._free is None:
+            self._free = Queue()
+            self._free.put(np.empty_like(self._data))
+        self.writer.submit(self, self._data, self._idx, recycle=True)
+        self._data = self._free.get()
+        self._idx = 0
 
 _result_dt = np.dtype([
                 ("solnid", ('str', 16)), # 16 bytes for uuid
                 ("instid", ('str', 16)), # 16 bytes for uuid
-                ("solver", ('str', 30)), # 30 seems long enough, right?
+                ("solver", ('str', 64)), # the solver specification
                 ("problem", ('str', 30)), # 30 seems long enough, right?
                 ("time", np.float64),
                 ("objective", np.float64),
                 ("cyclopts_version", ('str', 12)),
                 # len(dtime.datetime.now().isoformat(' ')) == 26
                 ("timestamp", ('str', 26)), 
+                # 'ok', 'limit', 'timeout', or 'crash', see exec_tools.soln_status()
+                ("status", ('str', 8)), 
                 ])
         
 class ResultTable(Table):
     """A Cyclopts Table for generic results.
     """
+    
+    # generic tables shared by all families always store uuids
+    keyed = False
 
     def __init__(self, h5file, path='/Results', chunksize=None):
         """Parameters
@@ -235,23 +559,385 @@ class ResultTable(Table):
         path : string
             the absolute path to the table
         chunksize : int, optional
-            the table chunksize, Cyclopts will optimize for a 32Kb L1 cache by
-            default
+            the table chunksize, defaults to the chunk size of the table's kind
+            in the current storage profile
+        """
+        dt = _result_dt
+        if h5file is not None and path in h5file:
+            # tables written before a column was added keep their layout
+            dt = h5file.get_node(path).dtype
+        super(ResultTable, self).__init__(h5file, path, dt, chunksize)
+
+    def record_soln(self, soln, soln_uuid, inst_uuid, solver, status='ok'):
+        """Parameters
+        ----------
+        soln : ProbSolution or None
+            the solution, or None if the solve did not finish
+        soln_uuid : uuid
+            the solution's id
+        inst_uuid : uuid
+            the instance's id
+        solver : str
+            the specification of the solver used, see 
+            problems.canonical_spec()
+        status : str, optional
+            the status of the solve
+        """
+        row = {'solnid': soln_uuid.bytes,
+               'instid': inst_uuid.bytes,
+               'solver': solver,
+               'problem': soln.type if soln is not None else '',
+               'time': soln.time if soln is not None else np.nan,
+               'objective': soln.objective if soln is not None else np.nan,
+               'cyclopts_version': cyclopts.__version__,
+               'timestamp': datetime.datetime.now().isoformat(' '),
+               'status': status,}
+        self.append_data([tuple(row[name] for name in self.dt.names)])
+
+_timing_dt = np.dtype([
+                ("solnid", ('str', 16)), # 16 bytes for uuid
+                ("read", np.float64),
+                ("marshal", np.float64),
+                ("translate", np.float64),
+                ("solve_cpu", np.float64),
+                ("solve_wall", np.float64),
+                ("extract", np.float64),
+                ("record", np.float64),
+                ])
+
+class TimingTable(Table):
+    """A Cyclopts Table for the time spent in each phase of a solve, keyed by
+    solution id. All times are in seconds. Phases not reported by a solution
+    (e.g., translation for non-exchange problems) are recorded as 0.
+    """
+    
+    keyed = False
+
+    def __init__(self, h5file, path='/Timings', chunksize=None):
+        """Parameters
+        ----------
+        h5file : PyTables File
+            the hdf5 file
+        path : string
+            the absolute path to the table
+        chunksize : int, optional
+            the table chunksize, defaults to the chunk size of the table's kind
+            in the current storage profile
         """
-        super(ResultTable, self).__init__(h5file, path, _result_dt, chunksize)
+        super(TimingTable, self).__init__(h5file, path, _timing_dt, chunksize)
 
-    def record_soln(self, soln, soln_uuid, inst_uuid, solver):
+    def record_soln(self, soln, soln_uuid, read_time=0, record_time=0):
+        """Parameters
+        ----------
+        soln : ProbSolution
+            the solution
+        soln_uuid : uuid
+            the solution's id
+        read_time : float, optional
+            the time taken to read the solution's instance
+        record_time : float, optional
+            the time taken to record the solution
+        """
         self.append_data([(
                     soln_uuid.bytes, 
-                    inst_uuid.bytes, 
-                    solver.type, 
-                    soln.type, 
-                    soln.time, 
-                    soln.objective, 
-                    cyclopts.__version__, 
-                    datetime.datetime.now().isoformat(' '),
+                    read_time,
+                    getattr(soln, 'marshal_time', 0),
+                    getattr(soln, 'xlate_time', 0),
+                    soln.time,
+                    getattr(soln, 'solve_wall_time', 0),
+                    getattr(soln, 'extract_time', 0),
+                    record_time,
                     )])
 
+class OffsetTable(Table):
+    """A Cyclopts Table mapping ids to the [start, stop) ranges of the rows of
+    each id in other tables, so that those rows can be read as slices rather
+    than searched for.
+    """
+
+    def __init__(self, h5file, path, names, chunksize=None, idcol='instid', 
+                 paths=None):
+        """Parameters
+        ----------
+        h5file : PyTables File
+            the hdf5 file
+        path : string
+            the absolute path to the table
+        names : list of str
+            the names of the tables whose rows are offset
+        chunksize : int, optional
+            the table chunksize, defaults to the chunk size of the table's kind
+            in the current storage profile
+        idcol : str, optional
+            the id column of the offset tables
+        paths : list of str, optional
+            the absolute paths of the offset tables, in the order of names, 
+            which are required to rebuild offsets
+        """
+        if h5file is not None and path in h5file:
+            # tables written before a name was added lack its column
+            dt = h5file.get_node(path).dtype
+        else:
+            dt = np.dtype([(idcol, ('str', 16))] + \
+                              [(x, np.int64, (2,)) for x in names])
+        super(OffsetTable, self).__init__(h5file, path, dt, chunksize)
+        self.idcol = dt.names[0]
+        self.paths = paths
+        self._offsets = None
+
+    def create(self):
+        super(OffsetTable, self).create()
+        if self.paths is not None:
+            self._tbl.attrs.offset_paths = list(self.paths)
+
+    def record(self, uuid, offsets):
+        """Parameters
+        ----------
+        uuid : uuid
+            the id
+        offsets : dict
+            a mapping of table names to (start, stop) row ranges
+        """
+        row = tuple(offsets.get(x, (0, 0)) for x in self.dt.names[1:])
+        self.append_data([(uuid.bytes,) + row])
+        if self._offsets is not None:
+            self._offsets[io_tools.id_key(uuid)] = \
+                dict(zip(self.dt.names[1:], row))
+
+    def lookup(self, uuid, name):
+        """Returns the (start, stop) row range of an id in a table, or None if
+        it is not recorded."""
+        if self._offsets is None:
+            self.sync()
+            # offsets are keyed by integer id, whether or not ids are stored 
+            # as uuids
+            rows = [self._data[:self._idx]] if self._tbl is None else \
+                [self._tbl.read(), self._data[:self._idx]]
+            names = self.dt.names[1:]
+            self._offsets = {}
+            for x in rows:
+                for key, row in zip(io_tools.as_keys(x[self.idcol]), x):
+                    self._offsets[key] = dict((y, tuple(row[y])) for y in names)
+        offsets = self._offsets.get(io_tools.id_key(uuid))
+        return None if offsets is None else offsets.get(name)
+
+    def rebuild(self):
+        """Rewrites the offsets from the tables they offset, e.g., after rows
+        have been removed from them."""
+        self.flush()
+        self.sync()
+        if self._tbl is not None and 'offset_paths' in self._tbl.attrs:
+            _rebuild_offsets(self._tbl)
+        self._offsets = None
+
+_ledger_dt = np.dtype([
+                ("instid", ('str', 16)), # 16 bytes for uuid
+                ("solver", ('str', 64)), # the solver specification
+                ("solnid", ('str', 16)), # 16 bytes for uuid
+                ])
+
+class LedgerTable(Table):
+    """A Cyclopts Table recording the solutions whose output has been completely
+    written. Entries must only be added after all other output of their
+    solutions has been flushed, so that any solution output without a ledger
+    entry is known to be a partial write.
+    """
+    
+    keyed = False
+
+    def __init__(self, h5file, path='/Ledger', chunksize=None):
+        """Parameters
+        ----------
+        h5file : PyTables File
+            the hdf5 file
+        path : string
+            the absolute path to the table
+        chunksize : int, optional
+            the table chunksize, defaults to the chunk size of the table's kind
+            in the current storage profile
+        """
+        super(LedgerTable, self).__init__(h5file, path, _ledger_dt, chunksize)
+
+    def commit(self, entries):
+        """Adds entries to and flushes the ledger.
+
+        Parameters
+        ----------
+        entries : list of tuples
+            (instid, solver, solnid) entries, where ids are uuids and solver is
+            a solver specification
+        """
+        if len(entries) == 0:
+            return
+        self.append_data([(instid.bytes, solver, solnid.bytes) \
+                              for instid, solver, solnid in entries])
+        self.flush()
+
+    def entries(self):
+        """Returns a list of all (instid, solver, solnid) entries, where solver
+        is a canonical solver specification, see problems.canonical_spec()."""
+        if self._tbl is None:
+            return []
+        return [(tools.str_to_uuid(row['instid']), 
+                 canonical_spec(row['solver']), 
+                 tools.str_to_uuid(row['solnid'])) \
+                    for row in self._tbl.iterrows()]
+
+class IdTable(Table):
+    """The dictionary of a database with integer ids, which records the uuid of
+    each integer id stored in its tables. See io_tools.id_keys().
+    """
+    
+    keyed = False
+
+    def __init__(self, h5file, path=io_tools.ids_path, chunksize=None):
+        """Parameters
+        ----------
+        h5file : PyTables File
+            the hdf5 file
+        path : string
+            the absolute path to the table
+        chunksize : int, optional
+            the table chunksize, defaults to the chunk size of the table's kind
+            in the current storage profile
+        """
+        super(IdTable, self).__init__(h5file, path, io_tools.ids_dt, chunksize)
+        self._known = None
+
+    def record(self, keys, uuids):
+        """Records the uuids of integer ids that are not yet recorded.
+
+        Parameters
+        ----------
+        keys : array-like
+            the integer ids
+        uuids : array-like
+            the uuids of the ids, as 16-byte strings
+        """
+        keys, idx = np.unique(keys, return_index=True)
+        uuids = np.asarray(uuids)[idx]
+        if self._known is None:
+            self.cond_create()
+            rows = self._tbl.read()
+            self._known = dict(zip(rows['key'].tolist(), rows['uuid'].tolist()))
+        new = []
+        for key, x in zip(keys.tolist(), uuids.tolist()):
+            known = self._known.get(key)
+            if known is None:
+                self._known[key] = x
+                new.append((key, x))
+            elif known != x:
+                raise ValueError(('The integer ids of {0} and {1} '
+                                  'collide.').format(tools.str_to_uuid(x), 
+                                                     tools.str_to_uuid(known)))
+        if len(new) > 0:
+            self._tbl.append(new)
+            self._tbl.flush()
+
+def _nbytes(obj):
+    """Returns an estimate of the memory used by arrays in a container."""
+    if isinstance(obj, np.ndarray):
+        return obj.nbytes
+    if isinstance(obj, dict):
+        return sum(_nbytes(x) for x in obj.values())
+    if isinstance(obj, (tuple, list)):
+        return sum(_nbytes(x) for x in obj)
+    return sys.getsizeof(obj)
+
+def _freeze(obj):
+    """Makes the arrays in a container read-only."""
+    if isinstance(obj, np.ndarray):
+        obj.flags.writeable = False
+    elif isinstance(obj, dict):
+        for x in obj.values():
+            _freeze(x)
+    elif isinstance(obj, (tuple, list)):
+        for x in obj:
+            _freeze(x)
+
+def cache_key(obj, *key):
+    """Returns a key of data of a file for an LRUCache, comprised of the file's
+    path and the given key, so that data of different files with the same ids
+    are cached separately. The file is given by a PyTables File, a node in it,
+    a Table, or an IOManager."""
+    if isinstance(obj, (Table, IOManager)):
+        obj = obj.h5file
+    elif not isinstance(obj, t.File):
+        obj = obj._v_file
+    return (os.path.abspath(obj.filename),) + key
+
+class LRUCache(object):
+    """An in-process cache of decoded data, e.g., of instances keyed by their
+    ids, with a memory budget. The least recently used entries are evicted when
+    the budget is exceeded. Numbers of hits, misses, and evictions are counted
+    for tuning the budget. Cached values are shared, so their arrays are made
+    read-only. Keys of data read from a file should include the file, see
+    cache_key().
+    """
+
+    def __init__(self, maxbytes=256 * 1024**2):
+        """Parameters
+        ----------
+        maxbytes : int, optional
+            the memory budget in bytes, 0 disables caching
+        """
+        self.maxbytes = maxbytes
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key, load):
+        """Returns the value of a key, which is computed with load() and cached
+        if it is not already cached. The arrays of the value are read-only,
+        whether or not it is cached."""
+        with self._lock:
+            if key in self._entries:
+                entry = self._entries.pop(key)
+                self._entries[key] = entry
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+        value = load()
+        _freeze(value)
+        nbytes = _nbytes(value)
+        with self._lock:
+            if nbytes <= self.maxbytes and key not in self._entries:
+                self._entries[key] = (value, nbytes)
+                self.nbytes += nbytes
+                self._evict()
+        return value
+
+    def resize(self, maxbytes):
+        """Sets the memory budget in bytes, evicting entries as needed."""
+        with self._lock:
+            self.maxbytes = maxbytes
+            self._evict()
+
+    def clear(self):
+        """Removes all entries and resets all counters."""
+        with self._lock:
+            self._entries.clear()
+            self.nbytes = self.hits = self.misses = self.evictions = 0
+
+    def stats(self):
+        """Returns a dictionary of the cache's counters."""
+        return {'hits': self.hits, 'misses': self.misses, 
+                'evictions': self.evictions, 'entries': len(self._entries), 
+                'nbytes': self.nbytes}
+
+    def _evict(self):
+        while self.nbytes > self.maxbytes:
+            _, (_, nbytes) = self._entries.popitem(last=False)
+            self.nbytes -= nbytes
+            self.evictions += 1
+
+# decoded instances and their data, shared by execution and post processing,
+# and sized by their --cache-size options
+inst_cache = LRUCache()
+
 class PathMap(io_tools.PathMap):
     """A simple container class for mapping columns to Hdf5 paths
     for the Results table"""
@@ -269,7 +955,7 @@ class IOManager(object):
     accessed through the manager by its tables member, which is a dictionary
     from table names to Table objects."""
 
-    def __init__(self, h5file, tables=[], groups=[]):
+    def __init__(self, h5file, tables=[], groups=[], async_writes=False):
         """Parameters
         ----------
         h5file : PyTables File
@@ -278,8 +964,13 @@ class IOManager(object):
             the list of tables to manage
         groups : list of cyclopts_io.Groups, optional
             the list of groups to manage
+        async_writes : bool, optional
+            write tables on the file's background AsyncWriter thread, in which
+            case flush_tables() blocks until all writes are complete and stops
+            the thread
         """
         self.h5file = h5file
+        self.writer = async_writer(h5file) if async_writes else None
         self.tables = {}
         for tbl in tables:
             self.add_table(tbl)
@@ -293,6 +984,7 @@ class IOManager(object):
 
     def add_table(self, tbl):
         self.tables[tbl.path.split('/')[-1]] = tbl
+        tbl.writer = self.writer
         tbl.cond_create()
         
     def add_group(self, grp):
@@ -302,6 +994,8 @@ class IOManager(object):
     def flush_tables(self):
         for tbl in self.tables.values():
             tbl.flush()
+        if self.writer is not None:
+            self.writer.close()
 
     def total_writes(self):
         return sum([tbl.n_writes for tbl in self.tables.values()])
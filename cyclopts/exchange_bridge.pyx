@@ -0,0 +1,377 @@
+"""This module provides hand-written entry points into the C++ resource exchange
+solver that are not generated by xdress.
+
+:author: Matthew Gidden <matthew.gidden _at_ gmail.com>
+"""
+cimport _cproblem
+cimport exchange_instance
+cimport numpy as np
+from cyclopts cimport cpp__cproblem
+from cyclopts cimport cpp_exchange_instance
+from libcpp cimport bool as cpp_bool
+from libcpp.vector cimport vector as cpp_vector
+from libcpp.map cimport map as cpp_map
+
+import time
+import numpy as np
+import exchange_instance
+
+np.import_array()
+
+# the GIL is released while solving, so these are declared nogil
+cdef extern from "exchange_instance.h" namespace "cyclopts" nogil:
+
+    cpp_exchange_instance.ExSolution Run(
+        cpp_vector[cpp_exchange_instance.ExGroup] &,
+        cpp_vector[cpp_exchange_instance.ExNode] &,
+        cpp_vector[cpp_exchange_instance.ExArc] &,
+        cpp__cproblem.Solver &,
+        cpp_bool) except +
+
+    cpp_vector[cpp_exchange_instance.ExSolution] RunMany(
+        cpp_vector[cpp_exchange_instance.ExGroup] &,
+        cpp_vector[cpp_exchange_instance.ExNode] &,
+        cpp_vector[cpp_exchange_instance.ExArc] &,
+        cpp_vector[cpp__cproblem.Solver] &,
+        cpp_bool) except +
+
+    cdef cppclass ExCols:
+        ExCols() except +
+        int n_grps
+        long grp_stride
+        const char * grp_id
+        const char * grp_kind
+        const char * grp_qty
+        const long long * grp_cap_offsets
+        const double * grp_caps
+        const char * grp_cap_dirs
+        int n_nodes
+        long node_stride
+        const char * node_id
+        const char * node_gid
+        const char * node_qty
+        const char * node_excl
+        const char * node_excl_id
+        int n_arcs
+        long arc_stride
+        const char * arc_id
+        const char * arc_uid
+        const char * arc_vid
+        const char * arc_pref
+        const long long * arc_ucap_offsets
+        const double * arc_ucaps
+        const long long * arc_vcap_offsets
+        const double * arc_vcaps
+
+    cpp_vector[cpp_exchange_instance.ExSolution] RunCols(
+        const ExCols &,
+        cpp_vector[cpp__cproblem.Solver] &,
+        cpp_bool) except +
+
+# the flow members of ExSolution, which are not wrapped by the generated
+# exchange_instance.ExSolution
+cdef extern from "exchange_instance.h" namespace "cyclopts":
+
+    cdef cppclass _SolnFlows "cyclopts::ExSolution":
+        cpp_map[int, double] flows
+        cpp_vector[int] arc_ids
+        cpp_vector[double] arc_flows
+
+    void FillFlows(_SolnFlows &)
+
+cdef _SolnFlows * _soln_flows(soln):
+    return <_SolnFlows *> (<_cproblem.ProbSolution> soln)._inst
+
+cdef np.ndarray _view(void * data, np.npy_intp n, int typenum, base):
+    """Returns an array over a non-empty buffer that keeps its base object 
+    alive."""
+    cdef np.ndarray ret = np.PyArray_SimpleNewFromData(1, &n, typenum, data)
+    np.set_array_base(ret, base)
+    return ret
+
+class ExFlowSolution(exchange_instance.ExSolution):
+    """An ExSolution whose flows are given as arrays of arc ids, in ascending
+    order, and the flow along each arc, which are views of the solution's 
+    buffers. Solutions returned by the functions of this module are 
+    ExFlowSolutions. The flows mapping is populated from the arrays when it 
+    is first accessed."""
+    
+    @property
+    def arc_ids(self):
+        cdef _SolnFlows * soln = _soln_flows(self)
+        if soln.arc_ids.empty():
+            return np.empty(0, dtype=np.int32)
+        return _view(&soln.arc_ids[0], soln.arc_ids.size(), np.NPY_INT32, self)
+
+    @arc_ids.setter
+    def arc_ids(self, value):
+        cdef _SolnFlows * soln = _soln_flows(self)
+        soln.arc_ids = np.asarray(value, dtype=np.int32).tolist()
+        soln.flows.clear()
+
+    @property
+    def arc_flows(self):
+        cdef _SolnFlows * soln = _soln_flows(self)
+        if soln.arc_flows.empty():
+            return np.empty(0, dtype=np.float64)
+        return _view(&soln.arc_flows[0], soln.arc_flows.size(), 
+                     np.NPY_FLOAT64, self)
+
+    @arc_flows.setter
+    def arc_flows(self, value):
+        cdef _SolnFlows * soln = _soln_flows(self)
+        soln.arc_flows = np.asarray(value, dtype=np.float64).tolist()
+        soln.flows.clear()
+
+    @property
+    def flows(self):
+        cdef _SolnFlows * soln = _soln_flows(self)
+        if soln.flows.empty() and not soln.arc_ids.empty():
+            FillFlows(soln[0])
+        return exchange_instance.ExSolution.flows.__get__(self, type(self))
+
+    @flows.setter
+    def flows(self, value):
+        exchange_instance.ExSolution.flows.__set__(self, value)
+
+# the dtype of each field read in place by RunCols
+_col_dtypes = {
+    'id': 'i8',
+    'gid': 'i8',
+    'uid': 'i8',
+    'vid': 'i8',
+    'excl_id': 'i8',
+    'kind': '?',
+    'excl': '?',
+    'qty': 'f8',
+    'pref': 'f8',
+    }
+
+cdef const char * _field(np.ndarray ary, name) except NULL:
+    """Returns a pointer to a field of the first row of a structured array."""
+    dt, offset = ary.dtype.fields[name][:2]
+    if dt != np.dtype(_col_dtypes[name]):
+        raise TypeError('Field {0} must be of type {1}, not {2}'.format(
+                name, np.dtype(_col_dtypes[name]), dt))
+    return (<const char *> np.PyArray_DATA(ary)) + <long> offset
+
+cdef np.ndarray _offsets(offsets, int n):
+    offsets = np.ascontiguousarray(offsets, dtype=np.int64)
+    if offsets.ndim != 1 or len(offsets) != n + 1:
+        raise ValueError('Expected {0} offsets, got {1}.'.format(
+                n + 1, len(offsets)))
+    return offsets
+
+cdef int _copy_inst(groups, nodes, arcs,
+                    cpp_vector[cpp_exchange_instance.ExGroup] & groups_proxy,
+                    cpp_vector[cpp_exchange_instance.ExNode] & nodes_proxy,
+                    cpp_vector[cpp_exchange_instance.ExArc] & arcs_proxy) except -1:
+    """Copies lists of ExGroups, ExNodes, and ExArcs into C++ vectors."""
+    cdef int i
+    groups_proxy.reserve(len(groups))
+    for i in range(len(groups)):
+        groups_proxy.push_back((<cpp_exchange_instance.ExGroup *>
+                                (<exchange_instance.ExGroup> groups[i])._inst)[0])
+    nodes_proxy.reserve(len(nodes))
+    for i in range(len(nodes)):
+        nodes_proxy.push_back((<cpp_exchange_instance.ExNode *>
+                               (<exchange_instance.ExNode> nodes[i])._inst)[0])
+    arcs_proxy.reserve(len(arcs))
+    for i in range(len(arcs)):
+        arcs_proxy.push_back((<cpp_exchange_instance.ExArc *>
+                              (<exchange_instance.ExArc> arcs[i])._inst)[0])
+    return 0
+
+cdef _wrap_soln(cpp_exchange_instance.ExSolution & soln):
+    """Returns an ExFlowSolution holding a copy of a C++ ExSolution."""
+    ret = ExFlowSolution()
+    (<cpp_exchange_instance.ExSolution *>
+     (<_cproblem.ProbSolution> ret)._inst)[0] = soln
+    return ret
+
+cdef list _wrap_solns(cpp_vector[cpp_exchange_instance.ExSolution] & solns,
+                      double marshal):
+    """Returns ExFlowSolutions for C++ ExSolutions. The marshal time of each
+    is the sum of the input marshal time and the time to wrap all solutions."""
+    cdef int i
+    start = time.time()
+    ret = [_wrap_soln(solns[i]) for i in range(solns.size())]
+    marshal += time.time() - start
+    for soln in ret:
+        soln.marshal_time = marshal
+    return ret
+
+def run(groups, nodes, arcs, solver, verbose=False):
+    """Translates an instance into an exchange graph and solves it. The GIL is
+    released for the duration of the translation and solve, so instances may be
+    solved concurrently from multiple threads.
+
+    Parameters
+    ----------
+    groups : list of ExGroups
+        the instance's groups
+    nodes : list of ExNodes
+        the instance's nodes
+    arcs : list of ExArcs
+        the instance's arcs
+    solver : Solver
+        the solver to use
+    verbose : bool, optional
+        print solver output
+
+    Returns
+    -------
+    soln : ExFlowSolution
+        the solution
+    """
+    cdef cpp_vector[cpp_exchange_instance.ExGroup] groups_proxy
+    cdef cpp_vector[cpp_exchange_instance.ExNode] nodes_proxy
+    cdef cpp_vector[cpp_exchange_instance.ExArc] arcs_proxy
+    cdef cpp__cproblem.Solver solver_proxy
+    cdef cpp_exchange_instance.ExSolution rtnval
+    cdef cpp_vector[cpp_exchange_instance.ExSolution] solns
+    cdef cpp_bool verbose_proxy = verbose
+    start = time.time()
+    _copy_inst(groups, nodes, arcs, groups_proxy, nodes_proxy, arcs_proxy)
+    solver_proxy = (<cpp__cproblem.Solver *> (<_cproblem.Solver> solver)._inst)[0]
+    marshal = time.time() - start
+    with nogil:
+        rtnval = Run(groups_proxy, nodes_proxy, arcs_proxy, solver_proxy,
+                     verbose_proxy)
+    solns.push_back(rtnval)
+    return _wrap_solns(solns, marshal)[0]
+
+def run_many(groups, nodes, arcs, solvers, verbose=False):
+    """Translates an instance into an exchange graph once and solves it with
+    each solver. The graph is translated anew after a greedy solve, which
+    consumes its capacities. As with run, the GIL is released while solving.
+
+    Parameters
+    ----------
+    groups : list of ExGroups
+        the instance's groups
+    nodes : list of ExNodes
+        the instance's nodes
+    arcs : list of ExArcs
+        the instance's arcs
+    solvers : list of Solvers
+        the solvers to use
+    verbose : bool, optional
+        print solver output
+
+    Returns
+    -------
+    solns : list of ExFlowSolutions
+        one solution per solver, in the same order as solvers
+    """
+    cdef cpp_vector[cpp_exchange_instance.ExGroup] groups_proxy
+    cdef cpp_vector[cpp_exchange_instance.ExNode] nodes_proxy
+    cdef cpp_vector[cpp_exchange_instance.ExArc] arcs_proxy
+    cdef cpp_vector[cpp__cproblem.Solver] solvers_proxy
+    cdef cpp_vector[cpp_exchange_instance.ExSolution] rtnval
+    cdef cpp_bool verbose_proxy = verbose
+    cdef int i
+    start = time.time()
+    _copy_inst(groups, nodes, arcs, groups_proxy, nodes_proxy, arcs_proxy)
+    for i in range(len(solvers)):
+        solvers_proxy.push_back((<cpp__cproblem.Solver *>
+                                 (<_cproblem.Solver> solvers[i])._inst)[0])
+    marshal = time.time() - start
+    with nogil:
+        rtnval = RunMany(groups_proxy, nodes_proxy, arcs_proxy, solvers_proxy,
+                         verbose_proxy)
+    return _wrap_solns(rtnval, marshal)
+
+def run_columnar(groups, nodes, arcs, caps, solvers, verbose=False):
+    """Translates a columnar instance into an exchange graph once and solves it
+    with each solver. Groups, nodes, and arcs are structured arrays with the 
+    ExGroup, ExNode, and ExArc dtypes of the exchange_family module (or any
+    dtype with identically typed fields), and are read in place without
+    constructing an object per row. Capacities are given separately as 
+    contiguous arrays with compressed-row offsets. As with run, the GIL is 
+    released while solving.
+
+    Parameters
+    ----------
+    groups : numpy structured array
+        the instance's groups
+    nodes : numpy structured array
+        the instance's nodes
+    arcs : numpy structured array
+        the instance's arcs
+    caps : dict
+        a mapping with keys 'caps', 'cap_dirs', and 'cap_offsets' for groups
+        and keys 'ucaps', 'ucap_offsets', 'vcaps', and 'vcap_offsets' for 
+        arcs, e.g., from exchange_family.cap_offsets(); offsets are of length 
+        one larger than the number of rows
+    solvers : list of Solvers
+        the solvers to use
+    verbose : bool, optional
+        print solver output
+
+    Returns
+    -------
+    solns : list of ExFlowSolutions
+        one solution per solver, in the same order as solvers
+    """
+    cdef ExCols cols
+    cdef cpp_vector[cpp__cproblem.Solver] solvers_proxy
+    cdef cpp_vector[cpp_exchange_instance.ExSolution] rtnval
+    cdef cpp_bool verbose_proxy = verbose
+    cdef np.ndarray g = np.asanyarray(groups)
+    cdef np.ndarray n = np.asanyarray(nodes)
+    cdef np.ndarray a = np.asanyarray(arcs)
+    cdef int i
+    start = time.time()
+    for ary in (g, n, a):
+        if ary.ndim != 1:
+            raise ValueError('Columnar instance arrays must be 1 dimensional.')
+    
+    # buffers must stay referenced until the solve completes
+    cdef np.ndarray grp_offsets = _offsets(caps['cap_offsets'], len(g))
+    cdef np.ndarray grp_caps = np.ascontiguousarray(caps['caps'], 
+                                                    dtype=np.float64)
+    cdef np.ndarray grp_cap_dirs = np.ascontiguousarray(caps['cap_dirs'], 
+                                                        dtype=np.bool_)
+    cdef np.ndarray ucap_offsets = _offsets(caps['ucap_offsets'], len(a))
+    cdef np.ndarray ucaps = np.ascontiguousarray(caps['ucaps'], 
+                                                 dtype=np.float64)
+    cdef np.ndarray vcap_offsets = _offsets(caps['vcap_offsets'], len(a))
+    cdef np.ndarray vcaps = np.ascontiguousarray(caps['vcaps'], 
+                                                 dtype=np.float64)
+
+    cols.n_grps = len(g)
+    cols.grp_stride = g.strides[0] if len(g) > 0 else 0
+    cols.grp_id = _field(g, 'id')
+    cols.grp_kind = _field(g, 'kind')
+    cols.grp_qty = _field(g, 'qty')
+    cols.grp_cap_offsets = <const long long *> np.PyArray_DATA(grp_offsets)
+    cols.grp_caps = <const double *> np.PyArray_DATA(grp_caps)
+    cols.grp_cap_dirs = <const char *> np.PyArray_DATA(grp_cap_dirs)
+
+    cols.n_nodes = len(n)
+    cols.node_stride = n.strides[0] if len(n) > 0 else 0
+    cols.node_id = _field(n, 'id')
+    cols.node_gid = _field(n, 'gid')
+    cols.node_qty = _field(n, 'qty')
+    cols.node_excl = _field(n, 'excl')
+    cols.node_excl_id = _field(n, 'excl_id')
+
+    cols.n_arcs = len(a)
+    cols.arc_stride = a.strides[0] if len(a) > 0 else 0
+    cols.arc_id = _field(a, 'id')
+    cols.arc_uid = _field(a, 'uid')
+    cols.arc_vid = _field(a, 'vid')
+    cols.arc_pref = _field(a, 'pref')
+    cols.arc_ucap_offsets = <const long long *> np.PyArray_DATA(ucap_offsets)
+    cols.arc_ucaps = <const double *> np.PyArray_DATA(ucaps)
+    cols.arc_vcap_offsets = <const long long *> np.PyArray_DATA(vcap_offsets)
+    cols.arc_vcaps = <const double *> np.PyArray_DATA(vcaps)
+
+    for i in range(len(solvers)):
+        solvers_proxy.push_back((<cpp__cproblem.Solver *>
+                                 (<_cproblem.Solver> solvers[i])._inst)[0])
+    marshal = time.time() - start
+    with nogil:
+        rtnval = RunCols(cols, solvers_proxy, verbose_proxy)
+    return _wrap_solns(rtnval, marshal)
@@ -2,14 +2,18 @@
 
 :author: Matthew Gidden <matthew.gidden _at_ gmail.com>
 """
+import time
+import uuid
+import threading
 import numpy as np
-from collections import Iterable
+import tables as t
 
 from cyclopts.problems import ProblemFamily
 import cyclopts.cyclopts_io as cycio
 import cyclopts.io_tools as io_tools
 import cyclopts.tools as tools
 import cyclopts.exchange_instance as exinst
+import cyclopts.exchange_bridge as bridge
 
 _N_CAPS_MAX = 4
 
@@ -20,13 +24,22 @@ _tbl_names = {
     "properties": "ExchangeInstProperties",
     "solution_properties": "ExchangeInstSolutionProperties",    
     "pp": "PostProcess",
+    "offsets": "ExchangeInstOffsets",
+    "soln_offsets": "ExchangeSolnOffsets",
 }
 
+# tables whose rows are recorded contiguously per instance, with offsets
+_offset_names = ["ExGroup", "ExNode", "ExArc"]
+
+# arcs and solutions are single tables with all instances and solutions, or,
+# in databases written before that, groups with one table per id
 _grp_names = {
     "ExArc": "ExchangeArcs",
     "solutions": "ExchangeInstSolutions",    
 }
 
+_io_names = dict(_tbl_names, **_grp_names)
+
 _id_cols = {
     "properties": "instid",
     "solution_properties": "solnid",    
@@ -95,6 +108,13 @@ _dtypes = {
         ]),
     }
 
+# the single-table layout of arcs and solutions
+_col_dtypes = {
+    "ExArc": np.dtype([("instid", ('str', 16))] + _dtypes["ExArc"].descr),
+    "solutions": np.dtype([("solnid", ('str', 16))] + \
+                              _dtypes["solutions"].descr),
+    }
+
 def column_to_table(col):
     """return the table in which the column resides"""
     blacklist = ['paramid', 'instid', 'species', 'solnid']
@@ -128,6 +148,191 @@ def arc_tpl(obj):
            obj.vid, np.append(obj.vcaps, [0] * (_N_CAPS_MAX - len(obj.vcaps))), 
            obj.pref)
 
+def _columns(rows, names):
+    """Returns a mapping of names to the columns of a list of tuples."""
+    cols = zip(*rows) if len(rows) > 0 else [()] * len(names)
+    return dict(zip(names, cols))
+
+def _padded(rows, dtype=np.float64):
+    """Returns a 2d array of rows of different lengths padded with zeros to
+    _N_CAPS_MAX columns."""
+    lens = np.fromiter((len(x) for x in rows), dtype=np.int64, 
+                       count=len(rows))
+    ret = np.zeros((len(rows), _N_CAPS_MAX), dtype=dtype)
+    if len(rows) > 0:
+        ret[np.arange(_N_CAPS_MAX) < lens[:, np.newaxis]] = \
+            np.concatenate(rows)
+    return ret
+
+def encode_inst(instid, groups, nodes, arcs, arc_dt=None):
+    """Returns structured arrays of the groups, nodes, and arcs of an instance,
+    each filled in a single pass over the instance's objects. Capacities are 
+    padded to _N_CAPS_MAX entries in bulk.
+
+    Parameters
+    ----------
+    instid : uuid or None
+        the instance id, with which id columns are filled if given
+    groups, nodes, arcs : lists of ExGroups, ExNodes, and ExArcs
+        the instance
+    arc_dt : np.dtype, optional
+        the dtype of the arcs, the ExArc dtype by default, which is filled 
+        with the instance id if it has an instid field
+
+    Returns
+    -------
+    groups, nodes, arcs : numpy structured arrays
+        with the ExGroup, ExNode, and given arc dtypes
+    """
+    uid = '' if instid is None else instid.bytes
+    grps = np.empty(len(groups), dtype=_dtypes['ExGroup'])
+    grps['instid'] = uid
+    names = ['id', 'kind', 'qty', 'caps', 'cap_dirs']
+    cols = _columns([(x.id, x.kind, x.qty, x.caps, x.cap_dirs) \
+                         for x in groups], names)
+    for name in names[:3]:
+        grps[name] = cols[name]
+    grps['caps'] = _padded(cols['caps'])
+    grps['cap_dirs'] = _padded(cols['cap_dirs'], np.bool_)
+    
+    nds = np.empty(len(nodes), dtype=_dtypes['ExNode'])
+    nds['instid'] = uid
+    names = ['id', 'gid', 'kind', 'qty', 'excl', 'excl_id']
+    cols = _columns([(x.id, x.gid, x.kind, x.qty, x.excl, x.excl_id) \
+                         for x in nodes], names)
+    for name in names:
+        nds[name] = cols[name]
+
+    arc_dt = _dtypes['ExArc'] if arc_dt is None else arc_dt
+    arcs_ = np.empty(len(arcs), dtype=arc_dt)
+    if 'instid' in arc_dt.names:
+        arcs_['instid'] = uid
+    names = ['id', 'uid', 'vid', 'pref', 'ucaps', 'vcaps']
+    cols = _columns([(x.id, x.uid, x.vid, x.pref, x.ucaps, x.vcaps) \
+                         for x in arcs], names)
+    for name in names[:4]:
+        arcs_[name] = cols[name]
+    arcs_['ucaps'] = _padded(cols['ucaps'])
+    arcs_['vcaps'] = _padded(cols['vcaps'])
+    return grps, nds, arcs_
+
+def inst_rows(name, n):
+    """Returns a structured array of n zeroed rows of an instance's groups,
+    nodes, or arcs, i.e., with the 'ExGroup', 'ExNode', or 'ExArc' dtype, with
+    which species may generate columnar instances."""
+    return np.zeros(n, dtype=_dtypes[name])
+
+def _encoded(instid, inst, arc_dt=None):
+    """Returns the structured arrays of an instance, either of objects or
+    columnar, as from encode_inst(), and its number of constraints."""
+    if not _is_columnar(inst):
+        groups, nodes, arcs = inst
+        nconstr = sum(len(x.caps) for x in groups)
+        return encode_inst(instid, groups, nodes, arcs, arc_dt=arc_dt) + \
+            (nconstr,)
+    groups, nodes, arcs = (x.copy() for x in inst[:3])
+    groups['instid'] = instid.bytes
+    nodes['instid'] = instid.bytes
+    arc_dt = _dtypes['ExArc'] if arc_dt is None else arc_dt
+    if arcs.dtype != arc_dt:
+        arcs_ = np.empty(len(arcs), dtype=arc_dt)
+        for name in arc_dt.names:
+            arcs_[name] = instid.bytes if name == 'instid' else arcs[name]
+        arcs = arcs_
+    return groups, nodes, arcs, len(inst[3]['caps'])
+
+def _csr(values, mask):
+    """Returns the masked values of a 2d array in row order and the offsets of
+    each row in the result."""
+    offsets = np.zeros(len(mask) + 1, dtype=np.int64)
+    np.cumsum(mask.sum(axis=1), out=offsets[1:])
+    return np.ascontiguousarray(values[mask]), offsets
+
+def cap_offsets(groups, arcs):
+    """Returns the capacities of structured arrays of groups and arcs in the
+    form used by exchange_bridge.run_columnar, i.e., as contiguous arrays with
+    compressed-row offsets. A group has as many capacities as it has positive
+    capacity entries, and an arc has all of its positive unit capacities,
+    consistent with ResourceExchange.read_inst().
+
+    Parameters
+    ----------
+    groups : numpy structured array
+        groups with the ExGroup dtype
+    arcs : numpy structured array
+        arcs with the ExArc dtype
+
+    Returns
+    -------
+    caps : dict
+        capacities and their offsets keyed by 'caps', 'cap_dirs',
+        'cap_offsets', 'ucaps', 'ucap_offsets', 'vcaps', and 'vcap_offsets'
+    """
+    ncaps = (groups['caps'] > 0).sum(axis=1)
+    mask = np.arange(_N_CAPS_MAX) < ncaps[:, np.newaxis]
+    caps, cap_offsets = _csr(groups['caps'], mask)
+    cap_dirs, _ = _csr(groups['cap_dirs'], mask)
+    ucaps, ucap_offsets = _csr(arcs['ucaps'], arcs['ucaps'] > 0)
+    vcaps, vcap_offsets = _csr(arcs['vcaps'], arcs['vcaps'] > 0)
+    return {'caps': caps, 'cap_dirs': cap_dirs, 'cap_offsets': cap_offsets,
+            'ucaps': ucaps, 'ucap_offsets': ucap_offsets, 
+            'vcaps': vcaps, 'vcap_offsets': vcap_offsets,}
+
+def inst_objs(groups, nodes, arcs, caps):
+    """Returns lists of ExGroups, ExNodes, and ExArcs from a columnar instance,
+    i.e., structured arrays of groups, nodes, and arcs and their capacities 
+    from cap_offsets()."""
+    grps = []
+    offs = caps['cap_offsets'].tolist()
+    cols = [groups[x].tolist() for x in ('id', 'kind', 'qty')]
+    for i, (id, kind, qty) in enumerate(zip(*cols)):
+        obj = exinst.ExGroup()
+        obj.id, obj.kind, obj.qty = id, kind, qty
+        obj.caps = caps['caps'][offs[i]:offs[i + 1]]
+        obj.cap_dirs = caps['cap_dirs'][offs[i]:offs[i + 1]]
+        grps.append(obj)
+
+    nds = []
+    cols = [nodes[x].tolist() for x in \
+                ('id', 'gid', 'kind', 'qty', 'excl', 'excl_id')]
+    for id, gid, kind, qty, excl, excl_id in zip(*cols):
+        obj = exinst.ExNode()
+        obj.id, obj.gid, obj.kind, obj.qty = id, gid, kind, qty
+        obj.excl, obj.excl_id = excl, excl_id
+        nds.append(obj)
+
+    arcs_ = []
+    uoffs = caps['ucap_offsets'].tolist()
+    voffs = caps['vcap_offsets'].tolist()
+    cols = [arcs[x].tolist() for x in ('id', 'uid', 'vid', 'pref')]
+    for i, (id, uid, vid, pref) in enumerate(zip(*cols)):
+        obj = exinst.ExArc()
+        obj.id, obj.uid, obj.vid, obj.pref = id, uid, vid, pref
+        obj.ucaps = caps['ucaps'][uoffs[i]:uoffs[i + 1]]
+        obj.vcaps = caps['vcaps'][voffs[i]:voffs[i + 1]]
+        arcs_.append(obj)
+    return grps, nds, arcs_
+
+def _is_columnar(inst):
+    # object arrays of groups, nodes, and arcs are not columnar
+    return len(inst) == 4 and all(isinstance(x, np.ndarray) and \
+                                      x.dtype.names is not None \
+                                      for x in inst[:3])
+
+def encoded_prop_tpl(instid, paramid, species, groups, nodes, arcs, nconstr):
+    """Returns the same properties as prop_tpl() from the structured arrays of
+    an instance, as from encode_inst(), and its number of constraints."""
+    nu_grps = np.count_nonzero(groups['kind'])
+    nu_nodes = np.count_nonzero(nodes['kind'])
+    order = np.argsort(nodes['id'])
+    ids, excl = nodes['id'][order], nodes['excl'][order]
+    excl_arcs = excl[np.searchsorted(ids, arcs['uid'])] | \
+        excl[np.searchsorted(ids, arcs['vid'])]
+    excl_frac = np.count_nonzero(excl_arcs) / float(len(arcs))
+    return (paramid.bytes, instid.bytes, species, len(arcs), nu_grps, 
+            len(groups) - nu_grps, nu_nodes, len(nodes) - nu_nodes, nconstr, 
+            excl_frac)
+
 def prop_tpl(instid, paramid, species, groups, nodes, arcs):
     nu_grps = sum(1 for g in groups if int(g.kind))
     nv_grps = len(groups) - nu_grps
@@ -139,23 +344,35 @@ def prop_tpl(instid, paramid, species, groups, nodes, arcs):
     return (paramid.bytes, instid.bytes, species, len(arcs), nu_grps, nv_grps, 
             nu_nodes, nv_nodes, nconstr, excl_frac)
 
-def _iid_to_prefs(iid, tbl, narcs, strategy='col'):
+def _iid_to_prefs(iid, tbl, narcs, strategy='col', offsets=None):
     """return a numpy array of preferences"""
+    return cycio.inst_cache.get(
+        cycio.cache_key(tbl, 'ResourceExchange', 'prefs', iid), 
+        lambda: _read_prefs(iid, tbl, narcs, strategy, offsets))
+
+def _read_prefs(iid, tbl, narcs, strategy, offsets):
     if strategy == 'grp':
         return tbl.read(field='pref')
+    if strategy == 'regen':
+        # tbl is the IOManager of a database of virtual instances
+        arcs = ResourceExchange().read_inst_columnar(iid, tbl)[2]
+        ret = np.zeros(narcs)
+        ret[arcs['id']] = arcs['pref']
+        return ret
     # otherwise, do column strat
     ret = np.zeros(narcs)
-    rows = cycio.uuid_rows(tbl, iid)
+    rows = cycio.offset_rows(tbl, iid, offsets, 'ExArc')
     ret[rows['id']] = rows['pref']
     # for x in rows:
     #     ret[x['id']] = x['pref']
     return ret
     
-def _sid_to_flows(sid, tbl, narcs, strategy='col'):
+def _sid_to_flows(sid, tbl, narcs, strategy='col', offsets=None):
     """return a numpy array of flows"""
     if strategy == 'col':
         ret = np.zeros(narcs)
-        rows = cycio.uuid_rows(tbl, sid, colname='solnid')
+        rows = cycio.offset_rows(tbl, sid, offsets, 'solutions', 
+                                 colname='solnid')
         ret[rows['arc_id']] = rows['flow']
     elif strategy == 'grp':
         # conditional can be removed when all legacy dbs are converted
@@ -169,34 +386,171 @@ def _sid_to_flows(sid, tbl, narcs, strategy='col'):
     #     ret[x['arc_id']] = x['flow']
     return ret
 
-def _pp_work_col(instid, solnids, prop_tbl, arc_tbl, soln_tbl):
+def _pp_work(instid, solnids, prop_tbl, arc_tbl, soln_tbl, 
+             strategy=('col', 'col'), offsets=(None, None)):
+    """strategy and offsets are given for arcs and solutions, respectively,
+    where soln_tbl is the group of solution tables for the 'grp' strategy"""
     narcs = cycio.uuid_rows(prop_tbl, instid)[0]['n_arcs']
-    prefs = _iid_to_prefs(instid, arc_tbl, narcs)
+    prefs = _iid_to_prefs(instid, arc_tbl, narcs, strategy=strategy[0], 
+                          offsets=offsets[0])
     sid_to_flows = {}
     data = []
     for sid in solnids:
-        flows = _sid_to_flows(sid, soln_tbl, narcs)
+        tbl = soln_tbl if strategy[1] == 'col' else \
+            soln_tbl._f_get_child('id_' + sid.hex)
+        flows = _sid_to_flows(sid, tbl, narcs, strategy=strategy[1], 
+                              offsets=offsets[1])
         data.append((sid.bytes, np.dot(prefs, flows)))
         sid_to_flows[sid] = flows
     return narcs, sid_to_flows, data
 
-def _pp_work_grp(instid, solnids, prop_tbl, arc_tbl, soln_tbl):
-    narcs = cycio.uuid_rows(prop_tbl, instid)[0]['n_arcs']
-    prefs = _iid_to_prefs(instid, arc_tbl, narcs, strategy='grp')
-    sid_to_flows = {}
-    data = []
-    for sid in solnids:
-        tbl = soln_tbl._f_get_child('id_' + sid.hex)
-        flows = _sid_to_flows(sid, tbl, narcs, strategy='grp')
-        data.append((sid.bytes, np.dot(prefs, flows)))
-        sid_to_flows[sid] = flows
-    return narcs, sid_to_flows, data
+def _soln_narcs(h5file, prefix):
+    """Returns the sorted integer keys of all solutions and the number of arcs
+    of the instance of each, or -1 if it is not recorded."""
+    sprops = h5file.get_node('/'.join([prefix, 
+                                       _tbl_names['solution_properties']]))
+    props = h5file.get_node('/'.join([prefix, _tbl_names['properties']]))
+    sids = io_tools.as_keys(sprops.col('solnid'))
+    iids = io_tools.as_keys(sprops.col('instid'))
+    narcs = np.empty(len(sids), dtype=np.int64)
+    narcs.fill(-1)
+    if props.nrows > 0:
+        p_iids = io_tools.as_keys(props.col('instid'))
+        order = np.argsort(p_iids, kind='mergesort')
+        pos = order[np.minimum(np.searchsorted(p_iids, iids, sorter=order), 
+                               len(order) - 1)]
+        found = p_iids[pos] == iids
+        narcs[found] = props.col('n_arcs')[pos[found]]
+    order = np.argsort(sids, kind='mergesort')
+    return sids[order], narcs[order]
+
+def _soln_rows(h5file, path):
+    """Yields the uuid and flow rows of each solution in a table of all 
+    solutions or a group of tables per solution."""
+    if cycio.is_group(h5file, path):
+        for tbl in h5file.get_node(path)._f_iter_nodes(classname='Table'):
+            yield uuid.UUID(tbl._v_name[len('id_'):]), tbl.read()
+        return
+    rows = io_tools.with_uuids(h5file, h5file.get_node(path).read())
+    ids, rngs = cycio.id_ranges(rows['solnid'])
+    for x, (start, stop) in zip(ids, rngs):
+        yield tools.str_to_uuid(x), rows[start:stop]
+
+def flow_footprint(h5file, prefix=None):
+    """Measures the storage footprint of the solution flows of a database when
+    all flows are stored and when only non-zero flows are stored. Both are 
+    written to an in-memory database with the current storage profile.
+
+    Parameters
+    ----------
+    h5file : PyTables File
+        the database
+    prefix : str, optional
+        the absolute path to the group of the family's tables
+
+    Returns
+    -------
+    footprint : dict
+        the number of solutions (nsolns), stored flows (rows) and their size on
+        disk (stored_mb), non-zero flows (nonzero), and the number of rows and
+        size of dense and sparse storage (dense_rows, dense_mb, sparse_rows, 
+        sparse_mb)
+    """
+    prefix = ResourceExchange().io_prefix if prefix is None else prefix
+    path = '/'.join([prefix, _grp_names['solutions']])
+    ret = dict((x, 0) for x in ['nsolns', 'rows', 'stored_mb', 'nonzero', 
+                                'dense_rows', 'dense_mb', 'sparse_rows', 
+                                'sparse_mb'])
+    if path not in h5file:
+        return ret
+    node = h5file.get_node(path)
+    leaves = list(node._f_iter_nodes(classname='Table')) \
+        if cycio.is_group(h5file, path) else [node]
+    ret['stored_mb'] = sum(x.size_on_disk for x in leaves) / float(1024**2)
+    
+    sids, narcs = _soln_narcs(h5file, prefix)
+    mem = t.open_file('flow_footprint_{0}.h5'.format(uuid.uuid4().hex), 
+                      mode='w', driver='H5FD_CORE', 
+                      driver_core_backing_store=0)
+    io_tools.follow_schema(h5file, mem)
+    tbls = {}
+    for kind in ['dense', 'sparse']:
+        tbls[kind] = cycio.Table(mem, '/' + kind, _col_dtypes['solutions'])
+        tbls[kind].create()
+    for sid, rows in _soln_rows(h5file, path):
+        key = io_tools.id_key(sid)
+        i = min(np.searchsorted(sids, key), max(len(sids) - 1, 0))
+        n = narcs[i] if len(sids) > 0 and sids[i] == key else -1
+        n = max(n, rows['arc_id'].max() + 1 if len(rows) > 0 else 0)
+        flows = np.zeros(n)
+        flows[rows['arc_id']] = rows['flow']
+        nonzero = np.flatnonzero(flows)
+        for kind, ids in [('dense', np.arange(n)), ('sparse', nonzero)]:
+            data = np.empty(len(ids), dtype=_col_dtypes['solutions'])
+            data['solnid'] = sid.bytes
+            data['arc_id'] = ids
+            data['flow'] = flows[ids]
+            tbls[kind].append_data(data)
+        ret['nsolns'] += 1
+        ret['rows'] += len(rows)
+        ret['nonzero'] += len(nonzero)
+        ret['dense_rows'] += n
+        ret['sparse_rows'] += len(nonzero)
+    for kind, tbl in tbls.items():
+        tbl.flush()
+        ret[kind + '_mb'] = tbl.table().size_on_disk / float(1024**2)
+    mem.close()
+    return ret
 
-def _pp_work(instid, solnids, prop_tbl, arc_tbl, soln_tbl, strategy='col'):
-    if strategy == 'col':
-        return _pp_work_col(instid, solnids, prop_tbl, arc_tbl, soln_tbl)
-    else:
-        return _pp_work_grp(instid, solnids, prop_tbl, arc_tbl, soln_tbl)
+# the fields of instances that are compared by inst_read_times()
+_inst_fields = [['id', 'kind', 'caps', 'cap_dirs', 'qty'], 
+                ['id', 'gid', 'kind', 'qty', 'excl', 'excl_id'],
+                ['id', 'uid', 'vid', 'ucaps', 'vcaps', 'pref']]
+
+def inst_read_times(h5file, instids):
+    """Measures the time to read instances from a database and to regenerate
+    them from their points and ids through the species recorded with it. Only
+    regeneration is measured for databases with virtual instances.
+
+    Parameters
+    ----------
+    h5file : PyTables File
+        the database
+    instids : collection of uuids
+        the instances to read
+
+    Returns
+    -------
+    times : dict
+        the number of instances (ninst), their number of arcs (narcs), the
+        total time to read (read_s) and regenerate (regen_s) them, and whether
+        all regenerated instances are the same as those read (match), which is 
+        None for databases with virtual instances
+    """
+    fam = ResourceExchange()
+    manager = cycio.IOManager(
+        h5file, 
+        fam.register_tables(h5file, fam.io_prefix),
+        fam.register_groups(h5file, fam.io_prefix))
+    virtual = io_tools.virtual_insts(h5file)
+    ret = {'ninst': 0, 'narcs': 0, 'read_s': 0.0, 'regen_s': 0.0, 
+           'match': None if virtual else True}
+    for instid in instids:
+        start = time.time()
+        regen = fam._regen_inst(instid, h5file)[0]
+        ret['regen_s'] += time.time() - start
+        ret['ninst'] += 1
+        ret['narcs'] += len(regen[2])
+        if virtual:
+            continue
+        start = time.time()
+        inst = fam._read_inst_columnar(instid, manager)
+        ret['read_s'] += time.time() - start
+        ret['match'] = ret['match'] and all(
+            np.array_equal(x[name], y[name]) \
+                for x, y, names in zip(inst, regen, _inst_fields) \
+                for name in names)
+    return ret
 
 class PathMap(io_tools.PathMap):
     """A simple container class for mapping columns to Hdf5 paths
@@ -210,6 +564,9 @@ class PathMap(io_tools.PathMap):
         return '/'.join([ResourceExchange().io_prefix, 
                          column_to_table(self.col)])
 
+# instances are regenerated one at a time
+_regen_lock = threading.Lock()
+
 class ResourceExchange(ProblemFamily):
     """A class representing families of resource exchange problems."""
     
@@ -271,9 +628,20 @@ class ResourceExchange(ProblemFamily):
         tables : list of cyclopts_io.Tables
             All tables that could be written to by this species.
         """
-        return [cycio.Table(h5file, 
-                            '/'.join([prefix, _tbl_names[x]]), 
-                            _dtypes[x]) for x in _tbl_names.keys()]
+        path = lambda x: '/'.join([prefix, _io_names[x]])
+        offsets = ['offsets', 'soln_offsets']
+        tbls = [cycio.Table(h5file, path(x), _dtypes[x]) \
+                    for x in _tbl_names.keys() if x not in offsets]
+        tbls.append(cycio.OffsetTable(
+                h5file, path('offsets'), _offset_names, 
+                paths=[path(x) for x in _offset_names]))
+        tbls.append(cycio.OffsetTable(
+                h5file, path('soln_offsets'), ['solutions'], idcol='solnid', 
+                paths=[path('solutions')]))
+        tbls += [cycio.Table(h5file, path(x), _col_dtypes[x]) \
+                     for x in _grp_names.keys() \
+                     if not cycio.is_group(h5file, path(x))]
+        return tbls
 
     def register_groups(self, h5file, prefix):
         """Parameters
@@ -286,17 +654,19 @@ class ResourceExchange(ProblemFamily):
         Returns
         -------
         groups : list of cyclopts_io.Groups
-            All groups that could be written to by this species.
+            All groups that could be written to by this species, i.e., the 
+            groups of tables per id in databases with that layout.
         """
-        return [cycio.Group(h5file, 
-                            '/'.join([prefix, _grp_names[x]])) 
-                for x in _grp_names.keys()]
+        paths = ['/'.join([prefix, _grp_names[x]]) for x in _grp_names.keys()]
+        return [cycio.Group(h5file, x) for x in paths \
+                    if cycio.is_group(h5file, x)]
 
     def record_inst(cls, inst, inst_uuid, param_uuid, species, io_manager=None):
         """Parameters
         ----------
-        inst : tuple of lists of ExGroups, ExNodes, and ExArgs
-            A representation of a problem instance
+        inst : tuple of lists of ExGroups, ExNodes, and ExArgs, or columnar
+            A representation of a problem instance, see read_inst() and 
+            read_inst_columnar()
         inst_uuid : uuid
             The uuid of the instance
         param_uuid : uuid
@@ -308,34 +678,50 @@ class ResourceExchange(ProblemFamily):
         """
         tables = None if io_manager is None else io_manager.tables
         h5groups = None if io_manager is None else io_manager.groups
-        groups, nodes, arcs = inst
-        
-        data = [grp_tpl(inst_uuid, x) for x in groups]
-        tables[_tbl_names['ExGroup']].append_data(data)
-        
-        data = [node_tpl(inst_uuid, x) for x in nodes]
-        tables[_tbl_names['ExNode']].append_data(data)
-
-        arc_grp = h5groups[_grp_names['ExArc']]
-        arc_tbl_path = '/'.join([arc_grp.path, 
-                                 'id_' + inst_uuid.hex])
-        arc_tbl = cycio.Table(arc_grp.h5file, arc_tbl_path, _dtypes['ExArc'])
-        io_manager.add_table(arc_tbl)
-        data = [arc_tpl(x) for x in arcs]
-        arc_tbl.append_data(data)
-
-        data = [prop_tpl(inst_uuid, param_uuid, species, groups, nodes, arcs)]
+        offsets = {}
+        arc_dt = tables[_grp_names['ExArc']].dt \
+            if _grp_names['ExArc'] in tables else None
+        cols = _encoded(inst_uuid, inst, arc_dt=arc_dt)
+        nconstr = cols[3]
+        data = [encoded_prop_tpl(inst_uuid, param_uuid, species, cols[0], 
+                                 cols[1], cols[2], nconstr)]
         tables[_tbl_names['properties']].append_data(data)
+        if io_tools.virtual_insts(io_manager.h5file):
+            return # the instance is regenerated when it is read
+        
+        for name, data in zip(['ExGroup', 'ExNode'], cols[:2]):
+            tbl = tables[_tbl_names[name]]
+            start = tbl.n_rows()
+            tbl.append_data(data)
+            offsets[name] = (start, start + len(data))
+
+        data = cols[2]
+        if _grp_names['ExArc'] in tables:
+            tbl = tables[_grp_names['ExArc']]
+            start = tbl.n_rows()
+            tbl.append_data(data)
+            offsets['ExArc'] = (start, start + len(data))
+        else:
+            arc_grp = h5groups[_grp_names['ExArc']]
+            arc_tbl_path = '/'.join([arc_grp.path, 
+                                     'id_' + inst_uuid.hex])
+            arc_tbl = cycio.Table(arc_grp.h5file, arc_tbl_path, 
+                                  _dtypes['ExArc'])
+            io_manager.add_table(arc_tbl)
+            arc_tbl.append_data(data)
+
+        tables[_tbl_names['offsets']].record(inst_uuid, offsets)
 
     def record_soln(self, soln, soln_uuid, inst, inst_uuid, io_manager):
         """Parameters
         ----------
-        soln : ExSolution
+        soln : ExFlowSolution
             A representation of a problem solution
         soln_uuid : uuid
             The uuid of the solution
-        inst : tuple of lists of ExGroups, ExNodes, and ExArgs
-            A representation of a problem instance
+        inst : tuple
+            A representation of a problem instance as from read_inst() or 
+            read_inst_columnar()
         inst_uuid : uuid
             The uuid of the instance        
         io_manager : cyclopts_io.IOManager, optional
@@ -343,23 +729,168 @@ class ResourceExchange(ProblemFamily):
         """
         tables = io_manager.tables
         h5groups = io_manager.groups
-        groups, nodes, arcs = inst
         
-        # full solution table
-        soln_grp = h5groups[_grp_names['solutions']]
-        soln_tbl_path = '/'.join([soln_grp.path, 
-                                  'id_' + soln_uuid.hex])
-        soln_tbl = cycio.Table(soln_grp.h5file, soln_tbl_path, 
-                               _dtypes['solutions'])
-        io_manager.add_table(soln_tbl)
-        data = [(arcid, flow) for arcid, flow in soln.flows.items()]
+        # full solution, or only its non-zero flows in sparse databases, which
+        # are scattered into dense flows when read
+        arc_ids, flows = soln.arc_ids, soln.arc_flows
+        if io_tools.sparse_flows(io_manager.h5file):
+            nonzero = np.flatnonzero(flows)
+            arc_ids = np.asarray(arc_ids)[nonzero]
+            flows = np.asarray(flows)[nonzero]
+        if _grp_names['solutions'] in tables:
+            soln_tbl = tables[_grp_names['solutions']]
+            data = np.empty(len(arc_ids), dtype=_col_dtypes['solutions'])
+            data['solnid'] = soln_uuid.bytes
+            start = soln_tbl.n_rows()
+            offsets = {'solutions': (start, start + len(data))}
+            tables[_tbl_names['soln_offsets']].record(soln_uuid, offsets)
+        else:
+            soln_grp = h5groups[_grp_names['solutions']]
+            soln_tbl_path = '/'.join([soln_grp.path, 
+                                      'id_' + soln_uuid.hex])
+            soln_tbl = cycio.Table(soln_grp.h5file, soln_tbl_path, 
+                                   _dtypes['solutions'])
+            io_manager.add_table(soln_tbl)
+            data = np.empty(len(arc_ids), dtype=_dtypes['solutions'])
+        data['arc_id'] = arc_ids
+        data['flow'] = flows
         soln_tbl.append_data(data)
         
         # solution properties, 1 entry per soln
         tbl = tables[_tbl_names['solution_properties']]
         tbl.append_data([(soln_uuid.bytes, inst_uuid.bytes, soln.pref_flow, 
                           soln.cost_flow, soln.cyclus_version)])
+
+    def clean_solns(self, keep, io_manager):
+        """Parameters
+        ----------
+        keep : collection of uuids
+            the ids of the solutions to keep
+        io_manager : cyclopts_io.IOManager
+            IOManager that gives access to tables/groups for writing
+
+        Returns
+        -------
+        n : int
+            the number of solutions removed
+        """
+        keep = set(keep)
+        removed = set()
+        
+        # full solutions
+        if _grp_names['solutions'] in io_manager.groups:
+            grp = io_manager.groups[_grp_names['solutions']].group()
+            for name in list(grp._v_children.keys()):
+                solnid = uuid.UUID(name[len('id_'):])
+                if solnid not in keep:
+                    grp._v_file.remove_node(grp, name)
+                    io_manager.tables.pop(name, None)
+                    removed.add(solnid)
+        else:
+            tbl = io_manager.tables[_grp_names['solutions']]
+            tbl.flush()
+            if tbl.table() is not None and tbl.table().nrows > 0:
+                ids = np.unique(tbl.table().col('solnid'))
+                ids = io_tools.to_uuids(tbl.table()._v_file, ids)
+                removed.update(set(ids) - keep)
+                cycio.keep_rows(tbl, 'solnid', [x.bytes for x in keep])
+                io_manager.tables[_tbl_names['soln_offsets']].rebuild()
+
+        # solution properties
+        tbl = io_manager.tables[_tbl_names['solution_properties']].table()
+        if tbl is not None and tbl.nrows > 0:
+            ids = io_tools.to_uuids(tbl._v_file, np.unique(tbl.col('solnid')))
+            removed.update(set(ids) - keep)
+            cycio.keep_rows(tbl, 'solnid', [x.bytes for x in keep])
+        return len(removed)
             
+    def _inst_rows(self, name, uuid, io_manager):
+        """Returns the rows of an instance in a table, read as a slice if the
+        instance's offsets are recorded and valid, otherwise by searching."""
+        tbl = io_manager.tables[_io_names[name]]
+        offsets = io_manager.tables.get(_tbl_names['offsets'])
+        return cycio.offset_rows(tbl, uuid, offsets, name)
+
+    def read_inst_columnar(self, uuid, io_manager):
+        """Parameters
+        ----------
+        uuid : uuid
+            The uuid of the instance to read
+        io_manager : cyclopts_io.IOManager, optional
+            IOManager that gives access to tables/groups for writing
+
+        Returns
+        -------
+        inst : tuple of ExGroup, ExNode, and ExArc structured arrays and a 
+            dictionary of capacities from cap_offsets()
+            A columnar representation of a problem instance, which is read 
+            without constructing an object per row. Instances are cached in 
+            cyclopts_io.inst_cache, so the arrays are read-only.
+        """
+        if io_tools.virtual_insts(io_manager.h5file):
+            return self.regen_inst(uuid, io_manager.h5file)[0]
+        return cycio.inst_cache.get(
+            cycio.cache_key(io_manager.h5file, self.name, uuid), 
+            lambda: self._read_inst_columnar(uuid, io_manager))
+
+    def _read_inst_columnar(self, uuid, io_manager):
+        if io_tools.virtual_insts(io_manager.h5file):
+            return self._regen_inst(uuid, io_manager.h5file)[0]
+        groups = self._inst_rows('ExGroup', uuid, io_manager)
+        nodes = self._inst_rows('ExNode', uuid, io_manager)
+        if _grp_names['ExArc'] in io_manager.tables:
+            arcs = self._inst_rows('ExArc', uuid, io_manager)
+        else:
+            grp = io_manager.groups[_grp_names['ExArc']] 
+            arcs = grp.group()._f_get_child('id_' + uuid.hex).read()
+        return groups, nodes, arcs, cap_offsets(groups, arcs)
+
+    def regen_inst(self, uuid, h5file):
+        """Regenerates an instance of a database of virtual instances from its
+        recorded point and id through the species recorded with the database,
+        see io_tools.species(). The instance is cached in 
+        cyclopts_io.inst_cache with the species' arc rows of it, so that both
+        are regenerated once, e.g., when post processing.
+
+        Parameters
+        ----------
+        uuid : UUID
+            the id of the instance
+        h5file : PyTables File
+            the database in which the instance's properties are recorded
+
+        Returns
+        -------
+        inst : tuple
+            the columnar instance, as returned by read_inst_columnar()
+        arc_rows : numpy structured array or None
+            the species' arc table rows of the instance, if the species keeps
+            them, e.g., StructuredRequest.arc_rows
+        """
+        return cycio.inst_cache.get(
+            cycio.cache_key(h5file, self.name, 'regen', uuid), 
+            lambda: self._regen_inst(uuid, h5file))
+
+    def _regen_inst(self, uuid, h5file):
+        tbl = h5file.get_node('{0}/{1}'.format(self.io_prefix, 
+                                               self.property_table_name))
+        rows = cycio.uuid_rows(tbl, uuid)
+        if len(rows) == 0:
+            raise KeyError('No instance {0} is recorded in {1}.'.format(
+                    uuid, h5file.filename))
+        paramid = io_tools.to_uuids(h5file, rows['paramid'][:1])[0]
+        sp = io_tools.species(h5file)
+        point = sp.read_point(paramid, h5file)
+        # generation draws from the random module's global state
+        with _regen_lock:
+            tools.seed_inst(uuid)
+            inst = sp.gen_inst_columnar(point, uuid)
+            arc_rows = getattr(sp, 'arc_rows', None)
+        groups, nodes, arcs, _ = _encoded(uuid, inst, 
+                                          arc_dt=_col_dtypes['ExArc'])
+        caps = inst[3] if _is_columnar(inst) else cap_offsets(groups, arcs)
+        return (groups, nodes, arcs, caps), arc_rows
+
     def read_inst(self, uuid, io_manager):
         """Parameters
         ----------
@@ -373,60 +904,15 @@ class ResourceExchange(ProblemFamily):
         inst : tuple of lists of ExGroups, ExNodes, and ExArgs
             A representation of a problem instance
         """
-        ctors = {'ExGroup': exinst.ExGroup, 
-                 'ExNode': exinst.ExNode}
-        objs = {'ExGroup': [], 'ExNode': []}
-        tables = io_manager.tables
-        groups = io_manager.groups
-        
-        # this could be sped up by making groups and nodes their own simid tables
-        for name in ctors.keys():
-            tbl = tables[_tbl_names[name]]
-            rows = tbl.uuid_rows(uuid)
-            setattrs = tools.cyc_members(ctors[name]())
-            for row in rows:
-                obj = ctors[name]()
-                if name == 'ExGroup':
-                    ncaps = len([x for x in row['caps'] if x > 0])
-                for var in setattrs:
-                    attr = getattr(obj, var)
-                    if isinstance(attr, Iterable):
-                        ary = row[var]
-                        if name == 'ExGroup':
-                            attr = [ary[i] for i in range(ncaps)]
-                        else:
-                            attr = ary[ary > 0]
-                    else:
-                        attr = row[var]
-                    #print('setting {0} to {1}'.format(var, attr))
-                    setattr(obj, var, attr)
-                objs[name].append(obj)
-        
-        grp = groups[_grp_names['ExArc']] 
-        arcs = []
-        # this could be sped up by directly populating members rather than 
-        # dynamically typechecking each one 
-        setattrs = tools.cyc_members(exinst.ExArc())
-        for row in grp.group()._f_get_child('id_' + uuid.hex).read():
-            obj = exinst.ExArc()
-            for var in setattrs:
-                attr = getattr(obj, var)
-                if isinstance(attr, Iterable):
-                    ary = row[var]
-                    attr = ary[ary > 0]
-                else:
-                    attr = row[var]
-                    #print('setting {0} to {1}'.format(var, attr))
-                setattr(obj, var, attr)
-            arcs.append(obj)
-            
-        return objs['ExGroup'], objs['ExNode'], arcs
+        return inst_objs(*self.read_inst_columnar(uuid, io_manager))
             
     def run_inst(self, inst, solver, verbose=False):
         """Parameters
         ----------
         inst : tuple of lists of ExGroups, ExNodes, and ExArgs
-            A representation of a problem instance
+            A representation of a problem instance, or a columnar 
+            representation as a tuple of ExGroup, ExNode, and ExArc structured 
+            arrays and an optional dictionary of capacities from cap_offsets()
         solver : ProbSolver or similar
             A representation of a problem solver
         verbose : bool
@@ -434,13 +920,41 @@ class ResourceExchange(ProblemFamily):
 
         Returns
         -------
-        soln : ExSolution
+        soln : ExFlowSolution
             A representation of a problem solution
         """
+        if _is_columnar(inst):
+            return self.run_inst_many(inst, [solver], verbose=verbose)[0]
         groups, nodes, arcs = inst
-        soln = exinst.Run(groups, nodes, arcs, solver, verbose)
+        soln = bridge.run(groups, nodes, arcs, solver, verbose)
         return soln
 
+    def run_inst_many(self, inst, solvers, verbose=False):
+        """Parameters
+        ----------
+        inst : tuple of lists of ExGroups, ExNodes, and ExArgs
+            A representation of a problem instance, or a columnar 
+            representation as in run_inst()
+        solvers : list of ProbSolvers or similar
+            Representations of problem solvers
+        verbose : bool
+            A verbosity flag
+
+        Returns
+        -------
+        solns : list of ExFlowSolutions
+            A representation of a problem solution for each solver, in the 
+            same order as solvers. The exchange graph is constructed only once.
+        """
+        if _is_columnar(inst):
+            groups, nodes, arcs = inst[:3]
+            caps = inst[3] if len(inst) > 3 else cap_offsets(groups, arcs)
+            return bridge.run_columnar(groups, nodes, arcs, caps, solvers, 
+                                       verbose)
+        groups, nodes, arcs = inst
+        solns = bridge.run_many(groups, nodes, arcs, solvers, verbose)
+        return solns
+
     def post_process(self, instid, solnids, io_managers):
         """Perform any post processing on input and output.
         
@@ -465,24 +979,34 @@ class ResourceExchange(ProblemFamily):
         prop_tbl = intbls[_tbl_names["properties"]]
         pp_tbl = pptbls[_tbl_names["pp"]]
         
-        # determining column or group-based layout
+        # determining column or group-based layout of each file
         arc_io_name = _grp_names["ExArc"]
         soln_io_name = _grp_names["solutions"]
-        if arc_io_name in intbls.keys():
+        if io_tools.virtual_insts(io_managers[0].h5file):
+            # arcs are regenerated from the instance's point
+            arc_tbl = io_managers[0]
+            arc_strategy = 'regen'
+        elif arc_io_name in intbls.keys():
             # column based layout
             arc_tbl = intbls[arc_io_name]
-            soln_tbl = outtbls[soln_io_name]
-            strategy = 'col'
+            arc_strategy = 'col'
         else:
             # group-based layout
             arc_tbl = ingrps[arc_io_name].group()._f_get_child('id_' + 
                                                                instid.hex)
+            arc_strategy = 'grp'
+        if soln_io_name in outtbls.keys():
+            soln_tbl = outtbls[soln_io_name]
+            soln_strategy = 'col'
+        else:
             soln_tbl = outgrps[soln_io_name].group() # actually a group
-            strategy = 'grp'
+            soln_strategy = 'grp'
+        offsets = (intbls.get(_tbl_names["offsets"]), 
+                   outtbls.get(_tbl_names["soln_offsets"]))
         
-        narcs, sid_to_flows, data = _pp_work(instid, solnids, prop_tbl, 
-                                             arc_tbl, soln_tbl, 
-                                             strategy=strategy)
+        narcs, sid_to_flows, data = _pp_work(
+            instid, solnids, prop_tbl, arc_tbl, soln_tbl, 
+            strategy=(arc_strategy, soln_strategy), offsets=offsets)
         pp_tbl.append_data(data)
 
         return narcs, sid_to_flows
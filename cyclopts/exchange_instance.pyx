@@ -273,6 +273,15 @@ cdef class ExSolution(_cproblem.ProbSolution):
             (<cpp_exchange_instance.ExSolution *> self._inst).cyclus_version = std_string(<char *> value_bytes)
     
     
+    property extract_time:
+        """no docstring for extract_time, please file a bug report!"""
+        def __get__(self):
+            return float((<cpp_exchange_instance.ExSolution *> self._inst).extract_time)
+    
+        def __set__(self, value):
+            (<cpp_exchange_instance.ExSolution *> self._inst).extract_time = <double> value
+    
+    
     property flows:
         """no docstring for flows, please file a bug report!"""
         def __get__(self):
@@ -290,6 +299,15 @@ cdef class ExSolution(_cproblem.ProbSolution):
             self._flows = None
     
     
+    property marshal_time:
+        """no docstring for marshal_time, please file a bug report!"""
+        def __get__(self):
+            return float((<cpp_exchange_instance.ExSolution *> self._inst).marshal_time)
+    
+        def __set__(self, value):
+            (<cpp_exchange_instance.ExSolution *> self._inst).marshal_time = <double> value
+    
+    
     property pref_flow:
         """no docstring for pref_flow, please file a bug report!"""
         def __get__(self):
@@ -299,6 +317,24 @@ cdef class ExSolution(_cproblem.ProbSolution):
             (<cpp_exchange_instance.ExSolution *> self._inst).pref_flow = <double> value
     
     
+    property solve_wall_time:
+        """no docstring for solve_wall_time, please file a bug report!"""
+        def __get__(self):
+            return float((<cpp_exchange_instance.ExSolution *> self._inst).solve_wall_time)
+    
+        def __set__(self, value):
+            (<cpp_exchange_instance.ExSolution *> self._inst).solve_wall_time = <double> value
+    
+    
+    property xlate_time:
+        """no docstring for xlate_time, please file a bug report!"""
+        def __get__(self):
+            return float((<cpp_exchange_instance.ExSolution *> self._inst).xlate_time)
+    
+        def __set__(self, value):
+            (<cpp_exchange_instance.ExSolution *> self._inst).xlate_time = <double> value
+    
+    
     # methods
     
 
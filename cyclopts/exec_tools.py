@@ -0,0 +1,712 @@
+"""This module provides drivers for executing problem instances, either serially
+in a single process or in parallel across a pool of threads or processes, and
+for converting them in parallel.
+
+:author: Matthew Gidden <matthew.gidden _at_ gmail.com>
+"""
+from __future__ import print_function
+
+import os
+import sys
+import time
+import uuid
+import inspect
+import shutil
+import tempfile
+import multiprocessing as mp
+from multiprocessing.pool import ThreadPool
+from collections import deque
+from threading import Thread, Lock
+from Queue import Queue
+import tables as t
+
+import cyclopts.tools as tools
+import cyclopts.cyclopts_io as cycio
+import cyclopts.io_tools as io_tools
+from cyclopts.problems import solver_from_spec, canonical_spec, \
+    TIME_LIMITED_SOLVERS
+
+result_tbl_name = 'Results'
+timing_tbl_name = 'Timings'
+ledger_tbl_name = 'Ledger'
+
+# the number of instances between flushing all output and committing it to the
+# ledger
+checkpoint_interval = 10
+
+# the number of seconds a solve may run past its time limit before the watchdog
+# kills it
+watchdog_grace = 60
+
+def exec_managers(fam, h5in, h5out):
+    """Returns the input, output, and result IOManagers used during execution.
+
+    Parameters
+    ----------
+    fam : ProblemFamily
+        the family of instances being executed
+    h5in : PyTables File
+        the input database
+    h5out : PyTables File
+        the output database, which may be the same as the input database
+    """
+    if h5out is not h5in and h5out.mode != 'r':
+        io_tools.follow_schema(h5in, h5out)
+    in_manager = cycio.IOManager(
+        h5in,
+        fam.register_tables(h5in, fam.io_prefix),
+        fam.register_groups(h5in, fam.io_prefix))
+    out_manager = cycio.IOManager(
+        h5out,
+        fam.register_tables(h5out, fam.io_prefix),
+        fam.register_groups(h5out, fam.io_prefix))
+    result_manager = cycio.IOManager(
+        h5out, [cycio.ResultTable(h5out, path='/{0}'.format(result_tbl_name)),
+                cycio.TimingTable(h5out, path='/{0}'.format(timing_tbl_name)),
+                cycio.LedgerTable(h5out, path='/{0}'.format(ledger_tbl_name))])
+    return in_manager, out_manager, result_manager
+
+def resume(fam, h5out, verbose=False):
+    """Prepares an output database to resume an interrupted execution. Any
+    solution output that was not committed to the ledger is a partial write and
+    is removed. Databases written before the ledger existed have a ledger
+    created from the solver specifications of their results table. Results
+    tables of older databases record only solver types, so solves with solver
+    options in such databases are solved again.
+
+    Parameters
+    ----------
+    fam : ProblemFamily
+        the family of instances being executed
+    h5out : PyTables File
+        the output database, opened for writing
+    verbose : bool, optional
+        print information about removed output
+
+    Returns
+    -------
+    done : set of tuples
+        the (instid, canonical solver specification) pairs that have been
+        solved, see problems.canonical_spec()
+    """
+    result_manager = cycio.IOManager(
+        h5out, [cycio.ResultTable(h5out, path='/{0}'.format(result_tbl_name)),
+                cycio.TimingTable(h5out, path='/{0}'.format(timing_tbl_name))])
+    out_manager = cycio.IOManager(
+        h5out,
+        fam.register_tables(h5out, fam.io_prefix),
+        fam.register_groups(h5out, fam.io_prefix))
+    results = result_manager.tables[result_tbl_name].table()
+    path = '/{0}'.format(ledger_tbl_name)
+    if path not in h5out and results.nrows > 0:
+        if verbose:
+            print('No ledger found, trusting all {0} results.'.format(
+                    results.nrows))
+        ledger = cycio.LedgerTable(h5out, path=path)
+        ledger.cond_create()
+        ledger.commit([(tools.str_to_uuid(row['instid']), 
+                        canonical_spec(row['solver']), 
+                        tools.str_to_uuid(row['solnid'])) \
+                           for row in results.iterrows()])
+    ledger = cycio.LedgerTable(h5out, path=path)
+    entries = ledger.entries()
+    keep = set(solnid for _, _, solnid in entries)
+    
+    # drop partial writes
+    n = fam.clean_solns(keep, out_manager)
+    ids = [x.bytes for x in keep]
+    for tbl in result_manager.tables.values():
+        n = max(n, cycio.keep_rows(tbl, 'solnid', ids))
+    if verbose:
+        print('Resuming after {0} solutions, removed {1} partial '
+              'solutions.'.format(len(keep), n))
+    return set((instid, solver) for instid, solver, _ in entries)
+
+def _read_inst(fam, instid, in_manager):
+    """Returns an instance and the time taken to read it."""
+    start = time.time()
+    inst = fam.read_inst_columnar(instid, in_manager)
+    return inst, time.time() - start
+
+class _Crashed(object):
+    """The type of crashed, which stands in for the solution of a solve whose
+    process died before its time limit."""
+    def __repr__(self):
+        return 'crashed'
+
+# the solution of a solve whose process died before its time limit, see
+# watched_run()
+crashed = _Crashed()
+
+def soln_status(soln, solver):
+    """Returns the status of a solution found by a solver: 'ok' if the solve
+    completed, 'limit' if the solver stopped at its time limit, in which case
+    the solution may be suboptimal, 'timeout' if the solve was killed by the
+    watchdog and there is no solution, or 'crash' if the process of the solve
+    died before its time limit and there is no solution."""
+    if soln is None:
+        return 'timeout'
+    if soln is crashed:
+        return 'crash'
+    kind = solver.type or 'cbc'
+    if kind in TIME_LIMITED_SOLVERS and solver.time_limit > 0 and \
+            soln.time >= solver.time_limit:
+        return 'limit'
+    return 'ok'
+
+def _soln_state(soln):
+    """Returns a picklable representation of a solution, comprised of its
+    class and the values of all of its public properties. Container proxies,
+    e.g., the flows of an ExSolution, are copied into plain dicts."""
+    state = {}
+    for cls in inspect.getmro(type(soln)):
+        for name, attr in cls.__dict__.items():
+            if name.startswith('_') or name in state:
+                continue
+            if inspect.isgetsetdescriptor(attr) or isinstance(attr, property):
+                value = getattr(soln, name)
+                if hasattr(value, 'items'):
+                    value = dict(value.items())
+                state[name] = value
+    return type(soln), state
+
+def _from_soln_state(cls, state):
+    """Returns a solution from the result of _soln_state(). Containers are set
+    last, as setting some properties, e.g., arc_ids, resets them."""
+    soln = cls()
+    items = sorted(state.items(), key=lambda x: isinstance(x[1], dict))
+    for name, value in items:
+        setattr(soln, name, value)
+    return soln
+
+def _watched_child(fam, inst, solvers, conn):
+    """Solves an instance with each solver in turn, sending the state of each
+    solution through a connection as soon as it is found."""
+    for solver in solvers:
+        conn.send(_soln_state(fam.run_inst(inst, solver)))
+    conn.close()
+
+def watched_run(fam, inst, solvers, time_limit, grace=None):
+    """Solves an instance with each solver in a child process that is killed if
+    any single solve exceeds its time limit by more than a grace period. Solves
+    after a killed solve are continued in a new child process. Unlike
+    ProblemFamily.run_inst_many, each solve translates the instance anew.
+
+    Parameters
+    ----------
+    fam : ProblemFamily
+        the family of the instance
+    inst : tuple
+        the instance
+    solvers : list of Solvers
+        the solvers to use
+    time_limit : float
+        the time limit of each solve in seconds, unless a solver has its own
+    grace : float, optional
+        the number of seconds past the time limit after which a solve is
+        killed, watchdog_grace by default
+
+    Returns
+    -------
+    solns : list
+        the solution for each solver, None if the solve was killed by the
+        watchdog, or crashed if its process died before its time limit
+    """
+    grace = watchdog_grace if grace is None else grace
+    solns = []
+    while len(solns) < len(solvers):
+        remaining = solvers[len(solns):]
+        conn, child_conn = mp.Pipe(duplex=False)
+        proc = mp.Process(target=_watched_child, 
+                          args=(fam, inst, remaining, child_conn))
+        proc.daemon = True
+        proc.start()
+        child_conn.close()
+        for solver in remaining:
+            soln = None
+            limit = solver.time_limit if solver.time_limit > 0 else time_limit
+            if conn.poll(limit + grace):
+                try:
+                    soln = _from_soln_state(*conn.recv())
+                except EOFError:
+                    soln = crashed # the child died without a solution
+            solns.append(soln)
+            if soln is None or soln is crashed:
+                break
+        if proc.is_alive():
+            proc.terminate()
+        proc.join()
+        conn.close()
+    return solns
+
+def _run_inst(fam, inst, solvers, time_limit=None):
+    """Solves an instance with each solver, under the watchdog if a time limit
+    is given."""
+    if time_limit is None:
+        return fam.run_inst_many(inst, solvers)
+    return watched_run(fam, inst, solvers, time_limit)
+
+def _record_solns(fam, inst, instid, specs, solvers, solns, out_manager, 
+                  result_manager, read_time=0):
+    """Records the solutions of an instance and the time spent in each phase of
+    their solves. Solves killed by the watchdog or whose process crashed are
+    recorded only in the results table with a 'timeout' or 'crash' status.
+    Returns the (instid, solver specification, solnid) ledger entries of the
+    recorded solutions."""
+    tbl = result_manager.tables[result_tbl_name]
+    timings = result_manager.tables[timing_tbl_name]
+    entries = []
+    for spec, solver, soln in zip(specs, solvers, solns):
+        solnid = uuid.uuid4()
+        entries.append((instid, spec, solnid))
+        status = soln_status(soln, solver)
+        if soln is None or soln is crashed:
+            tbl.record_soln(None, solnid, instid, spec, status=status)
+            continue
+        start = time.time()
+        fam.record_soln(soln, solnid, inst, instid, out_manager)
+        tbl.record_soln(soln, solnid, instid, spec, status=status)
+        timings.record_soln(soln, solnid, read_time=read_time, 
+                            record_time=time.time() - start)
+    return entries
+
+def _checkpoint(entries, out_manager, result_manager):
+    """Flushes all output and then commits the ledger entries of the flushed
+    solutions, emptying the list of entries."""
+    out_manager.flush_tables()
+    result_manager.flush_tables()
+    result_manager.tables[ledger_tbl_name].commit(entries)
+    del entries[:]
+
+def _pending(instids, solvers, done=None):
+    """Yields each instance id and the solver specifications with which it has
+    not yet been solved."""
+    for instid in instids:
+        specs = solvers if done is None else \
+            [x for x in solvers if (instid, x) not in done]
+        if len(specs) > 0:
+            yield instid, specs
+
+def _read_step(fam, instid, specs, in_manager):
+    """Reads an instance, returning the (instid, inst, specs, read_time) item
+    passed to _solve_step()."""
+    inst, read_time = _read_inst(fam, instid, in_manager)
+    return instid, inst, specs, read_time
+
+def _solve_step(fam, item, time_limit=None, verbose=False):
+    """Solves an instance read by _read_step() with each of its solvers,
+    returning the (instid, inst, specs, solvers, solns, read_time) item passed
+    to _Recorder.record()."""
+    instid, inst, specs, read_time = item
+    if verbose:
+        print('Solving instance {0} with the {1} solvers'.format(
+                instid.hex, ', '.join(specs)))
+    objs = make_solvers(specs, time_limit)
+    solns = _run_inst(fam, inst, objs, time_limit)
+    return instid, inst, specs, objs, solns, read_time
+
+class _Recorder(object):
+    """Records the solutions of solved instances, committing them to the ledger
+    after every checkpoint_interval instances. All executors record through a
+    _Recorder on the thread that owns the output database."""
+
+    def __init__(self, fam, out_manager, result_manager):
+        self.fam = fam
+        self.out_manager = out_manager
+        self.result_manager = result_manager
+        self.entries = []
+        self.ninsts = 0
+        self.nsolns = 0
+
+    def record(self, item):
+        """Records an item returned by _solve_step()."""
+        instid, inst, specs, objs, solns, read_time = item
+        self.entries += _record_solns(self.fam, inst, instid, specs, objs, 
+                                      solns, self.out_manager, 
+                                      self.result_manager, read_time=read_time)
+        self.nsolns += len(solns)
+        self.ninsts += 1
+        if self.ninsts % checkpoint_interval == 0:
+            self.checkpoint()
+
+    def checkpoint(self):
+        """Commits all recorded solutions, see _checkpoint()."""
+        _checkpoint(self.entries, self.out_manager, self.result_manager)
+
+def make_solvers(specs, time_limit=None):
+    """Returns a Solver for each solver specification, see 
+    problems.solver_from_spec()."""
+    return [solver_from_spec(spec, time_limit) for spec in specs]
+
+def exec_insts(fam, instids, solvers, in_manager, out_manager, result_manager,
+               verbose=False, threads=1, time_limit=None, done=None, 
+               prefetch=0):
+    """Solves each instance with each solver, recording all solutions.
+
+    Parameters
+    ----------
+    fam : ProblemFamily
+        the family of instances being executed
+    instids : collection of uuids
+        the instances to execute
+    solvers : list of str
+        the specifications of the solvers to use for each instance, see
+        problems.solver_from_spec()
+    in_manager : cyclopts_io.IOManager
+        IOManager for the input database
+    out_manager : cyclopts_io.IOManager
+        IOManager for the family tables of the output database
+    result_manager : cyclopts_io.IOManager
+        IOManager for the results table of the output database
+    verbose : bool, optional
+        print information about each solve
+    threads : int, optional
+        the number of threads with which to solve instances; if greater than 1,
+        instances are solved on a thread pool while the calling thread performs
+        all database I/O
+    time_limit : float, optional
+        the time limit of each solve in seconds; if given, each instance is
+        solved in a child process that is killed if a solve exceeds its time
+        limit by more than watchdog_grace seconds
+    done : set of tuples, optional
+        (instid, solver specification) pairs that have already been solved and
+        are skipped, see resume()
+    prefetch : int, optional
+        if greater than 0, instances are executed in a pipeline in which a
+        reader thread prefetches up to this many instances, the given number of
+        threads solve them, and the calling thread records their solutions
+
+    Returns
+    -------
+    n : int
+        the number of solutions recorded
+
+    Notes
+    -----
+    All output is flushed and committed to the ledger after every
+    checkpoint_interval instances.
+    """
+    if prefetch > 0:
+        return _pipe_exec_insts(fam, instids, solvers, in_manager, 
+                                out_manager, result_manager, prefetch, 
+                                threads=threads, verbose=verbose, 
+                                time_limit=time_limit, done=done)
+    if threads > 1:
+        return _thread_exec_insts(fam, instids, solvers, in_manager, 
+                                  out_manager, result_manager, threads, 
+                                  verbose=verbose, time_limit=time_limit, 
+                                  done=done)
+    recorder = _Recorder(fam, out_manager, result_manager)
+    for instid, specs in _pending(instids, solvers, done):
+        item = _read_step(fam, instid, specs, in_manager)
+        recorder.record(_solve_step(fam, item, time_limit, verbose))
+    recorder.checkpoint()
+    return recorder.nsolns
+
+def _thread_exec_insts(fam, instids, solvers, in_manager, out_manager, 
+                       result_manager, threads, verbose=False, time_limit=None,
+                       done=None):
+    """Solves instances on a pool of threads. Solvers release the GIL, so
+    solves proceed concurrently while this thread reads the next instances and
+    records finished solutions. At most 2 * threads instances are held in
+    memory at a time."""
+    pool = ThreadPool(processes=threads)
+    pending = deque()
+    recorder = _Recorder(fam, out_manager, result_manager)
+    try:
+        for instid, specs in _pending(instids, solvers, done):
+            item = _read_step(fam, instid, specs, in_manager)
+            pending.append(pool.apply_async(
+                    _solve_step, (fam, item, time_limit, verbose)))
+            if len(pending) >= 2 * threads:
+                recorder.record(pending.popleft().get())
+        while len(pending) > 0:
+            recorder.record(pending.popleft().get())
+        recorder.checkpoint()
+    finally:
+        pool.close()
+        pool.join()
+    return recorder.nsolns
+
+def _pipe_exec_insts(fam, instids, solvers, in_manager, out_manager, 
+                     result_manager, prefetch, threads=1, verbose=False, 
+                     time_limit=None, done=None):
+    """Executes instances in a pipeline of three stages connected by queues
+    holding at most prefetch items: a reader thread reads instances, solver
+    threads solve them, and the calling thread records their solutions. Reads
+    and writes are serialized by a lock, because HDF5 is not thread safe, but
+    both overlap with solves, which release the GIL."""
+    io_lock = Lock()
+    to_solve = Queue(maxsize=prefetch)
+    to_record = Queue(maxsize=prefetch)
+    errors = []
+
+    def read():
+        try:
+            for instid, specs in _pending(instids, solvers, done):
+                with io_lock:
+                    item = _read_step(fam, instid, specs, in_manager)
+                to_solve.put(item)
+        except Exception:
+            errors.append(sys.exc_info()[1])
+        finally:
+            for i in range(threads):
+                to_solve.put(None)
+
+    def solve():
+        try:
+            item = to_solve.get()
+            while item is not None:
+                to_record.put(_solve_step(fam, item, time_limit, verbose))
+                item = to_solve.get()
+        except Exception:
+            errors.append(sys.exc_info()[1])
+        finally:
+            to_record.put(None)
+
+    # stages that fail leave the others blocked, so all are daemons
+    stages = [Thread(target=read)] + \
+        [Thread(target=solve) for i in range(threads)]
+    for stage in stages:
+        stage.daemon = True
+        stage.start()
+
+    recorder = _Recorder(fam, out_manager, result_manager)
+    finished = 0
+    while finished < threads:
+        item = to_record.get()
+        if item is None:
+            finished += 1
+            continue
+        with io_lock:
+            recorder.record(item)
+    if len(errors) > 0:
+        # output recorded so far is committed, so execution can be resumed
+        recorder.checkpoint()
+        raise errors[0]
+    for stage in stages:
+        stage.join()
+    recorder.checkpoint()
+    return recorder.nsolns
+
+def _exec_shard(args):
+    """Executes a shard of instances in a worker process, writing all output to
+    the shard's own database. Returns the shard database's name."""
+    indb, shard, fam_info, instids, solvers, done, schema, kwargs = args
+    fam = tools.get_obj(kind='family', rcs=tools.RunControl(**fam_info))
+    h5in = t.open_file(indb, mode='r', filters=tools.FILTERS)
+    h5out = t.open_file(shard, mode='w', filters=tools.filters())
+    for name, value in schema.items():
+        io_tools.set_schema_attr(h5out, name, value)
+    in_manager, out_manager, result_manager = exec_managers(fam, h5in, h5out)
+    done = set((uuid.UUID(x), spec) for x, spec in done)
+    exec_insts(fam, [uuid.UUID(x) for x in instids], solvers,
+               in_manager, out_manager, result_manager, done=done, **kwargs)
+    out_manager.flush_tables()
+    result_manager.flush_tables()
+    h5in.close()
+    h5out.close()
+    return shard
+
+def merge_shards(shards, outdb, clean=True, verbose=False):
+    """Merges the content of shard databases into an output database.
+
+    Parameters
+    ----------
+    shards : list of str
+        the shard databases
+    outdb : str
+        the database to merge into, which is created if it does not exist
+    clean : bool, optional
+        remove each shard after it has been merged
+    verbose : bool, optional
+        print information about each merge
+    """
+    aggdb = t.open_file(outdb, mode='a', filters=tools.filters())
+    for shard in shards:
+        if verbose:
+            print('Merging shard {0} into {1}'.format(shard, outdb))
+        db = t.open_file(shard, mode='r')
+        io_tools.follow_schema(db, aggdb)
+        # the ledger is merged last so that an interrupted merge leaves no
+        # ledger entries for unmerged output
+        ledger = '/{0}'.format(ledger_tbl_name)
+        for name in db.root._v_children.keys():
+            if '/' + name != ledger:
+                tools._merge_node(db.get_node('/' + name), aggdb)
+        if ledger in db:
+            tools._merge_node(db.get_node(ledger), aggdb)
+        aggdb.flush()
+        db.close()
+        if clean:
+            os.remove(shard)
+    cycio.rebuild_offsets(aggdb)
+    cycio.index_tables(aggdb)
+    aggdb.close()
+
+def pool_exec(indb, outdb, fam_info, instids, solvers, jobs, verbose=False,
+              threads=1, time_limit=None, done=None, prefetch=0, schema=None):
+    """Executes instances across a pool of processes. Each process writes to its
+    own shard database, and all shards are merged into the output database
+    after all processes have completed.
+
+    Parameters
+    ----------
+    indb : str
+        the input database
+    outdb : str
+        the output database, which may be the same as the input database
+    fam_info : dict
+        the family_package, family_module, and family_class with which
+        to construct the family in each process
+    instids : collection of uuids
+        the instances to execute
+    solvers : list of str
+        the solver specifications to use for each instance
+    jobs : int
+        the number of processes to use
+    verbose : bool, optional
+        print information about each solve
+    threads : int, optional
+        the number of solver threads to use in each process
+    time_limit : float, optional
+        the time limit of each solve in seconds, see exec_insts()
+    done : set of tuples, optional
+        (instid, solver specification) pairs that are skipped, see exec_insts()
+    prefetch : int, optional
+        the number of instances to prefetch in each process, see exec_insts()
+    schema : dict, optional
+        schema options of the shard databases, see io_tools.schema_attrs, in 
+        addition to those of the input database
+
+    Notes
+    -----
+    No HDF5 files may be open in the calling process when this function is
+    called.
+    """
+    done = set() if done is None else done
+    schema = {} if schema is None else schema
+    instids = sorted(x for x, _ in _pending(instids, solvers, done))
+    shards = [instids[i::jobs] for i in range(jobs)]
+    shards = [x for x in shards if len(x) > 0]
+    if len(shards) == 0:
+        return
+    outdir = os.path.dirname(os.path.abspath(outdb))
+    sharddir = tempfile.mkdtemp(prefix='.cyclopts_shards_', dir=outdir)
+    try:
+        kwargs = {'threads': threads, 'time_limit': time_limit, 
+                  'prefetch': prefetch, 'verbose': verbose}
+        tasks = []
+        for i, shard in enumerate(shards):
+            members = set(shard)
+            tasks.append((indb, os.path.join(sharddir, 'shard_{0}.h5'.format(i)),
+                          fam_info, [x.hex for x in shard], solvers, 
+                          [(x.hex, spec) for x, spec in done if x in members], 
+                          schema, kwargs))
+        if verbose:
+            print('Executing {0} shards with {1} processes.'.format(
+                    len(tasks), jobs))
+        # shard processes are not daemonic (unlike those of a Pool) so that
+        # they may start watchdog processes of their own
+        procs = [mp.Process(target=_exec_shard, args=(task,)) for task in tasks]
+        for proc in procs:
+            proc.start()
+        for proc in procs:
+            proc.join()
+        failed = [task[1] for task, proc in zip(tasks, procs) \
+                      if proc.exitcode != 0]
+        if len(failed) > 0:
+            raise RuntimeError('Execution failed for shards: {0}'.format(
+                    ', '.join(failed)))
+        merge_shards([task[1] for task in tasks], outdb, verbose=verbose)
+    finally:
+        shutil.rmtree(sharddir, ignore_errors=True)
+
+def _conv_shard(args):
+    """Converts a shard of points in a worker process, writing all output to
+    the shard's own database. Returns the shard database's name."""
+    rc, shard, sp_info, points, schema, kwargs = args
+    sp = tools.get_obj(kind='species', rcs=tools.RunControl(**sp_info))
+    fam = sp.family
+    h5file = t.open_file(shard, mode='w', filters=tools.filters())
+    for name, value in schema.items():
+        io_tools.set_schema_attr(h5file, name, value)
+    sp_manager = cycio.IOManager(
+        h5file, 
+        sp.register_tables(h5file, sp.io_prefix),
+        sp.register_groups(h5file, sp.io_prefix))
+    fam_manager = cycio.IOManager(
+        h5file, 
+        fam.register_tables(h5file, fam.io_prefix),
+        fam.register_groups(h5file, fam.io_prefix))
+    sp.read_space(tools.parse_rc(rc)._dict)
+    tools.conv_insts(fam, fam_manager, sp, sp_manager, points=points, **kwargs)
+    sp_manager.flush_tables()
+    fam_manager.flush_tables()
+    h5file.close()
+    return shard
+
+def pool_conv(rc, outdb, sp_info, npoints, jobs, ninst=1, seed=None, 
+              schema=None, update_freq=100, verbose=False):
+    """Converts the points of a species' space into instances across a pool of
+    processes. Each process converts a contiguous block of points into its own
+    shard database, and the shards are merged in order into the output
+    database, so that its content matches that of a serial conversion with the
+    same seed.
+
+    Parameters
+    ----------
+    rc : str
+        the run control file that defines the species' space
+    outdb : str
+        the output database, which must not exist
+    sp_info : dict
+        the species_package, species_module, and species_class with which
+        to construct the species in each process
+    npoints : int
+        the number of points in the species' space
+    jobs : int
+        the number of processes to use
+    ninst : int, optional
+        the number of instances to generate for each point
+    seed : int, optional
+        the seed of the conversion, see tools.conv_insts()
+    schema : dict, optional
+        schema options of the output database, see io_tools.schema_attrs
+    update_freq : int, optional
+        the number of instances between updates in each process
+    verbose : bool, optional
+        print progress updates
+
+    Notes
+    -----
+    No HDF5 files may be open in the calling process when this function is
+    called.
+    """
+    schema = {} if schema is None else schema
+    bounds = [npoints * i // jobs for i in range(jobs)] + [None]
+    blocks = [(start, stop) for start, stop in zip(bounds[:-1], bounds[1:]) \
+                  if stop is None or stop > start]
+    outdir = os.path.dirname(os.path.abspath(outdb))
+    sharddir = tempfile.mkdtemp(prefix='.cyclopts_shards_', dir=outdir)
+    try:
+        kwargs = {'ninst': ninst, 'seed': seed, 'update_freq': update_freq, 
+                  'verbose': verbose}
+        tasks = [(rc, os.path.join(sharddir, 'shard_{0}.h5'.format(i)), sp_info, 
+                  block, schema, kwargs) for i, block in enumerate(blocks)]
+        if verbose:
+            print('Converting {0} shards with {1} processes.'.format(
+                    len(tasks), jobs))
+        procs = [mp.Process(target=_conv_shard, args=(task,)) for task in tasks]
+        for proc in procs:
+            proc.start()
+        for proc in procs:
+            proc.join()
+        failed = [task[1] for task, proc in zip(tasks, procs) \
+                      if proc.exitcode != 0]
+        if len(failed) > 0:
+            raise RuntimeError('Conversion failed for shards: {0}'.format(
+                    ', '.join(failed)))
+        merge_shards([task[1] for task in tasks], outdb, verbose=verbose)
+    finally:
+        shutil.rmtree(sharddir, ignore_errors=True)
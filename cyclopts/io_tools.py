@@ -1,9 +1,227 @@
 """A module for I/O helper functions, classes, etc."""
 
+import uuid
+import weakref
+import numpy as np
 from collections import defaultdict
 
 import cyclopts.tools as tools
 
+#
+# File Locks
+#
+# HDF5 is not thread safe, so a file written on a background thread, see
+# cyclopts_io.AsyncWriter, has a lock that must be held for all access to it.
+#
+
+class _NoLock(object):
+    def __enter__(self):
+        pass
+
+    def __exit__(self, *args):
+        pass
+
+_no_lock = _NoLock()
+
+_file_locks = weakref.WeakKeyDictionary()
+
+def file_lock(h5file):
+    """Returns the lock that must be held to access a file, which does nothing
+    if the file is not written on a background thread."""
+    if h5file is None:
+        return _no_lock
+    return _file_locks.get(h5file, _no_lock)
+
+def set_file_lock(h5file, lock):
+    """Sets the lock that must be held to access a file."""
+    _file_locks[h5file] = lock
+
+#
+# Schema Options
+#
+# Options of how a database is written are attributes of its root group, which
+# output databases follow from their input databases.
+#
+
+schema_attrs = ('int_ids', 'sparse_flows', 'virtual_insts')
+
+def schema_attr(h5file, name):
+    """Returns whether a schema option is set for a database."""
+    if h5file is None:
+        return False
+    with file_lock(h5file):
+        return bool(getattr(h5file.root._v_attrs, name, False))
+
+def set_schema_attr(h5file, name, value=True):
+    """Sets a schema option of a database."""
+    with file_lock(h5file):
+        setattr(h5file.root._v_attrs, name, value)
+
+def follow_schema(src, dest):
+    """Sets the schema options of a database that are set for another and not
+    yet given for it."""
+    for name in schema_attrs:
+        if schema_attr(src, name) and name not in dest.root._v_attrs:
+            set_schema_attr(dest, name)
+
+#
+# Integer Ids
+#
+# Databases with integer ids store an int64 key in place of each uuid in the id
+# columns of their tables, and a dictionary table of the uuid of each key.
+#
+
+id_cols = ('instid', 'solnid', 'paramid')
+ids_path = '/Ids'
+ids_dt = np.dtype([('key', np.int64), ('uuid', ('str', 16))])
+
+def int_ids(h5file):
+    """Returns whether tables created in a database store integer ids."""
+    return schema_attr(h5file, 'int_ids')
+
+def set_int_ids(h5file, value=True):
+    """Sets whether tables created in a database store integer ids."""
+    set_schema_attr(h5file, 'int_ids', value)
+
+def sparse_flows(h5file):
+    """Returns whether solutions written to a database store only their 
+    non-zero flows."""
+    return schema_attr(h5file, 'sparse_flows')
+
+def set_sparse_flows(h5file, value=True):
+    """Sets whether solutions written to a database store only their non-zero
+    flows."""
+    set_schema_attr(h5file, 'sparse_flows', value)
+
+#
+# Virtual Instances
+#
+# Databases with virtual instances store the points and instance properties of
+# a conversion, but not the groups, nodes, and arcs of its instances, which are
+# regenerated from their point and id by the species recorded with them.
+#
+
+def virtual_insts(h5file):
+    """Returns whether instances written to a database store only their 
+    properties."""
+    return schema_attr(h5file, 'virtual_insts')
+
+def set_virtual_insts(h5file, value=True):
+    """Sets whether instances written to a database store only their 
+    properties."""
+    set_schema_attr(h5file, 'virtual_insts', value)
+
+def species_info(h5file):
+    """Returns the species_package, species_module, and species_class of the
+    species that generated the instances of a database, or None if they are
+    not recorded."""
+    return getattr(h5file.root._v_attrs, 'species_info', None)
+
+def set_species_info(h5file, info):
+    """Records the species_package, species_module, and species_class of the
+    species that generated the instances of a database."""
+    h5file.root._v_attrs.species_info = dict(info)
+
+_species = weakref.WeakKeyDictionary()
+
+def species(h5file):
+    """Returns the species recorded with a database, which regenerates its
+    instances."""
+    if h5file not in _species:
+        info = species_info(h5file)
+        if info is None:
+            raise RuntimeError('No species is recorded with {0}.'.format(
+                    h5file.filename))
+        _species[h5file] = tools.get_obj(kind='species', 
+                                         rcs=tools.RunControl(**info))
+    return _species[h5file]
+
+def id_keys(ids):
+    """Returns the int64 keys of uuids, given as UUIDs or 16-byte strings. A key
+    is the exclusive or of the halves of a uuid, so the keys of an id agree 
+    across databases."""
+    if not isinstance(ids, np.ndarray):
+        ids = [x.bytes if isinstance(x, uuid.UUID) else x for x in ids]
+    halves = np.ascontiguousarray(ids, dtype='S16').view('<u8').reshape(-1, 2)
+    return (halves[:, 0] ^ halves[:, 1]).view(np.int64)
+
+def id_key(x):
+    """Returns the int64 key of a uuid."""
+    return id_keys([x])[0]
+
+def is_key(dt, name):
+    """Returns whether a column of a dtype holds integer ids."""
+    return name in id_cols and dt[name].kind in 'iu'
+
+def as_keys(ids):
+    """Returns the values of an id column as integer keys."""
+    ids = np.asarray(ids)
+    return ids if ids.dtype.kind in 'iu' else id_keys(ids)
+
+def key_dtype(dt, names):
+    """Returns a dtype with its named uuid columns replaced by integer ids."""
+    return np.dtype([(x, np.int64) if x in names else (x, dt[x]) \
+                         for x in dt.names])
+
+def uuid_dtype(dt):
+    """Returns a dtype with its integer id columns replaced by uuids."""
+    return np.dtype([(x, ('str', 16)) if is_key(dt, x) else (x, dt[x]) \
+                         for x in dt.names])
+
+_dicts = weakref.WeakKeyDictionary()
+
+def key_uuids(h5file, keys):
+    """Returns the uuids, as 16-byte strings, of integer keys in a database's
+    dictionary table."""
+    keys = np.asarray(keys, dtype=np.int64)
+    if len(keys) == 0:
+        return np.zeros(0, dtype='S16')
+    node = h5file.get_node(ids_path) if ids_path in h5file else None
+    nrows = 0 if node is None else node.nrows
+    if _dicts.get(h5file, (None,))[0] != nrows:
+        rows = node.read() if node is not None else np.zeros(0, dtype=ids_dt)
+        order = np.argsort(rows['key'], kind='mergesort')
+        _dicts[h5file] = (nrows, rows['key'][order], rows['uuid'][order])
+    _, skeys, suuids = _dicts[h5file]
+    idx = np.minimum(np.searchsorted(skeys, keys), max(len(skeys) - 1, 0))
+    if len(skeys) == 0 or (skeys[idx] != keys).any():
+        raise KeyError('Integer ids are missing from the dictionary table '
+                       'of {0}.'.format(h5file.filename))
+    return suuids[idx]
+
+def id_values(h5file, ids):
+    """Returns the values of an id column as 16-byte strings, translating 
+    integer ids through the database's dictionary table."""
+    ids = np.asarray(ids)
+    return key_uuids(h5file, ids) if ids.dtype.kind in 'iu' else ids
+
+def to_uuids(h5file, ids):
+    """Returns a list of the uuids of the values of an id column."""
+    return [tools.str_to_uuid(x) for x in id_values(h5file, ids)]
+
+def with_uuids(h5file, rows):
+    """Returns rows with their integer id columns replaced by uuids."""
+    dt = uuid_dtype(rows.dtype)
+    if dt == rows.dtype:
+        return rows
+    ret = np.empty(len(rows), dtype=dt)
+    for name in dt.names:
+        ret[name] = id_values(h5file, rows[name]) \
+            if is_key(rows.dtype, name) else rows[name]
+    return ret
+
+def _col(node, name):
+    """Returns a column of a table, with integer ids as 16-byte strings."""
+    return id_values(node._v_file, node.col(name)) \
+        if is_key(node.dtype, name) else node.col(name)
+
+def grouped(keys, values):
+    """Returns the unique keys and, for each, the array of its values."""
+    ukeys, inv = np.unique(keys, return_inverse=True)
+    order = np.argsort(inv, kind='mergesort')
+    bounds = np.cumsum(np.bincount(inv, minlength=len(ukeys)))[:-1]
+    return ukeys, np.split(np.asarray(values)[order], bounds)
+
 class PathMap(object):
     """A simple container class for mapping columns to Hdf5 paths"""
     
@@ -27,12 +245,18 @@ def value_mapping(tbl, x, y, uuids=True):
     true, the cyclopts.tools.str_to_uuid function is used for both x and
     y."""
     ret = defaultdict(list)
-    if uuids:
-        for row in tbl.iterrows():
-            ret[tools.str_to_uuid(row[x])].append(tools.str_to_uuid(row[y]))
-    else:
-        for row in tbl.iterrows():
-            ret[row[x]].append(row[y])
+    if tbl.nrows == 0:
+        return ret
+    if not uuids:
+        for k, v in zip(*grouped(_col(tbl, x), _col(tbl, y))):
+            ret[k] = list(v)
+        return ret
+    # uuids are made once per unique id rather than per row
+    uys, yinv = np.unique(tbl.col(y), return_inverse=True)
+    uys = np.array(to_uuids(tbl._v_file, uys), dtype=object)
+    ukeys, idxs = grouped(tbl.col(x), yinv)
+    for k, idx in zip(to_uuids(tbl._v_file, ukeys), idxs):
+        ret[k] = list(uys[idx])
     return ret
 
 def grab_data(h5file, path, col, matching=None):
@@ -56,12 +280,13 @@ def grab_data(h5file, path, col, matching=None):
         data value is returned, otherwise a list of all column values is given
     """
     h5node = h5file.get_node(path)
+    rows = with_uuids(h5file, h5node.read())
     if matching is None:
-        data = [x[col] for x in h5node.iterrows()]
+        data = list(rows[col])
     else:
         data = []
         scol, search = matching
-        data = {x['instid']: x[col] for x in h5node.iterrows() if x[scol] in search}
+        data = {x['instid']: x[col] for x in rows if x[scol] in search}
     return data
 
 def param_mapping(h5file, path, kcol, vcol):
@@ -84,8 +309,16 @@ def param_mapping(h5file, path, kcol, vcol):
     """
     h5node = h5file.get_node(path)
     data = defaultdict(set)
-    for x in h5node.iterrows():
-        data[x[kcol]].add(x[vcol])
+    if h5node.nrows == 0:
+        return data
+    # rows are grouped with numpy, and integer ids are translated once per 
+    # unique id
+    vals, vinv = np.unique(h5node.col(vcol), return_inverse=True)
+    vals = id_values(h5file, vals) if is_key(h5node.dtype, vcol) else vals
+    keys, idxs = grouped(h5node.col(kcol), vinv)
+    keys = id_values(h5file, keys) if is_key(h5node.dtype, kcol) else keys
+    for k, idx in zip(keys, idxs):
+        data[k] = set(vals[idx])
     return data
 
 def param_to_iids(h5file, fam_path, sp_path, col):
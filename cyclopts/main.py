@@ -39,8 +39,10 @@ import cyclopts.tools as tools
 import cyclopts.exchange_instance as inst
 import cyclopts.params as params
 import cyclopts.cyclopts_io as cycio
+import cyclopts.io_tools as io_tools
+import cyclopts.exec_tools as exec_tools
 
-from cyclopts.problems import Solver
+from cyclopts.problems import KIND_OPTS, canonical_spec
 
 def condor_submit(args):
     # collect instance ids
@@ -113,39 +115,65 @@ def convert(args):
         raise IOError('Conversion output database {0} already exists.'.format(
                 fout))
 
-    h5file = t.open_file(fout, 'w', filters=tools.FILTERS)
-
     obj_rcs = tools.all_obj_rcs(rc, args)
         
     # conversion objects
     sp = tools.get_obj(kind='species', rcs=obj_rcs, args=args)
     fam = sp.family
-
-    # table set up
-    sp_manager = cycio.IOManager(
-        h5file, 
-        sp.register_tables(h5file, sp.io_prefix),
-        sp.register_groups(h5file, sp.io_prefix))
-    fam_manager = cycio.IOManager(
-        h5file, 
-        fam.register_tables(h5file, fam.io_prefix),
-        fam.register_groups(h5file, fam.io_prefix))
-    
-    # convert
     sp.read_space(rc._dict)
     if verbose or args.count_only:
         print('{0} possible (not validated) points to be converted.'.format(
                 sp.n_points))
     if args.count_only:
-        h5file.close()
         return
+
+    # the species is recorded so that instances may be regenerated
+    pack, mod, cname = tools.obj_info(kind='species', rcs=obj_rcs, args=args)
+    sp_info = {'species_package': pack, 'species_module': mod, 
+               'species_class': cname}
+
+    if args.jobs > 1:
+        # workers convert blocks of points into their own shards, which are
+        # merged into the output database
+        schema = dict((x, True) for x in ['int_ids', 'sparse_flows', 
+                                          'virtual_insts'] if getattr(args, x))
+        exec_tools.pool_conv(fin, fout, sp_info, sp.n_points, args.jobs, 
+                             ninst=ninst, seed=args.seed, schema=schema, 
+                             update_freq=update_freq, verbose=verbose)
+        h5file = t.open_file(fout, 'a')
+        io_tools.set_species_info(h5file, sp_info)
+    else:
+        h5file = t.open_file(fout, 'w', filters=tools.filters())
+        io_tools.set_species_info(h5file, sp_info)
+        if args.int_ids:
+            io_tools.set_int_ids(h5file)
+        if args.sparse_flows:
+            io_tools.set_sparse_flows(h5file)
+        if args.virtual_insts:
+            io_tools.set_virtual_insts(h5file)
+
+        # table set up
+        sp_manager = cycio.IOManager(
+            h5file, 
+            sp.register_tables(h5file, sp.io_prefix),
+            sp.register_groups(h5file, sp.io_prefix),
+            async_writes=args.async_writes)
+        fam_manager = cycio.IOManager(
+            h5file, 
+            fam.register_tables(h5file, fam.io_prefix),
+            fam.register_groups(h5file, fam.io_prefix),
+            async_writes=args.async_writes)
     
-    tools.conv_insts(fam, fam_manager, sp, sp_manager, 
-                     ninst=ninst, update_freq=update_freq, verbose=verbose)
+        # convert
+        tools.conv_insts(fam, fam_manager, sp, sp_manager, ninst=ninst, 
+                         update_freq=update_freq, verbose=verbose, 
+                         seed=args.seed)
+
+        # clean up
+        sp_manager.flush_tables()
+        fam_manager.flush_tables()
+        cycio.index_tables(h5file)
 
-    # clean up
-    sp_manager.flush_tables()
-    fam_manager.flush_tables()
     path = '{0}/{1}'.format(fam.io_prefix, fam.property_table_name)
     instids = tools.collect_instids(h5file=h5file, path=path)
     print(('Upon completion of instance coversion, '
@@ -163,10 +191,13 @@ def execute(args):
         # some scripting workflows produce a string the first time
         asteval = ast.literal_eval(asteval) 
     rc._update(asteval)
-    solvers = [s.strip().rstrip(',') for s in args.solvers]
+    # specifications are recorded in canonical form, so that resumed
+    # executions match them regardless of how they are written
+    solvers = [canonical_spec(s.strip().rstrip(',')) for s in args.solvers]
     
     instids = set(uuid.UUID(x) for x in args.instids)
     verbose = args.verbose
+    cycio.inst_cache.resize(int(args.cache_size * 1024**2))
 
     obj_rcs = tools.all_obj_rcs(rc, args)
     
@@ -176,52 +207,63 @@ def execute(args):
     # execution object
     fam = tools.get_obj(kind='family', rcs=obj_rcs, args=args)
 
-    # get in/out dbs 
+    # get instids to run
     h5in = t.open_file(indb, mode='r', filters=tools.FILTERS)
+    path = '{0}/{1}'.format(fam.io_prefix, fam.property_table_name)
+    instids = tools.collect_instids(h5file=h5in, path=path, rc=rc, 
+                                    instids=instids)
+    if verbose: 
+        print("Executing {0} instances.".format(len(instids)))
+
+    if args.jobs > 1:
+        # workers write to their own shards, which are merged into the outdb
+        h5in.close()
+        pack, mod, cname = tools.obj_info(kind='family', rcs=obj_rcs, args=args)
+        fam_info = {'family_package': pack, 'family_module': mod, 
+                    'family_class': cname}
+        outdb = outdb if outdb is not None else indb
+        done = None
+        if args.resume and os.path.exists(outdb):
+            h5out = t.open_file(outdb, mode='a', filters=tools.filters())
+            done = exec_tools.resume(fam, h5out, verbose=verbose)
+            h5out.close()
+        schema = {'sparse_flows': True} if args.sparse_flows else {}
+        exec_tools.pool_exec(indb, outdb, fam_info, instids, solvers, 
+                             args.jobs, verbose=verbose, threads=args.threads,
+                             time_limit=args.time_limit, done=done, 
+                             prefetch=args.prefetch, schema=schema)
+        return
+
+    # get in/out dbs 
     if outdb is not None:
-        h5out = t.open_file(outdb, mode='a', filters=tools.FILTERS)
+        h5out = t.open_file(outdb, mode='a', filters=tools.filters())
     else:
         h5in.close()
-        h5in = t.open_file(indb, mode='a', filters=tools.FILTERS)
+        h5in = t.open_file(indb, mode='a', filters=tools.filters())
         h5out = h5in
+    if args.sparse_flows:
+        io_tools.set_sparse_flows(h5out)
 
-    # table set up
-    in_manager = cycio.IOManager(
-        h5in, 
-        fam.register_tables(h5in, fam.io_prefix),
-        fam.register_groups(h5in, fam.io_prefix))
-    out_manager = cycio.IOManager(
-        h5out, 
-        fam.register_tables(h5out, fam.io_prefix),
-        fam.register_groups(h5out, fam.io_prefix))
-    result_tbl_name = 'Results'
-    result_manager = cycio.IOManager(
-        h5out, [cycio.ResultTable(h5out, path='/{0}'.format(result_tbl_name))])
+    # skip completed solves
+    done = exec_tools.resume(fam, h5out, verbose=verbose) \
+        if args.resume else None
 
-    # get instids to run
-    path = '{0}/{1}'.format(fam.io_prefix, fam.property_table_name)
-    instids = tools.collect_instids(h5file=h5in, path=path, rc=rc, 
-                                    instids=instids)
-    if verbose: 
-        print("Executing {0} instances.".format(len(instids)))
+    # table set up
+    in_manager, out_manager, result_manager = \
+        exec_tools.exec_managers(fam, h5in, h5out)
 
     # run each instance for each solver
-    for instid in instids:
-        inst = fam.read_inst(instid, in_manager)
-        for kind in solvers:
-            solver = Solver(kind)
-            if verbose:
-                print('Solving instance {0} with the {1} solver'.format(
-                        instid.hex, kind))
-            soln = fam.run_inst(inst, solver)
-            solnid = uuid.uuid4()
-            fam.record_soln(soln, solnid, inst, instid, out_manager)
-            tbl = result_manager.tables[result_tbl_name]
-            tbl.record_soln(soln, solnid, instid, solver)
+    exec_tools.exec_insts(fam, instids, solvers, in_manager, out_manager, 
+                          result_manager, verbose=verbose, threads=args.threads,
+                          time_limit=args.time_limit, done=done, 
+                          prefetch=args.prefetch)
             
     # clean up
     out_manager.flush_tables()
     result_manager.flush_tables()
+    cycio.index_tables(h5out)
+    if verbose:
+        print('Instance cache: {0}'.format(cycio.inst_cache.stats()))
     h5in.close()
     if h5out.isopen:
         h5out.close()
@@ -229,6 +271,7 @@ def execute(args):
 def post_process(args):
     # process cli args
     fam, sp = tools.fam_and_sp(args)
+    cycio.inst_cache.resize(int(args.cache_size * 1024**2))
     h5files = (t.open_file(args.indb, mode='r'), 
                t.open_file(args.outdb, mode='r'), 
                t.open_file(args.ppdb, mode='a'),)
@@ -255,6 +298,8 @@ def post_process(args):
                              fam=fam, fam_io_managers=fam_managers,
                              sp=sp, sp_io_managers=sp_managers,
                              verbose_freq=args.verbose_freq, limit=args.limit)
+    if args.verbose_freq is not None:
+        print('Instance cache: {0}'.format(cycio.inst_cache.stats()))
     
     # clean up
     for m in list(fam_managers) + list(sp_managers) + [result_manager]:
@@ -270,6 +315,9 @@ def col2grp(args):
     out_new = args.out_new
     tools.col2grp(in_old, out_old, in_new, out_new)    
 
+def grp2col(args):
+    tools.grp2col(args.in_old, args.out_old, args.in_new, args.out_new)
+
 def update_cde(args):
     user = args.user
     host = args.host
@@ -347,6 +395,65 @@ def dump(args):
         for iid in instids:
             print(iid.hex)
 
+def benchmark(args):
+    """Benchmarks the write and read rates and compression ratio of storage
+    profiles on the tables of a database."""
+    profiles = args.profiles
+    if profiles is None and args.storage_profile is not None:
+        profiles = [args.storage_profile]
+    results = tools.benchmark_storage(args.db, profiles=profiles)
+    print('{0:>12} {1:>10} {2:>10} {3:>10} {4:>8}'.format(
+            'profile', 'MB', 'write MB/s', 'read MB/s', 'ratio'))
+    for r in results:
+        print('{profile:>12} {mb:10.2f} {write:10.2f} {read:10.2f} '
+              '{ratio:8.2f}'.format(**r))
+
+def flow_footprint(args):
+    """Reports the storage footprint of the solution flows in a database when
+    stored densely and sparsely."""
+    from cyclopts.exchange_family import flow_footprint
+    h5file = t.open_file(args.db, mode='r')
+    r = flow_footprint(h5file)
+    h5file.close()
+    print(('{0} solutions with {1} stored flows ({2:.3f} MB), of which {3} '
+           'are non-zero.').format(r['nsolns'], r['rows'], r['stored_mb'], 
+                                   r['nonzero']))
+    print('{0:>8} {1:>12} {2:>10}'.format('storage', 'rows', 'MB'))
+    for kind in ['dense', 'sparse']:
+        print('{0:>8} {1:>12} {2:10.3f}'.format(
+                kind, r[kind + '_rows'], r[kind + '_mb']))
+
+def inst_benchmark(args):
+    """Reports the time to read instances from a database and to regenerate
+    them from their points and ids."""
+    from cyclopts.exchange_family import ResourceExchange, inst_read_times
+    fam = ResourceExchange()
+    h5file = t.open_file(args.db, mode='r')
+    path = '{0}/{1}'.format(fam.io_prefix, fam.property_table_name)
+    instids = sorted(tools.collect_instids(h5file=h5file, path=path))
+    if args.ninst is not None:
+        instids = instids[:args.ninst]
+    r = inst_read_times(h5file, instids)
+    h5file.close()
+    print('{0} instances with {1} arcs.'.format(r['ninst'], r['narcs']))
+    print('{0:>12} {1:>10} {2:>12}'.format('', 's', 'ms/instance'))
+    n = max(r['ninst'], 1)
+    for kind in ['read', 'regen']:
+        if kind == 'read' and r['match'] is None:
+            continue # virtual instances are not stored
+        print('{0:>12} {1:10.3f} {2:12.3f}'.format(
+                kind, r[kind + '_s'], 1e3 * r[kind + '_s'] / n))
+    if r['match'] is not None:
+        print('Regenerated instances {0} the stored instances.'.format(
+                'match' if r['match'] else 'DO NOT match'))
+
+def _set_storage_profile(args):
+    """Sets the storage profile given by the CLI or run control files."""
+    rc = getattr(args, 'rc', None)
+    rc = tools.parse_rc(rc) if rc is not None else None
+    profile = tools.storage_profile(args, tools.all_obj_rcs(rc, args))
+    tools.set_storage_profile(profile)
+
 def _file_default(pathlist):
     """TODO: Document this"""
     for p in pathlist:
@@ -373,6 +480,12 @@ def gen_parser():
     proffile = "Name of profiling filename if profile is set."
     cyclopts_parser.add_argument('--proffile', default='cyclopts.prof', 
                                  help=proffile)
+    storage = ("The storage profile (compression and chunking) of written "
+               "tables, one of {0}. A storage_profile entry in a run control "
+               "file may also give a mapping from table kinds to storage "
+               "settings.".format(', '.join(sorted(tools.STORAGE_PROFILES))))
+    cyclopts_parser.add_argument('--storage-profile', dest='storage_profile',
+                                 default=None, help=storage)
     
     # parser for family info
     family_parser = argparse.ArgumentParser(add_help=False)    
@@ -422,6 +535,35 @@ def gen_parser():
     update_freq = ("The instance frequency with which to update stdout.")
     conv_parser.add_argument('-u', '--update-freq', type=int, dest='update_freq', 
                              default=100, help=update_freq)
+    int_ids = ("Store integer ids in place of uuids in instance tables, with a "
+               "dictionary table of the uuid of each id.")
+    conv_parser.add_argument('--int-ids', dest='int_ids', action='store_true', 
+                             default=False, help=int_ids)
+    sparse = ("Store only the non-zero flows of solutions of the converted "
+              "instances.")
+    conv_parser.add_argument('--sparse-flows', dest='sparse_flows', 
+                             action='store_true', default=False, help=sparse)
+    async_writes = ("Write to the database on a background thread, so that "
+                    "instances are generated while previous ones are written.")
+    conv_parser.add_argument('--async-writes', dest='async_writes', 
+                             action='store_true', default=False, 
+                             help=async_writes)
+    virtual = ("Store only the points and properties of instances, which "
+               "are regenerated from their points and ids when they are read. "
+               "The species must support reading its points.")
+    conv_parser.add_argument('--virtual', dest='virtual_insts', 
+                             action='store_true', default=False, help=virtual)
+    jobs = ("The number of processes with which to convert points. Each "
+            "process converts a contiguous block of points into its own shard "
+            "database, and shards are merged into the output database.")
+    conv_parser.add_argument('-j', '--jobs', dest='jobs', type=int, default=1, 
+                             help=jobs)
+    seed = ("Determine the ids of points and instances, and thereby the "
+            "instances themselves, by this seed, so that conversions with the "
+            "same seed, serial or parallel, are identical. Without it, "
+            "points with a seed parameter determine their ids by that seed.")
+    conv_parser.add_argument('--seed', dest='seed', type=int, default=None, 
+                             help=seed)
 
     #
     # execute instances locally
@@ -434,7 +576,11 @@ def gen_parser():
     exec_parser.set_defaults(func=execute)
     db = ("An HDF5 Cyclopts database (e.g., the result of 'cyclopts convert').")
     exec_parser.add_argument('--db', dest='db', help=db)
-    solversh = ("A list of which solvers to use.")
+    solversh = ("A list of which solvers to use. Each solver may be given "
+                "options after a colon, e.g., cbc:threads=4,gap=0.01. Valid "
+                "options are {0}.".format('; '.join(
+                    '{0}: {1}'.format(k, ', '.join(v)) \
+                        for k, v in sorted(KIND_OPTS.items()))))
     exec_parser.add_argument('--solvers', nargs='*', default=['cbc'], 
                              dest='solvers', help=solversh)    
     instids = ("A list of instids (as UUID hex strings) to run.")
@@ -449,6 +595,41 @@ def gen_parser():
     conds = ("A dictionary representation of execution conditions. This CLI "
              "argument can be used instead of placing them in an RC file.")
     exec_parser.add_argument('--conds', dest='conds', default='{}', help=conds)
+    jobs = ("The number of processes with which to execute instances. Each "
+            "process writes to its own shard, and all shards are merged into "
+            "the output database after execution.")
+    exec_parser.add_argument('-j', '--jobs', dest='jobs', type=int, default=1, 
+                             help=jobs)
+    threads = ("The number of threads with which to solve instances in each "
+               "process. Database I/O is performed on the main thread while "
+               "solves run concurrently.")
+    exec_parser.add_argument('--threads', dest='threads', type=int, default=1, 
+                             help=threads)
+    time_limit = ("The time limit of each solve in seconds. The limit is passed "
+                  "to solvers that support one, and solves that run longer "
+                  "than the limit plus a grace period are killed and recorded "
+                  "with a 'timeout' status. Solves whose process dies before "
+                  "the limit are recorded with a 'crash' status.")
+    exec_parser.add_argument('--time-limit', dest='time_limit', type=float, 
+                             default=None, help=time_limit)
+    prefetch = ("If greater than 0, execute instances in a pipeline that reads "
+                "up to this many instances ahead of the solvers and records "
+                "solutions in the background.")
+    exec_parser.add_argument('--prefetch', dest='prefetch', type=int, 
+                             default=0, help=prefetch)
+    resume = ("Resume an interrupted execution, skipping instances and solvers "
+              "that have already been solved in the output database. Partial "
+              "output of the interrupted execution is removed.")
+    exec_parser.add_argument('--resume', dest='resume', action='store_true', 
+                             default=False, help=resume)
+    cache = ("The memory budget in MB of the cache of instances read during "
+             "execution. Each instance is read once per execution, so the "
+             "cache is disabled by default.")
+    exec_parser.add_argument('--cache-size', dest='cache_size', type=float, 
+                             default=0, help=cache)
+    sparse = ("Store only the non-zero flows of solutions.")
+    exec_parser.add_argument('--sparse-flows', dest='sparse_flows', 
+                             action='store_true', default=False, help=sparse)
     verbose = ("Print verbose output during execution.")
     exec_parser.add_argument('-v', '--verbose', dest='verbose', 
                              action='store_true', default=False, help=verbose)
@@ -477,6 +658,10 @@ def gen_parser():
                            default=None, help=vf)
     lim = ("Post process only X instances (used for profiling/testing).")
     pp_parser.add_argument('--limit', dest='limit', type=int, default=None, help=lim)
+    cache = ("The memory budget in MB of the cache of instance data read "
+             "during post processing.")
+    pp_parser.add_argument('--cache-size', dest='cache_size', type=float, 
+                           default=256, help=cache)
             
     #
     # execute instances with condor
@@ -644,6 +829,24 @@ def gen_parser():
     out_new = 'the new output database'
     col2grp_parser.add_argument('--out_new', help=out_new, default='out_new.h5')
 
+    #
+    # translate a database in id-group form to single-table form
+    #
+    grp2colh = ("Moves input and output databases from id-group form, with a "
+                "table per instance or solution, to single tables of all "
+                "instances or solutions.")
+    grp2col_parser = sp.add_parser('grp2col', parents=[cyclopts_parser], 
+                                   help=grp2colh)
+    grp2col_parser.set_defaults(func=grp2col)
+    in_old = 'the old input database'
+    grp2col_parser.add_argument('in_old', help=in_old, default='in_old.h5')
+    out_old = 'the old output database'
+    grp2col_parser.add_argument('out_old', help=out_old, default='out_old.h5')
+    in_new = 'the new input database'
+    grp2col_parser.add_argument('--in_new', help=in_new, default='in_new.h5')
+    out_new = 'the new output database'
+    grp2col_parser.add_argument('--out_new', help=out_new, default='out_new.h5')
+
     #
     # dump information about an instance db
     #
@@ -660,6 +863,47 @@ def gen_parser():
     dump_parser.add_argument('--list', default=False, action='store_true', 
                              dest='list', help=listh)    
     
+    #
+    # report the footprint of solution flows
+    #
+    footh = ("Reports the storage footprint of the solution flows in a "
+             "database when stored densely and when only non-zero flows are "
+             "stored.")
+    foot_parser = sp.add_parser('flow-footprint', parents=[cyclopts_parser], 
+                                help=footh)
+    foot_parser.set_defaults(func=flow_footprint)
+    db = ("A database with solutions.")
+    foot_parser.add_argument('--db', dest='db', help=db)
+
+    #
+    # benchmark storage profiles
+    #
+    benchh = ("Benchmarks the write and read rates and compression ratios of "
+              "storage profiles on the tables of a database.")
+    bench_parser = sp.add_parser('benchmark', parents=[cyclopts_parser], 
+                                 help=benchh)
+    bench_parser.set_defaults(func=benchmark)
+    db = ("The database whose tables are benchmarked.")
+    bench_parser.add_argument('--db', dest='db', help=db)
+    profiles = ("The storage profiles to benchmark, defaults to the selected "
+                "profile if any, or else all profiles.")
+    bench_parser.add_argument('--profiles', nargs='+', dest='profiles', 
+                              default=None, help=profiles)
+
+    #
+    # benchmark reading and regenerating instances
+    #
+    insth = ("Benchmarks reading the instances of a database against "
+             "regenerating them from their points and ids.")
+    inst_parser = sp.add_parser('inst-benchmark', parents=[cyclopts_parser], 
+                                help=insth)
+    inst_parser.set_defaults(func=inst_benchmark)
+    db = ("A database converted with a recorded species.")
+    inst_parser.add_argument('--db', dest='db', help=db)
+    ninst = ("The number of instances to benchmark, defaults to all.")
+    inst_parser.add_argument('-n', '--ninstances', type=int, dest='ninst', 
+                             default=None, help=ninst)
+    
     return parser
 
 def main():
@@ -671,6 +915,7 @@ def main():
     if argcomplete is not None:
         argcomplete.autocomplete(parser)
     args = parser.parse_args()
+    _set_storage_profile(args)
     # invoke profiling if we're asked to
     if args.profile:
         import cProfile as cprof
@@ -28,10 +28,13 @@ class Param(object):
     def init(self):
         pass
 
-    def sample(self):
-        """Return a value sampled from the distribution"""
+    def sample(self, n=None, rng=None):
+        """Return a value sampled from the distribution, or an array of n 
+        values if n is given"""
         # if self.dist is None:
         #     return self.avg
+        if n is not None:
+            return np.repeat(self.avg, n)
         return self.avg
 
     def __eq__(self, other):
@@ -58,8 +61,13 @@ class BoolParam(object):
     def init(self):
         pass
 
-    def sample(self):
-        """Returns True if sampled below the cutoff, False otherwise"""
+    def sample(self, n=None, rng=None):
+        """Returns True if sampled below the cutoff, False otherwise, or an 
+        array of n such values drawn from rng (a numpy RandomState, default
+        numpy.random) if n is given"""
+        if n is not None:
+            rng = np.random if rng is None else rng
+            return self.cutoff >= rng.uniform(0, 1, n)
         return self.cutoff >= rnd.uniform(0, 1)
 
     def __eq__(self, other):
@@ -92,9 +100,13 @@ class CoeffParam(object):
     def init(self):
         self._dist_func = rnd.uniform # update this for more functions
 
-    def sample(self):
-        """Returns a sampled coefficient"""
+    def sample(self, n=None, rng=None):
+        """Returns a sampled coefficient, or an array of n coefficients drawn
+        from rng (a numpy RandomState, default numpy.random) if n is given"""
         #if self.dist == "uniform":
+        if n is not None:
+            rng = np.random if rng is None else rng
+            return rng.uniform(self.lb, self.ub, n)
         return self._dist_func(self.lb, self.ub)
 
     def __eq__(self, other):
@@ -133,8 +145,14 @@ class SupConstrParam(object):
     def init(self):
         pass
 
-    def sample(self):
-        """Returns a fractional supply constraint value for a commodity"""
+    def sample(self, n=None, rng=None):
+        """Returns a fractional supply constraint value for a commodity, or an
+        array of n values drawn from rng (a numpy RandomState, default
+        numpy.random) if n is given"""
+        if n is not None:
+            rng = np.random if rng is None else rng
+            return rng.choice(self.fracs, n) if self.rand \
+                else np.repeat(self.cutoff, n)
         if self.rand:
             return rnd.choice(self.fracs)
         else:
@@ -5,6 +5,90 @@
 
 from cyclopts._cproblem import *
 
+def _to_bool(x):
+    if x.lower() in ('1', 'true', 'on', 'yes'):
+        return True
+    if x.lower() in ('0', 'false', 'off', 'no'):
+        return False
+    raise ValueError('{0} is not a boolean value'.format(x))
+
+# solver options settable in a solver specification and their types
+SOLVER_OPTS = {
+    'threads': int,
+    'gap': float,
+    'node_limit': int,
+    'time_limit': float,
+    'presolve': _to_bool,
+    }
+
+# kinds of solvers that stop at their time limit with their best solution, see
+# SolverFactory in cpp/exchange_instance.cc; others run to completion
+TIME_LIMITED_SOLVERS = ('cbc',)
+
+# the options read by each kind of solver, see SolverFactory; the time limit of
+# any solver bounds its solves in exec_tools.watched_run()
+KIND_OPTS = {
+    'cbc': tuple(sorted(SOLVER_OPTS.keys())),
+    'clp': ('time_limit',),
+    'clp-e': ('time_limit',),
+    'greedy': ('time_limit',),
+    }
+
+def solver_from_spec(spec, time_limit=None):
+    """Returns a Solver from a specification of its type and options, e.g., 
+    'cbc:threads=4,gap=0.01'. 
+
+    Parameters
+    ----------
+    spec : str
+        the solver type, optionally followed by a colon and comma-separated
+        option=value pairs, where options are those of the type in KIND_OPTS
+    time_limit : float, optional
+        the time limit to use if none is given in the spec
+    
+    Returns
+    -------
+    solver : Solver
+        the solver
+    """
+    kind, _, opts = spec.partition(':')
+    solver = Solver(kind.strip())
+    if time_limit is not None:
+        solver.time_limit = time_limit
+    valid = KIND_OPTS.get(solver.type or 'cbc', sorted(SOLVER_OPTS.keys()))
+    for opt in [x for x in opts.split(',') if x.strip()]:
+        key, _, val = [x.strip() for x in opt.partition('=')]
+        if key not in valid or not val:
+            raise ValueError(
+                'Invalid solver option {0} in {1}, options are {2}'.format(
+                    opt, spec, ', '.join(valid)))
+        setattr(solver, key, SOLVER_OPTS[key](val))
+    return solver
+
+def canonical_spec(spec):
+    """Returns the canonical form of a solver specification, in which
+    whitespace is removed and options are sorted by name, e.g., 
+    'cbc:gap=0.01,threads=4' for 'cbc: threads=4, gap=0.01'. Specifications of
+    the same solver have the same canonical form regardless of how they were
+    written.
+
+    Parameters
+    ----------
+    spec : str
+        the solver specification, see solver_from_spec()
+    
+    Returns
+    -------
+    canon : str
+        the canonical specification
+    """
+    solver_from_spec(spec) # fail early on invalid specifications
+    kind, _, opts = spec.partition(':')
+    opts = sorted('='.join(x.strip() for x in opt.partition('=')[::2]) \
+                      for opt in opts.split(',') if opt.strip())
+    return kind.strip() if len(opts) == 0 else \
+        '{0}:{1}'.format(kind.strip(), ','.join(opts))
+
 class ProblemFamily(object):
     """A class representing families of problems that share the same
     structure.
@@ -115,6 +199,25 @@ class ProblemFamily(object):
         """
         raise NotImplementedError
 
+    def clean_solns(self, keep, io_manager):
+        """Derived classes that record solutions should implement this function
+        to remove all recorded solutions other than those in a collection, e.g.,
+        the partial output of an interrupted execution.
+        
+        Parameters
+        ----------
+        keep : collection of uuids
+            the ids of the solutions to keep
+        io_manager : cyclopts_io.IOManager
+            IOManager that gives access to tables/groups for writing
+
+        Returns
+        -------
+        n : int
+            the number of solutions removed
+        """
+        return 0
+
     def read_inst(self, uuid, tables):
         """Derived classes must implement this function to return a tuple
         instance structures that can be provided to the run_inst function.
@@ -133,6 +236,27 @@ class ProblemFamily(object):
         """
         raise NotImplementedError
 
+    def read_inst_columnar(self, uuid, io_manager):
+        """Derived classes may implement this function to return a
+        representation of an instance that is faster to read than that of
+        read_inst(), e.g., without constructing an object per row, and that
+        need only be accepted by run_inst and run_inst_many. Returns the 
+        result of read_inst() by default.
+          
+        Parameters
+        ----------
+        uuid : uuid
+            The uuid of the instance to read
+        io_manager : cyclopts_io.IOManager
+            IOManager that gives access to tables/groups for reading
+
+        Returns
+        -------
+        inst : tuple or other
+            A representation of a problem instance
+        """
+        return self.read_inst(uuid, io_manager)
+
     def run_inst(self, inst, solver):
         """Derived classes must implement this function to take a tuple instance
         structures provided by the exec_inst function and return a ProblemResult
@@ -152,6 +276,27 @@ class ProblemFamily(object):
         """
         raise NotImplementedError
 
+    def run_inst_many(self, inst, solvers):
+        """Solves an instance with each of a collection of solvers. By default,
+        run_inst is called once per solver. Derived classes can override this
+        function if an instance's solver representation can be shared among
+        solves.
+        
+        Parameters
+        ----------
+        inst : tuple or other
+            A representation of a problem instance
+        solvers : list of ProbSolvers or similar
+            Representations of problem solvers
+
+        Returns
+        -------
+        solns : list of ProbSolutions or similar
+            A representation of a problem solution for each solver, in the 
+            same order as solvers
+        """
+        return [self.run_inst(inst, solver) for solver in solvers]
+
     def post_process(self, instid, solnids, tbls):
         """Derived classes can implement this function to output interesting
         aggregate data during a post-processing step after some number of
@@ -298,6 +443,44 @@ class ProblemSpecies(object):
         """
         raise NotImplementedError
 
+    def recorded_point(self, point):
+        """Derived classes can implement this function, returning a point with
+        the values that record_point() records for it, so that instances
+        generated from it may be regenerated from the point returned by
+        read_point(). By default, the point itself is returned.
+
+        Parameters
+        ----------
+        point : tuple or other
+            A representation of a point in parameter space
+
+        Returns
+        -------
+        point : tuple or other
+            The point as it is recorded
+        """
+        return point
+
+    def read_point(self, param_uuid, h5file):
+        """Derived classes can implement this function, returning a point
+        recorded by record_point(). Instances of species that implement it may
+        be virtual, i.e., regenerated from their point and id when they are
+        read rather than stored, see cyclopts.io_tools.virtual_insts().
+
+        Parameters
+        ----------
+        param_uuid : uuid
+            The uuid of the point in parameter space
+        h5file : PyTables File
+            the hdf5 file in which the point is recorded
+
+        Returns
+        -------
+        point : tuple or other
+            A representation of a point in parameter space
+        """
+        raise NotImplementedError
+
     def gen_inst(self, point, instid=None, io_manager=None):
         """Derived classes must implement this function, returning a
         representation of a problem instance.
@@ -318,6 +501,30 @@ class ProblemSpecies(object):
             family
         """
         raise NotImplementedError
+
+    def gen_inst_columnar(self, point, instid=None, io_manager=None):
+        """Derived classes can implement this function, returning a columnar
+        representation of a problem instance, see
+        ProblemFamily.read_inst_columnar(), that is generated in bulk. By
+        default, the instance from gen_inst() is returned, and families must
+        record either representation.
+        
+        Parameters
+        ----------
+        point : tuple or other
+            A representation of a point in parameter space
+        instid : uuid
+            the id for the instance, optional
+        io_manager : cyclopts_io.IOManager, optional
+            IOManager that gives access to tables/groups for writing
+        
+        Returns
+        -------
+        inst : tuple or other
+            A representation of a problem instance to be used by this species' 
+            family
+        """
+        return self.gen_inst(point, instid, io_manager)
     
     def post_process(self, instid, solnids, props, tbls):
         """Derived classes can implement this function to output interesting
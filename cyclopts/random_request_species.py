@@ -204,7 +204,7 @@ class RandomRequestBuilder(object):
     """
     def __init__(self, sampler, commod_offset = 0, req_g_offset = 0, 
                  sup_g_offset = 0, req_n_offset = 0, sup_n_offset = 0, 
-                 arc_offset = 0,
+                 arc_offset = 0, rng = None,
                  *args, **kwargs):
         """Parameters
         ----------
@@ -224,6 +224,9 @@ class RandomRequestBuilder(object):
             an offset for supply node ids
         arc_offset : int, optional
             an offset for arc ids
+        rng : numpy.random.RandomState, optional
+            the state from which per-arc and per-node parameters are sampled in
+            bulk, seeded from the random module by default
         """
         self.sampler = sampler
         self.commod_offset = commod_offset
@@ -233,6 +236,8 @@ class RandomRequestBuilder(object):
         self.req_n_offset = req_n_offset
         self.sup_n_offset = sup_n_offset
         self.arc_offset = arc_offset
+        self.rng = rng if rng is not None \
+            else np.random.RandomState(rnd.randint(0, 2**32 - 1))
 
     def valid(self):
         """Screens the provided sampler to determine if it provides a valid
@@ -323,6 +328,10 @@ class RandomRequestBuilder(object):
         bid = False
 
         # populate request params
+        excls = iter(s.exclusive.sample(
+                sum(len(reqs) for multi_reqs in request.values() \
+                        for reqs in multi_reqs), 
+                self.rng).tolist())
         for g_id, multi_reqs in request.items():
             total_grp_qty = self._req_grp_qty(multi_reqs)
             n_constr = s.n_req_constr.sample()
@@ -338,7 +347,7 @@ class RandomRequestBuilder(object):
                 for n_id, commod in reqs:
                     n_node_ucaps[n_id] = n_constr
                     req_qty = self._req_node_qty()
-                    excl = s.exclusive.sample() # exclusive or not
+                    excl = excls.next() # exclusive or not
                     excl_id = exid.next() if excl else -1 # need unique exclusive id
                     self.nodes.append(
                         exinst.ExNode(n_id, g_id, req, req_qty, excl, excl_id))
@@ -349,6 +358,7 @@ class RandomRequestBuilder(object):
         commod_demand = self._commod_demand()
         supplier_capacity = \
             self._supplier_capacity(commod_demand, supplier_commods)
+        arc_nodes = []
         for g_id, sups in supply.items():
             caps = self._sup_constr_vals(supplier_capacity[g_id], 
                                          s.n_sup_constr.sample())
@@ -360,15 +370,26 @@ class RandomRequestBuilder(object):
                 req_qty = req_qtys[u_id]
                 n_node_ucaps[v_id] = len(caps)
                 self.nodes.append(exinst.ExNode(v_id, g_id, bid, req_qty))
-                # arc from u-v node
-                # add qty as first constraint -- required for clp/cbc
-                ucaps = np.append(
-                    [self._req_def_constr(req_qty)], 
-                    [s.constr_coeff.sample() for i in range(n_node_ucaps[u_id])])
-                vcaps = [s.constr_coeff.sample() for i in range(n_node_ucaps[v_id])]
-                self.arcs.append(
-                    exinst.ExArc(a_ids.next(), u_id, ucaps, 
-                                 v_id, vcaps, s.pref_coeff.sample()))
+                arc_nodes.append((u_id, v_id))
+
+        # arc coefficients are sampled in bulk, in arc order
+        n_ucaps = np.array([n_node_ucaps[u] for u, _ in arc_nodes], dtype=int)
+        n_vcaps = np.array([n_node_ucaps[v] for _, v in arc_nodes], dtype=int)
+        u_offs = np.append(0, np.cumsum(n_ucaps)).tolist()
+        v_offs = np.append(0, np.cumsum(n_vcaps)).tolist()
+        u_coeffs = s.constr_coeff.sample(u_offs[-1], self.rng)
+        v_coeffs = s.constr_coeff.sample(v_offs[-1], self.rng)
+        prefs = s.pref_coeff.sample(len(arc_nodes), self.rng).tolist()
+        # add qty as first constraint -- required for clp/cbc
+        u_coeffs = np.insert(
+            u_coeffs, u_offs[:-1], 
+            [self._req_def_constr(req_qtys[u]) for u, _ in arc_nodes])
+        for i, (u_id, v_id) in enumerate(arc_nodes):
+            # arc from u-v node
+            ucaps = u_coeffs[u_offs[i] + i:u_offs[i + 1] + i + 1]
+            vcaps = v_coeffs[v_offs[i]:v_offs[i + 1]]
+            self.arcs.append(
+                exinst.ExArc(a_ids.next(), u_id, ucaps, v_id, vcaps, prefs[i]))
 
         return self.groups, self.nodes, self.arcs
 
@@ -507,6 +528,9 @@ class RandomRequestBuilder(object):
                 if commod in g_commods:
                     possible_supply[req].append(g_id)
 
+        conns = iter(s.connection.sample(
+                sum(len(g_ids) - 1 for g_ids in possible_supply.values()), 
+                self.rng).tolist())
         for req, g_ids in possible_supply.items():
             rnd.shuffle(g_ids)
             # guarantees all reqs are connected to at least 1 supplier
@@ -514,7 +538,7 @@ class RandomRequestBuilder(object):
             supply[g_ids[0]].append((s_id, req))
             self.sups_to_commods[s_id] = self.reqs_to_commods[req]
             for i in range(1, len(g_ids)):
-                if s.connection.sample():
+                if conns.next():
                     s_id = n_ids.next()
                     supply[g_ids[i]].append((s_id, req))
                     self.sups_to_commods[s_id] = self.reqs_to_commods[req]
@@ -14,7 +14,8 @@ from cyclopts import cyclopts_io as cycio
 from cyclopts import io_tools as io_tools
 import cyclopts.exchange_instance as exinst
 from cyclopts.problems import ProblemSpecies
-from cyclopts.exchange_family import ResourceExchange
+from cyclopts.exchange_family import ResourceExchange, encode_inst, \
+    inst_rows, inst_objs, cap_offsets
 
 from cyclopts.structured_species import data
 from cyclopts.structured_species import tools as strtools
@@ -220,6 +221,8 @@ class StructuredRequest(ProblemSpecies):
         self.tables = None
         self.groups = None
         self.arc_tbl = None
+        # arc table rows of the last generated instance
+        self.arc_rows = None
         
     def register_tables(self, h5file, prefix):
         """Parameters
@@ -239,7 +242,8 @@ class StructuredRequest(ProblemSpecies):
                 cycio.Table(h5file, '/'.join([prefix, self.sum_tbl_name]), 
                             self._sum_dtype),
                 cycio.Table(h5file, '/'.join([prefix, strtools.pp_tbl_name]), 
-                            strtools.pp_tbl_dtype),]
+                            strtools.pp_tbl_dtype),] + \
+            strtools.arc_tables(h5file, prefix)
 
     def register_groups(self, h5file, prefix):
         """Parameters
@@ -254,7 +258,7 @@ class StructuredRequest(ProblemSpecies):
         groups : list of cyclopts_io.Groups
             All groups that could be written to by this species.
         """
-        return [cycio.Group(h5file, '/'.join([prefix, strtools.arc_io_name]))]
+        return strtools.arc_groups(h5file, prefix)
 
     def read_space(self, space_dict):
         """Parameters
@@ -316,6 +320,35 @@ class StructuredRequest(ProblemSpecies):
         data += strtools.support_breakdown(point)[:-1]
         tables[self.sum_tbl_name].append_data([tuple(data)])
 
+    def recorded_point(self, point):
+        """Parameters
+        ----------
+        point : structured_species.Point
+            A representation of a point in parameter space
+
+        Returns
+        -------
+        point : structured_species.Point
+            The point with the values that are recorded for it
+        """
+        return point.recorded()
+
+    def read_point(self, param_uuid, h5file):
+        """Parameters
+        ----------
+        param_uuid : uuid
+            The uuid of the point in parameter space
+        h5file : PyTables File
+            the hdf5 file in which the point is recorded
+
+        Returns
+        -------
+        point : structured_species.Point
+            The recorded point
+        """
+        path = '/'.join([self.io_prefix, self.param_tbl_name])
+        return strtools.read_point(h5file, path, param_uuid, Point)
+
     def _get_reactors(self, point):
         n_uox, n_mox, n_thox = strtools.reactor_breakdown(point)
         uox_th_r = np.ndarray(
@@ -373,49 +406,99 @@ class StructuredRequest(ProblemSpecies):
             }
         return suppliers
 
-    def _generate_supply(self, point, commod, requester, supplier):
-        r = requester
-        s = supplier
-        commod_pref = data.rxtr_pref_basis[r.kind][commod]
-        loc_pref = strtools.loc_pref(r.loc, s.loc, point.f_loc, point.n_reg)
-        pref = commod_pref + loc_pref * point.r_l_c
-        rnodes = r.commod_to_nodes[commod]
-        arcs = []
-        enr = r.enr(commod)
-
-        # req coeffs have full orders take into relative fissile material
-        req_coeffs = r.coeffs(commod)
-
-        # sup coeffs act on the quantity of fissile material 
-        qty = r.req_qty(commod)
-        sup_coeffs = s.coeffs(qty, enr)
-        for i in range(len(rnodes)):
-            req = True
-            nid = self.nids.next()
-            node = exinst.ExNode(nid, s.group.id, not req, qty)
-            s.nodes.append(node)
-            arcid = self.arcids.next()
-            if self.arc_tbl is not None:
-                self.arc_tbl.append_data([(arcid, commod, commod_pref, loc_pref)])
-            #print('id', arcid, 'commod', commod, 'pref', pref)
-            arcs.append(exinst.ExArc(
-                    arcid,
-                    rnodes[i].id, req_coeffs,
-                    nid, sup_coeffs,
-                    pref))
-        return arcs
-
-    def _get_arcs(self, point, reactors, suppliers):
-        arcs = []
-        for r_kind, r_ary in reactors.items():
-            for r in r_ary:
-                for commod in rxtr_commods(r.kind, point.f_fc):
-                    for s in suppliers[data.commod_to_sup[commod]]:
-                        supply = self._generate_supply(point, commod, r, s)
-                        arcs.append(supply)
-        return np.concatenate(arcs)          
+    def _gen_arcs(self, point, reactors, suppliers):
+        """Generates the arcs of an instance and their supplier nodes in bulk,
+        with the same ids and values as generating the supply of each supplier
+        to each reactor for each commodity in turn. Arcs are generated in 
+        blocks of a reactor kind and commodity, with a row per reactor, 
+        supplier, and request node.
 
-    def gen_inst(self, point, instid=None, io_manager=None):
+        Returns
+        -------
+        nodes : numpy structured array
+            the supplier nodes, ordered by supplier
+        arcs : numpy structured array
+            the arcs, ordered by id
+        arc_rows : numpy structured array
+            the species' arc table rows of the arcs
+        """
+        sups = [s for ary in suppliers.values() for s in ary]
+        sup_idx = dict((id(s), i) for i, s in enumerate(sups))
+        names = ['uid', 'sup', 'gid', 'qty', 'pref', 'commod', 'pref_c', 
+                 'pref_l', 'ucap', 'vcap_proc', 'vcap_inv']
+        cols = defaultdict(list)
+        for r_kind, r_ary in reactors.items():
+            if len(r_ary) == 0:
+                continue
+            # the columns of each block, with a row per reactor
+            blocks = defaultdict(list)
+            r_locs = [r.loc for r in r_ary]
+            for commod in rxtr_commods(r_kind, point.f_fc):
+                s_ary = suppliers[data.commod_to_sup[commod]]
+                nreq = len(r_ary[0].commod_to_nodes[commod])
+                shape = (len(r_ary), len(s_ary), nreq)
+                if len(s_ary) == 0 or nreq == 0:
+                    continue
+                commod_pref = data.rxtr_pref_basis[r_kind][commod]
+                loc_pref = strtools.loc_prefs(r_locs, [s.loc for s in s_ary], 
+                                              point.f_loc, point.n_reg)
+                qtys = np.array([r.req_qty(commod) for r in r_ary])
+                vcaps = np.array([s_ary[0].coeffs(qty, r.enr(commod)) \
+                                      for qty, r in zip(qtys, r_ary)])
+                vals = {
+                    'uid': np.array([[x.id for x in r.commod_to_nodes[commod]] \
+                                         for r in r_ary])[:, np.newaxis, :],
+                    'sup': np.array([sup_idx[id(x)] for x in s_ary]\
+                                        )[np.newaxis, :, np.newaxis],
+                    'gid': np.array([x.group.id for x in s_ary]\
+                                        )[np.newaxis, :, np.newaxis],
+                    'qty': qtys[:, np.newaxis, np.newaxis],
+                    'pref': (commod_pref + loc_pref * point.r_l_c\
+                                 )[:, :, np.newaxis],
+                    'commod': commod,
+                    'pref_c': commod_pref,
+                    'pref_l': loc_pref[:, :, np.newaxis],
+                    'ucap': r_ary[0].coeffs(commod)[0],
+                    'vcap_proc': vcaps[:, 0, np.newaxis, np.newaxis],
+                    'vcap_inv': vcaps[:, 1, np.newaxis, np.newaxis],
+                    }
+                for name in names:
+                    block = np.empty(shape, dtype=np.asarray(vals[name]).dtype)
+                    block[...] = vals[name]
+                    blocks[name].append(block.reshape(len(r_ary), -1))
+            for name in blocks:
+                cols[name].append(np.concatenate(blocks[name], axis=1).ravel())
+        cols = dict((name, np.concatenate(cols[name]) if name in cols \
+                         else np.empty(0)) for name in names)
+
+        n = len(cols['uid'])
+        nids = self.nids.next_n(n)
+        arcids = self.arcids.next_n(n)
+        arcs = inst_rows('ExArc', n)
+        arcs['id'] = arcids
+        arcs['uid'] = cols['uid']
+        arcs['ucaps'][:, 0] = cols['ucap']
+        arcs['vid'] = nids
+        arcs['vcaps'][:, 0] = cols['vcap_proc']
+        arcs['vcaps'][:, 1] = cols['vcap_inv']
+        arcs['pref'] = cols['pref']
+
+        order = np.argsort(cols['sup'], kind='mergesort')
+        nodes = inst_rows('ExNode', n)
+        nodes['id'] = nids[order]
+        nodes['gid'] = cols['gid'][order]
+        nodes['kind'] = False
+        nodes['qty'] = cols['qty'][order]
+        nodes['excl'] = False
+        nodes['excl_id'] = -1
+
+        arc_rows = np.empty(n, dtype=strtools.arc_tbl_dtype)
+        arc_rows['arcid'] = arcids
+        for name in ['commod', 'pref_c', 'pref_l']:
+            arc_rows[name] = cols[name]
+        return nodes, arcs, arc_rows
+
+    def gen_inst_columnar(self, point, instid=None, io_manager=None):
         """Parameters
         ----------
         point :  structured_species.Point
@@ -427,9 +510,10 @@ class StructuredRequest(ProblemSpecies):
            
         Returns
         -------
-        inst : tuple of lists of ExGroups, ExNodes, and ExArgs
-            A representation of a problem instance to be used by this species' 
-            family
+        inst : tuple of ExGroup, ExNode, and ExArc structured arrays and a 
+            dictionary of capacities from exchange_family.cap_offsets()
+            A columnar representation of a problem instance, whose arcs are
+            generated in bulk
         """      
         # reset id generation
         self.nids = cyctools.Incrementer()
@@ -440,36 +524,45 @@ class StructuredRequest(ProblemSpecies):
         # set up IO
         self.tables = None if io_manager is None else io_manager.tables
         self.groups = None if io_manager is None else io_manager.groups
-        self.arc_tbl = None
-        if self.groups is not None:
-            arc_grp = self.groups[strtools.arc_io_name]
-            arc_tbl_path = '/'.join([arc_grp.path, 
-                                     'id_' + self.instid.hex])
-            self.arc_tbl = cycio.Table(arc_grp.h5file, arc_tbl_path, strtools.arc_tbl_dtype)
-            self.arc_tbl.cond_create()
+        self.arc_tbl = strtools.inst_arc_table(io_manager, self.instid)
 
         # species objects
         reactors = self._get_reactors(point)        
         suppliers = self._get_suppliers(point)        
 
         # create arcs
-        arcs = self._get_arcs(point, reactors, suppliers)
+        s_nodes, arcs, arc_rows = self._gen_arcs(point, reactors, suppliers)
+        self.arc_rows = arc_rows
         if self.arc_tbl is not None:
+            self.arc_tbl.append_data(arc_rows)
             self.arc_tbl.flush()
-        
-        # collect nodes
-        r_nodes = np.concatenate([x.nodes for ary in reactors.values() \
-                                     for x in ary])
-        s_nodes = np.concatenate([x.nodes for ary in suppliers.values() \
-                                     for x in ary])
-        nodes = np.concatenate((r_nodes, s_nodes))
 
-        # collect groups
+        # collect groups and nodes
         r_groups = [x.group for ary in reactors.values() for x in ary]
         s_groups = [x.group for ary in suppliers.values() for x in ary]
-        groups = np.concatenate((r_groups, s_groups))
+        r_nodes = [n for ary in reactors.values() for x in ary for n in x.nodes]
+        groups, r_nodes, _ = encode_inst(instid, r_groups + s_groups, r_nodes, 
+                                         [])
+        nodes = np.concatenate((r_nodes, s_nodes))
+        return groups, nodes, arcs, cap_offsets(groups, arcs)
 
-        return groups, nodes, arcs
+    def gen_inst(self, point, instid=None, io_manager=None):
+        """Parameters
+        ----------
+        point :  structured_species.Point
+            A representation of a point in parameter space
+        instid : uuid
+            the id for the instance
+        io_manager : cyclopts_io.IOManager, optional
+            IOManager that gives access to tables/groups for writing
+           
+        Returns
+        -------
+        inst : tuple of lists of ExGroups, ExNodes, and ExArgs
+            A representation of a problem instance to be used by this species' 
+            family
+        """      
+        return inst_objs(*self.gen_inst_columnar(point, instid, io_manager))
 
     def post_process(self, instid, solnids, props, io_managers):
         """Perform any post processing on input and output.
@@ -486,4 +579,4 @@ class StructuredRequest(ProblemSpecies):
             iomanager from an input file, iomanager from an output file,
             and iomanager from a post-processed file
         """
-        strtools.post_process(instid, solnids, props, io_managers, self.name)
+        strtools.post_process(instid, solnids, props, io_managers, self)
@@ -14,7 +14,8 @@ from cyclopts import cyclopts_io as cycio
 from cyclopts import io_tools as io_tools
 import cyclopts.exchange_instance as exinst
 from cyclopts.problems import ProblemSpecies
-from cyclopts.exchange_family import ResourceExchange
+from cyclopts.exchange_family import ResourceExchange, encode_inst, \
+    inst_rows, inst_objs, cap_offsets
 
 from cyclopts.structured_species import data
 from cyclopts.structured_species import tools as strtools
@@ -211,23 +212,6 @@ class StructuredSupply(ProblemSpecies):
         keys = ['n_reqrs', 'n_rxtrs', 'assem_dists']
         return namedtuple('Realization', keys)(reqrs, rxtrs, dists)
 
-    @staticmethod
-    def gen_arc(aid, point, commod, rx_node_id, rxtr, reqr, instid=None, arc_tbl=None):
-        """generate an arc"""
-        commod_pref = data.sup_pref_basis[reqr.kind][commod]
-        loc_pref = strtools.loc_pref(rxtr.loc, reqr.loc, point.f_loc, point.n_reg)
-        pref = commod_pref + loc_pref * point.r_l_c
-        if arc_tbl is not None:
-            arc_tbl.append_data([(aid, commod, commod_pref, loc_pref)])
-        # unit capacity for total mass constraint first
-        rq_coeffs = [1., reqr.coeff(rxtr.enr(commod), rxtr.kind, commod)] \
-            if not reqr.kind == data.Supports.repo else [1.]
-        arc = exinst.ExArc(aid,
-                           reqr.commod_to_nodes[commod].id, rq_coeffs,
-                           rx_node_id, [1],
-                           pref)
-        return arc
-    
     def __init__(self):
         super(StructuredSupply, self).__init__()
         self.space = None
@@ -249,6 +233,8 @@ class StructuredSupply(ProblemSpecies):
         self.arcids = cyctools.Incrementer()
         self.instid = None
         self.tables = None
+        # arc table rows of the last generated instance
+        self.arc_rows = None
 
         # default realization is None
         self._rlztn = None
@@ -271,7 +257,8 @@ class StructuredSupply(ProblemSpecies):
                 cycio.Table(h5file, '/'.join([prefix, self.sum_tbl_name]), 
                             self._sum_dtype),
                 cycio.Table(h5file, '/'.join([prefix, strtools.pp_tbl_name]), 
-                            strtools.pp_tbl_dtype),]
+                            strtools.pp_tbl_dtype),] + \
+            strtools.arc_tables(h5file, prefix)
 
     def register_groups(self, h5file, prefix):
         """Parameters
@@ -286,7 +273,7 @@ class StructuredSupply(ProblemSpecies):
         groups : list of cyclopts_io.Groups
             All groups that could be written to by this species.
         """
-        return [cycio.Group(h5file, '/'.join([prefix, strtools.arc_io_name]))]
+        return strtools.arc_groups(h5file, prefix)
 
     def read_space(self, space_dict):
         """Parameters
@@ -356,6 +343,35 @@ class StructuredSupply(ProblemSpecies):
         data += strtools.support_breakdown(point)
         tables[self.sum_tbl_name].append_data([tuple(data)])
 
+    def recorded_point(self, point):
+        """Parameters
+        ----------
+        point : structured_species.Point
+            A representation of a point in parameter space
+
+        Returns
+        -------
+        point : structured_species.Point
+            The point with the values that are recorded for it
+        """
+        return point.recorded()
+
+    def read_point(self, param_uuid, h5file):
+        """Parameters
+        ----------
+        param_uuid : uuid
+            The uuid of the point in parameter space
+        h5file : PyTables File
+            the hdf5 file in which the point is recorded
+
+        Returns
+        -------
+        point : structured_species.Point
+            The recorded point
+        """
+        path = '/'.join([self.io_prefix, self.param_tbl_name])
+        return strtools.read_point(h5file, path, param_uuid, Point)
+
     def _get_reactors(self):
         # requires self._rlztn to be set
         rkinds = self._rlztn.n_rxtrs.keys()
@@ -380,48 +396,119 @@ class StructuredSupply(ProblemSpecies):
             dtype=Requester)
         return {k: gen_ary(k, v) for k, v in self._rlztn.n_reqrs.items()}
 
-    def _gen_structure(self, point, reactors, requesters):
-        # requires self._rlztn to be set
-        grps, nodes, arcs = [], [], []
-        for rx_kind, rx_ary in reactors.items():
-            for rxtr in rx_ary:
-                for commod, nassems in self._rlztn.assem_dists[rx_kind].items():
-                    for i in range(nassems):
-                        excl_id = self.excl_ids.next()
-                        gid = self.gids.next()
-                        grp = rxtr.gen_group(gid)
-                        grps.append(grp)
-                        for rq_kind in self.commod_to_reqrs[commod]:
-                            if rq_kind not in requesters:
-                                continue
-                            for reqr in requesters[rq_kind]:
-                                nid = self.nids.next()
-                                node = rxtr.gen_node(nid, gid, excl_id)
-                                arc = StructuredSupply.gen_arc(
-                                    self.arcids.next(), point, commod, 
-                                    nid, rxtr, reqr, self.instid, self.arc_tbl) 
-                                nodes.append(node)
-                                arcs.append(arc)
-        return grps, nodes, arcs
+    def _build_structure(self, point, reactors, requesters):
+        """Generates the reactor groups, nodes, and arcs of an instance in bulk,
+        with the same ids and values as generating each assembly's group and
+        its arc to each requester in turn. Arcs are generated in blocks of a
+        reactor kind and commodity, with a row per reactor, assembly, and
+        requester.
 
-    def gen_inst(self, point, instid=None, io_manager=None, reset_rlztn=True):
-        """Parameters
-        ----------
-        point :  structured_species.Point
-            A representation of a point in parameter space
-        instid : uuid, optional
-            the id for the instance
-        io_manager : cyclopts_io.IOManager, optional
-            IOManager that gives access to tables/groups for writing
-        reset_rltzn : bool, optional
-            Reset the internal realization
-           
         Returns
         -------
-        inst : tuple of lists of ExGroups, ExNodes, and ExArgs
-            A representation of a problem instance to be used by this species' 
-            family
-        """            
+        groups : numpy structured array
+            the reactor assembly groups, ordered by id
+        nodes : numpy structured array
+            the reactor assembly nodes, ordered by id
+        arcs : numpy structured array
+            the arcs, ordered by id
+        arc_rows : numpy structured array
+            the species' arc table rows of the arcs
+        """
+        names = ['assem', 'uid', 'qty', 'pref', 'commod', 'pref_c', 'pref_l', 
+                 'coeff']
+        cols = defaultdict(list)
+        assem_qtys = []
+        n_assem = 0
+        for rx_kind, rx_ary in reactors.items():
+            if len(rx_ary) == 0:
+                continue
+            dist = self._rlztn.assem_dists[rx_kind].items()
+            per_rxtr = sum(n for _, n in dist)
+            assem_qtys.append(np.repeat([r.assem_qty for r in rx_ary], 
+                                        per_rxtr))
+            # the columns of each block, with a row per reactor
+            blocks = defaultdict(list)
+            r_locs = [r.loc for r in rx_ary]
+            offset = 0
+            for commod, nassems in dist:
+                reqrs = [x for rq_kind in self.commod_to_reqrs[commod] \
+                             if rq_kind in requesters \
+                             for x in requesters[rq_kind]]
+                shape = (len(rx_ary), nassems, len(reqrs))
+                offset += nassems
+                if nassems == 0 or len(reqrs) == 0:
+                    continue
+                commod_pref = np.array(
+                    [data.sup_pref_basis[x.kind][commod] for x in reqrs])
+                loc_pref = strtools.loc_prefs(r_locs, [x.loc for x in reqrs], 
+                                              point.f_loc, point.n_reg)
+                enr = np.array([r.enr(commod) for r in rx_ary])
+                coeff = np.outer(
+                    enr / 100. * data.relative_qtys[rx_kind][commod], 
+                    [x.kind != data.Supports.repo for x in reqrs])
+                assems = n_assem + offset - nassems + \
+                    per_rxtr * np.arange(len(rx_ary))[:, np.newaxis] + \
+                    np.arange(nassems)[np.newaxis, :]
+                vals = {
+                    'assem': assems[:, :, np.newaxis],
+                    'uid': np.array([x.commod_to_nodes[commod].id \
+                                         for x in reqrs])[np.newaxis, :],
+                    'qty': np.array([r.assem_qty for r in rx_ary]\
+                                        )[:, np.newaxis, np.newaxis],
+                    'pref': (commod_pref + loc_pref * point.r_l_c\
+                                 )[:, np.newaxis, :],
+                    'commod': commod,
+                    'pref_c': commod_pref[np.newaxis, :],
+                    'pref_l': loc_pref[:, np.newaxis, :],
+                    'coeff': coeff[:, np.newaxis, :],
+                    }
+                for name in names:
+                    block = np.empty(shape, dtype=np.asarray(vals[name]).dtype)
+                    block[...] = vals[name]
+                    blocks[name].append(block.reshape(len(rx_ary), -1))
+            n_assem += per_rxtr * len(rx_ary)
+            for name in blocks:
+                cols[name].append(np.concatenate(blocks[name], axis=1).ravel())
+        cols = dict((name, np.concatenate(cols[name]) if name in cols \
+                         else np.empty(0, dtype=np.int64)) for name in names)
+
+        excl_ids = self.excl_ids.next_n(n_assem)
+        gids = self.gids.next_n(n_assem)
+        groups = inst_rows('ExGroup', n_assem)
+        groups['id'] = gids
+        groups['kind'] = False
+        groups['caps'][:, 0] = np.concatenate(assem_qtys) if assem_qtys \
+            else []
+        groups['cap_dirs'] = False
+
+        n = len(cols['uid'])
+        nids = self.nids.next_n(n)
+        arcids = self.arcids.next_n(n)
+        nodes = inst_rows('ExNode', n)
+        nodes['id'] = nids
+        nodes['gid'] = gids[cols['assem']]
+        nodes['kind'] = False
+        nodes['qty'] = cols['qty']
+        nodes['excl'] = True
+        nodes['excl_id'] = excl_ids[cols['assem']]
+
+        # unit capacity for total mass constraint first
+        arcs = inst_rows('ExArc', n)
+        arcs['id'] = arcids
+        arcs['uid'] = cols['uid']
+        arcs['ucaps'][:, 0] = 1.
+        arcs['ucaps'][:, 1] = cols['coeff']
+        arcs['vid'] = nids
+        arcs['vcaps'][:, 0] = 1.
+        arcs['pref'] = cols['pref']
+
+        arc_rows = np.empty(n, dtype=strtools.arc_tbl_dtype)
+        arc_rows['arcid'] = arcids
+        for name in ['commod', 'pref_c', 'pref_l']:
+            arc_rows[name] = cols[name]
+        return groups, nodes, arcs, arc_rows
+
+    def _setup(self, point, instid, io_manager, reset_rlztn):
         # reset id generation
         self.nids = cyctools.Incrementer()
         self.excl_ids = cyctools.Incrementer()
@@ -432,13 +519,7 @@ class StructuredSupply(ProblemSpecies):
         # set up IO
         self.tables = None if io_manager is None else io_manager.tables
         self.groups = None if io_manager is None else io_manager.groups
-        self.arc_tbl = None
-        if self.groups is not None:
-            arc_grp = self.groups[strtools.arc_io_name]
-            arc_tbl_path = '/'.join([arc_grp.path, 
-                                     'id_' + self.instid.hex])
-            self.arc_tbl = cycio.Table(arc_grp.h5file, arc_tbl_path, strtools.arc_tbl_dtype)
-            self.arc_tbl.cond_create()
+        self.arc_tbl = strtools.inst_arc_table(io_manager, self.instid)
 
         self.commod_to_reqrs = commod_to_reqrs(point.f_fc)
         
@@ -447,23 +528,69 @@ class StructuredSupply(ProblemSpecies):
             # this could have been set before calling gen_inst, e.g., for 
             # testing
             self._rlztn = StructuredSupply.pnt_to_realization(point)
+
+    def gen_inst_columnar(self, point, instid=None, io_manager=None, 
+                          reset_rlztn=True):
+        """Parameters
+        ----------
+        point :  structured_species.Point
+            A representation of a point in parameter space
+        instid : uuid, optional
+            the id for the instance
+        io_manager : cyclopts_io.IOManager, optional
+            IOManager that gives access to tables/groups for writing
+        reset_rltzn : bool, optional
+            Reset the internal realization
+           
+        Returns
+        -------
+        inst : tuple of ExGroup, ExNode, and ExArc structured arrays and a 
+            dictionary of capacities from exchange_family.cap_offsets()
+            A columnar representation of a problem instance, whose structure 
+            is generated in bulk
+        """            
+        self._setup(point, instid, io_manager, reset_rlztn)
         reactors = self._get_reactors()    
         requesters = self._get_requesters()
         
         # structure
-        rx_groups, rx_nodes, arcs = self._gen_structure(point, reactors, requesters)
+        rx_groups, rx_nodes, arcs, arc_rows = \
+            self._build_structure(point, reactors, requesters)
+        self.arc_rows = arc_rows
         if self.arc_tbl is not None:
+            self.arc_tbl.append_data(arc_rows)
             self.arc_tbl.flush()
         
         # combine groups, nodes
-        groups = np.concatenate(
-            (rx_groups, 
-             [x.group for ary in requesters.values() for x in ary]))
-        nodes = np.concatenate(
-            (rx_nodes, 
-             [n for ary in requesters.values() for x in ary for n in x.nodes]))
+        rq_groups, rq_nodes, _ = encode_inst(
+            instid, 
+            [x.group for ary in requesters.values() for x in ary],
+            [n for ary in requesters.values() for x in ary for n in x.nodes],
+            [])
+        groups = np.concatenate((rx_groups, rq_groups))
+        nodes = np.concatenate((rx_nodes, rq_nodes))
+        return groups, nodes, arcs, cap_offsets(groups, arcs)
 
-        return groups, nodes, arcs
+    def gen_inst(self, point, instid=None, io_manager=None, reset_rlztn=True):
+        """Parameters
+        ----------
+        point :  structured_species.Point
+            A representation of a point in parameter space
+        instid : uuid, optional
+            the id for the instance
+        io_manager : cyclopts_io.IOManager, optional
+            IOManager that gives access to tables/groups for writing
+        reset_rltzn : bool, optional
+            Reset the internal realization
+           
+        Returns
+        -------
+        inst : tuple of lists of ExGroups, ExNodes, and ExArgs
+            A representation of a problem instance to be used by this species' 
+            family
+        """            
+        return inst_objs(*self.gen_inst_columnar(point, instid, io_manager, 
+                                                 reset_rlztn))
 
     def post_process(self, instid, solnids, props, io_managers):
         """Perform any post processing on input and output.
@@ -480,4 +607,4 @@ class StructuredSupply(ProblemSpecies):
             iomanager from an input file, iomanager from an output file,
             and iomanager from a post-processed file
         """
-        strtools.post_process(instid, solnids, props, io_managers, self.name)
+        strtools.post_process(instid, solnids, props, io_managers, self)
@@ -4,6 +4,7 @@ from collections import namedtuple
 import random
 
 from cyclopts import cyclopts_io as cycio
+from cyclopts import io_tools
 from cyclopts.structured_species import data
 
 """default values and np.dtypes for points making up parameter space"""
@@ -29,6 +30,16 @@ class Point(object):
         """subclasses must implement their parameter mapping"""
         return NotImplemented
 
+    def recorded(self):
+        """Returns a point with this point's values as they are recorded, i.e.,
+        converted to the dtypes of their parameters."""
+        # array parameters are converted to their element type
+        val = lambda name, dt: \
+            np.array(getattr(self, name), dtype=np.dtype(dt).base).tolist()
+        params = self._parameters()
+        return self.__class__({name: val(name, params[name].dtype) \
+                                   for name in params})
+
     def __eq__(self, other):
         return (isinstance(other, self.__class__) \
                     and self.__dict__ == other.__dict__)
@@ -36,6 +47,14 @@ class Point(object):
     def __ne__(self, other):
         return not self.__eq__(other)
 
+def read_point(h5file, path, paramid, cls):
+    """Returns the point of a class that is recorded in a parameter table with
+    a given id, with the values of Point.recorded()."""
+    rows = cycio.uuid_rows(h5file.get_node(path), paramid, colname='paramid')
+    if len(rows) == 0:
+        raise KeyError('No point {0} is recorded in {1}.'.format(paramid, path))
+    return cls({name: rows[0][name].tolist() for name in cls.parameters})
+
 def mean_enr(rxtr, commod):
     """the mean enrichment for a reactor and commodity"""
     return np.mean(data.enr_ranges[rxtr][commod])
@@ -66,6 +85,24 @@ def loc_pref(r_loc, s_loc, loc_fidelity=0, n_reg=1):
 
     return loc_pref
 
+def loc_prefs(r_locs, s_locs, loc_fidelity=0, n_reg=1):
+    """returns the location-based preferences between each requester and
+    supplier, i.e., loc_pref() as an array with a row per requester and a 
+    column per supplier"""
+    r_locs = np.asarray(r_locs, dtype=np.float64)[:, np.newaxis]
+    s_locs = np.asarray(s_locs, dtype=np.float64)[np.newaxis, :]
+    prefs = np.zeros((r_locs.shape[0], s_locs.shape[1]))
+
+    if loc_fidelity > 0: # at least coarse
+        rreg = np.floor(n_reg * r_locs)
+        sreg = np.floor(n_reg * s_locs)
+        prefs = np.exp(-np.abs(rreg - sreg))
+    
+    if loc_fidelity > 1: # fine
+        prefs = (prefs + np.exp(-np.abs(r_locs - s_locs))) / 2
+
+    return prefs
+
 def reactor_breakdown(point):
     """Returns
     -------
@@ -193,6 +230,56 @@ arc_io_name = "Arcs"
 arc_tbl_dtype = np.dtype(
     [('arcid', np.uint32), ('commod', np.uint32), 
      ('pref_c', np.float32), ('pref_l', np.float32)])
+col_arc_tbl_dtype = np.dtype([('instid', ('str', 16))] + arc_tbl_dtype.descr)
+
+def arc_tables(h5file, prefix):
+    """Returns the single table of the arcs of all instances, unless the
+    database has a group with a table of arcs per instance."""
+    path = '/'.join([prefix, arc_io_name])
+    if h5file is None or cycio.is_group(h5file, path):
+        return []
+    return [cycio.Table(h5file, path, col_arc_tbl_dtype)]
+
+def arc_groups(h5file, prefix):
+    """Returns the group with a table of arcs per instance in databases with
+    that layout."""
+    path = '/'.join([prefix, arc_io_name])
+    return [cycio.Group(h5file, path)] if cycio.is_group(h5file, path) else []
+
+class _InstArcs(object):
+    """Appends the arcs of an instance to the single table of all arcs."""
+    def __init__(self, tbl, instid):
+        self.tbl = tbl
+        self.instid = instid.bytes
+
+    def append_data(self, data):
+        if isinstance(data, np.ndarray):
+            rows = np.empty(len(data), dtype=col_arc_tbl_dtype)
+            rows['instid'] = self.instid
+            for name in arc_tbl_dtype.names:
+                rows[name] = data[name]
+            self.tbl.append_data(rows)
+        else:
+            self.tbl.append_data([(self.instid,) + tuple(x) for x in data])
+
+    def flush(self):
+        pass # the table is flushed by its IOManager
+
+def inst_arc_table(io_manager, instid):
+    """Returns a table to which the arcs of an instance are appended, or None
+    if arcs are not recorded."""
+    if io_manager is None:
+        return None
+    if arc_io_name in io_manager.tables:
+        return _InstArcs(io_manager.tables[arc_io_name], instid)
+    grp = io_manager.groups.get(arc_io_name)
+    if grp is None:
+        return None
+    tbl = cycio.Table(grp.h5file, '/'.join([grp.path, 'id_' + instid.hex]), 
+                      arc_tbl_dtype)
+    tbl.cond_create()
+    return tbl
+
 """Structured Post-Processing Table Members"""
 pp_tbl_name = "PostProcess"
 pp_tbl_dtype = np.dtype(
@@ -204,22 +291,28 @@ def tbl_descs(io_prefix):
         cycio.TblDesc('/'.join([io_prefix, pp_tbl_name]), 'soln', 'solnid'),
         ]
 
-def _iid_to_prefs(iid, tbl, narcs, strategy='col'):
-    """return a numpy array of preferences"""
+def _iid_to_prefs(iid, tbl, narcs, strategy='col', sp=None):
+    """return numpy arrays of commodity and location preferences"""
+    return cycio.inst_cache.get(
+        cycio.cache_key(tbl, 'StructuredSpecies', 'prefs', iid), 
+        lambda: _read_prefs(iid, tbl, narcs, strategy, sp))
+
+def _read_prefs(iid, tbl, narcs, strategy, sp=None):
     if strategy == 'grp':
         return tbl.read(field='pref_c'), tbl.read(field='pref_l')
-    # otherwise, do column strat
+    # otherwise, do column strat, regenerating rows of virtual instances
     c_ret = np.zeros(narcs)
     l_ret = np.zeros(narcs)
-    rows = cycio.uuid_rows(tbl, iid)
-    for x in rows:
-        aid = x['arcid']
-        c_ret[aid] = x['pref_c']
-        l_ret[aid] = x['pref_l']
+    rows = sp.family.regen_inst(iid, tbl)[1] if strategy == 'regen' \
+        else cycio.uuid_rows(tbl, iid)
+    c_ret[rows['arcid']] = rows['pref_c']
+    l_ret[rows['arcid']] = rows['pref_l']
     return c_ret, l_ret
 
-def _pp_work(instid, solnids, narcs, sid_to_flows, arc_tbl, strategy='col'):
-    c_prefs, l_prefs = _iid_to_prefs(instid, arc_tbl, narcs, strategy=strategy)
+def _pp_work(instid, solnids, narcs, sid_to_flows, arc_tbl, strategy='col', 
+             sp=None):
+    c_prefs, l_prefs = _iid_to_prefs(instid, arc_tbl, narcs, strategy=strategy,
+                                     sp=sp)
     data = []
     for sid, flows in sid_to_flows.items():
         c_pref_flow = np.dot(c_prefs, flows)
@@ -227,7 +320,7 @@ def _pp_work(instid, solnids, narcs, sid_to_flows, arc_tbl, strategy='col'):
         data.append((sid.bytes, c_pref_flow, l_pref_flow))
     return data
 
-def post_process(instid, solnids, props, io_managers, sp_name):
+def post_process(instid, solnids, props, io_managers, sp):
     """Perform any post processing on input and output.
     
     Parameters
@@ -241,15 +334,20 @@ def post_process(instid, solnids, props, io_managers, sp_name):
     io_managers : tuple of cyclopts.cyclopts_io.IOManager
         iomanager from an input file, iomanager from an output file,
         and iomanager from a post-processed file
-    sp_name : str
-        the name of the species being post processed
+    sp : ProblemSpecies
+        the species being post processed, whose family regenerates the arcs
+        of virtual instances
     """
     intbls, outtbls, pptbls = (m.tables for m in io_managers)
     ingrps, outgrps, ppgrps = (m.groups for m in io_managers)
     narcs, sid_to_flows = props
     pp_tbl = pptbls[pp_tbl_name]
 
-    if arc_io_name in intbls.keys():
+    if io_tools.virtual_insts(io_managers[0].h5file):
+        # arcs are regenerated from the instance's point
+        arc_tbl = io_managers[0].h5file
+        strategy = 'regen'
+    elif arc_io_name in intbls.keys():
         arc_tbl = intbls[arc_io_name]
         strategy = 'col'
     else:
@@ -258,6 +356,6 @@ def post_process(instid, solnids, props, io_managers, sp_name):
         strategy = 'grp'
     
     data = _pp_work(instid, solnids, narcs, sid_to_flows, arc_tbl, 
-                    strategy=strategy)
+                    strategy=strategy, sp=sp)
 
     pp_tbl.append_data(data)
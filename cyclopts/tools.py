@@ -7,13 +7,16 @@ from __future__ import print_function
 
 import os
 import io
+import time
 import uuid
+import random
 import shutil
+import tempfile
 import operator
 import tables as t
 import numpy as np
 from functools import reduce
-from collections import defaultdict, Iterable, Sequence, Mapping
+from collections import defaultdict, Iterable, Sequence, Mapping, namedtuple
 import paramiko as pm
 from os import kill
 from signal import alarm, signal, SIGALRM, SIGKILL
@@ -30,6 +33,88 @@ from cyclopts.params import PARAM_CTOR_ARGS, Param, BoolParam, SupConstrParam, \
 
 FILTERS = t.Filters(complevel=4)
 
+#
+# Storage Profiles
+#
+
+StorageSettings = namedtuple('StorageSettings', 
+                             ['complib', 'complevel', 'shuffle', 'chunk_kb'])
+"""How a kind of table is stored: its compression library and level, whether
+bytes are shuffled before compression, and the size of its chunks in KB."""
+
+_default_storage = StorageSettings('zlib', 4, True, 16)
+
+# profiles map table kinds ('inst', 'soln', 'param') to their settings, with
+# 'default' settings for all other kinds
+STORAGE_PROFILES = {
+    'default': {'default': _default_storage},
+    'none': {'default': StorageSettings('zlib', 0, False, 16)},
+    # e.g., condor outputs, which are written once and soon combined 
+    'fast-write': {'default': StorageSettings('blosc:lz4', 1, True, 64)},
+    # e.g., archives
+    'compact': {'default': StorageSettings('zlib', 9, True, 64),
+                'param': StorageSettings('zlib', 9, True, 16)},
+    # e.g., databases for analysis, instances are read a few rows at a time
+    'fast-read': {'default': StorageSettings('blosc:lz4', 5, True, 32),
+                  'inst': StorageSettings('blosc:lz4', 5, True, 16)},
+    }
+
+_storage = {'profile': STORAGE_PROFILES['default']}
+
+def _settings(x, base):
+    return x if isinstance(x, StorageSettings) else base._replace(**x)
+
+def set_storage_profile(profile=None):
+    """Sets the storage profile of all tables and groups created afterwards.
+
+    Parameters
+    ----------
+    profile : str or dict, optional
+        the name of a profile in STORAGE_PROFILES, or a mapping from table kinds
+        to StorageSettings or dicts of some of their fields, which update those
+        of the default profile's settings. The default profile is used if 
+        profile is None.
+    """
+    if profile is None:
+        profile = 'default'
+    if isinstance(profile, basestring):
+        if profile not in STORAGE_PROFILES:
+            raise ValueError('Unknown storage profile {0}, expected one of '
+                             '{1}.'.format(profile, 
+                                           ', '.join(sorted(STORAGE_PROFILES))))
+        _storage['profile'] = STORAGE_PROFILES[profile]
+        return
+    default = _settings(profile.get('default', {}), _default_storage)
+    ret = dict((k, _settings(v, default)) for k, v in profile.items())
+    ret['default'] = default
+    _storage['profile'] = ret
+
+def storage_profile(args=None, rcs=None):
+    """Returns the storage profile given by the CLI or else the first run 
+    control with a storage_profile entry, or None."""
+    rcs = [] if rcs is None else rcs
+    rcs = [rcs] if not isinstance(rcs, list) else rcs
+    return attr_from_sources('storage_profile', [args] + rcs)
+
+def storage(kind=None):
+    """Returns the StorageSettings of a kind of table in the current profile."""
+    profile = _storage['profile']
+    return profile.get(kind, profile['default'])
+
+def filters(kind=None):
+    """Returns PyTables Filters for a kind of table in the current profile."""
+    s = storage(kind)
+    return t.Filters(complevel=s.complevel, complib=s.complib, 
+                     shuffle=s.shuffle)
+
+def table_kind(dt):
+    """Returns the kind of a table, 'inst', 'soln', or 'param', given by the 
+    name of the id column leading its dtype, or 'default'."""
+    kinds = {'instid': 'inst', 'solnid': 'soln', 'paramid': 'param'}
+    if dt is None or dt.names is None:
+        return 'default'
+    return kinds.get(dt.names[0], 'default')
+
 cyclopts_remote_run_dir = 'cyclopts-runs'
 
 class Incrementer(object):
@@ -47,6 +132,12 @@ class Incrementer(object):
         self._val += 1
         return self._val
 
+    def next_n(self, n):
+        """Returns an array of the next n incremented values"""
+        ret = np.arange(self._val + 1, self._val + 1 + n, dtype=np.int64)
+        self._val += n
+        return ret
+
 class NotSpecified(object):
     """A helper class singleton for run control meaning that a 'real' value
     has not been given."""
@@ -193,6 +284,13 @@ def _merge_leaf(node, dest_file):
     dest = dest_file.get_node(node._v_pathname)
     if isinstance(node, t.Table):
         dtypes = src.dtype.names    
+        if src.dtype == dest.dtype:
+            # identical layouts, e.g., shards, are appended in chunks
+            step = max(src.chunkshape[0], 1) * 64
+            for start in range(0, src.nrows, step):
+                dest.append(src.read(start, min(start + step, src.nrows)))
+            dest.flush()
+            return
         # this is a hack because appending rows throws an error
         # see http://stackoverflow.com/questions/17847587/pytables-appending-recarray
         # dest.append([row for row in src.iterrows()])
@@ -273,6 +371,7 @@ def combine(files, new_file=None, clean=False, verbose=False):
         db.close()
         if clean:
             os.remove(f)
+    cyclopts.cyclopts_io.rebuild_offsets(aggdb)
     aggdb.close()
 
 def get_process_children(pid):
@@ -466,6 +565,7 @@ def collect_instids(h5file, path, rc=None, instids=None, colname='instid'):
     ------
     instids : set of uuids
     """
+    import cyclopts.io_tools as io_tools
     instids = set(instids) if instids is not None else set()
     rc = rc if rc is not None else RunControl()
     instids |= set(uuid.UUID(x) for x in rc.inst_ids) \
@@ -486,14 +586,13 @@ def collect_instids(h5file, path, rc=None, instids=None, colname='instid'):
         cond = ' '.join(
             [' '.join(i) for i in \
                  itools.izip_longest(conds, ops, fillvalue='')]).strip()
-        vals = [x[colname] for x in h5node.where(cond)]
-        vals = [str_to_uuid(x) for x in vals]
-        instids |= set(vals)
+        vals = np.unique(h5node.read_where(cond, field=colname))
+        instids |= set(io_tools.to_uuids(h5file, vals))
         
     # if no ids, then run everything
-    if len(instids) == 0:
-        for row in h5node.iterrows():
-            instids.add(str_to_uuid(row[colname]))
+    if len(instids) == 0 and h5node.nrows > 0:
+        vals = np.unique(h5node.col(colname))
+        instids |= set(io_tools.to_uuids(h5file, vals))
     
     return instids
 
@@ -545,15 +644,100 @@ def expand_args(x):
     for y in itools.product(*x):
         yield y
 
+# the namespace of the uuids of seeded conversions
+conv_namespace = uuid.uuid5(uuid.NAMESPACE_URL, 'cyclopts:convert')
+
+def conv_uuid(seed, point, inst=None):
+    """Returns the uuid of a point, or of an instance of a point, in a
+    conversion.
+
+    Parameters
+    ----------
+    seed : int or None
+        the seed of the conversion, random uuids are returned if None
+    point : int
+        the index of the point in its species' space
+    inst : int, optional
+        the index of the instance of the point, the point's uuid is returned
+        if None
+
+    Returns
+    -------
+    uuid : uuid.UUID
+        a uuid that is determined by the seed and indices if a seed is given
+    """
+    if seed is None:
+        return uuid.uuid4()
+    name = '{0}.{1}'.format(seed, point) if inst is None else \
+        '{0}.{1}.{2}'.format(seed, point, inst)
+    return uuid.uuid5(conv_namespace, name)
+
+def seed_inst(instid):
+    """Seeds the random number generator with which an instance is generated
+    from the instance's id, so that an instance is determined by its point and
+    id regardless of the process that generates it."""
+    random.seed(instid.int)
+
+def point_seed(point):
+    """Returns the seed parameter of a point if it is set, i.e., positive, 
+    otherwise None."""
+    seed = getattr(point, 'seed', None)
+    return int(seed) if seed is not None and seed > 0 else None
+
 def conv_insts(fam, fam_io_manager, sp, sp_io_manager, 
-               ninst=1, update_freq=100, verbose=False):
+               ninst=1, update_freq=100, verbose=False, seed=None, 
+               points=None):
+    """Converts the points of a species' space into instances, recording both.
+
+    Parameters
+    ----------
+    fam : ProblemFamily
+        the species' family
+    fam_io_manager : IOManager
+        the manager of the family's tables
+    sp : ProblemSpecies
+        the species, whose space has been read
+    sp_io_manager : IOManager
+        the manager of the species' tables
+    ninst : int, optional
+        the number of instances to generate for each point
+    update_freq : int, optional
+        the number of instances between memory collections and updates
+    verbose : bool, optional
+        print progress updates
+    seed : int, optional
+        if given, the uuids of points and instances are determined by the seed,
+        see conv_uuid(), so that conversions with the same seed are identical;
+        otherwise, the uuids of a point with a seed parameter, see 
+        point_seed(), and of its instances are determined by that seed
+    points : tuple of ints, optional
+        the start and stop indices of the points to convert, all points are 
+        converted by default
+
+    Notes
+    -----
+    Each instance is generated with the random module seeded by its id, see
+    seed_inst(), so a point's seed parameter determines its instances only
+    through their ids. Instances are generated from their points as they are
+    recorded, see ProblemSpecies.recorded_point(), so that they may be
+    regenerated. Species
+    output of instances is not recorded in databases with virtual instances, 
+    see io_tools.virtual_insts().
+    """
+    from cyclopts import io_tools
+    virtual = io_tools.virtual_insts(sp_io_manager.h5file)
     n = 0
-    for point in sp.points():
-        param_uuid = uuid.uuid4()
+    start, stop = (0, None) if points is None else points
+    for i, point in enumerate(itools.islice(sp.points(), start, stop), start):
+        point = sp.recorded_point(point)
+        pseed = seed if seed is not None else point_seed(point)
+        param_uuid = conv_uuid(pseed, i)
         sp.record_point(point, param_uuid, sp_io_manager)
-        for i in range(ninst):
-            inst_uuid = uuid.uuid4()
-            inst = sp.gen_inst(point, inst_uuid, sp_io_manager)
+        for j in range(ninst):
+            inst_uuid = conv_uuid(pseed, i, j)
+            seed_inst(inst_uuid)
+            inst = sp.gen_inst_columnar(point, inst_uuid, 
+                                        None if virtual else sp_io_manager)
             fam.record_inst(inst, inst_uuid, param_uuid, sp.name, 
                             fam_io_manager)
             if n % update_freq == 0:
@@ -592,6 +776,15 @@ def drive_post_process(res_tbl,
                        sp=None, sp_io_managers=None,
                        verbose_freq=None, limit=None):
     iid_to_sids = res_tbl.value_mapping('instid', 'solnid', uuids=True)
+    if 'status' in res_tbl.dt.names:
+        # solves killed by the watchdog or that crashed have no solutions to
+        # post process
+        killed = set(str_to_uuid(x) for x in res_tbl.table().read_where(
+                '(status == "timeout") | (status == "crash")', field='solnid'))
+        iid_to_sids = dict((iid, [x for x in sids if x not in killed]) \
+                               for iid, sids in iid_to_sids.items())
+        iid_to_sids = dict((iid, sids) for iid, sids in iid_to_sids.items() \
+                               if len(sids) > 0)
     niids = len(iid_to_sids.keys())
     count = 0
     verbose = verbose_freq is not None
@@ -646,7 +839,7 @@ def col2grp(in_old, out_old, in_new, out_new):
             ntbl = None
             _copy_node(tbl._v_parent, h5f)
             h5f.create_group(tbl._v_parent._v_pathname, tbl._v_name, 
-                             filters=FILTERS)
+                             filters=filters())
             for x in tbl.iterrows():
                 y = str_to_uuid(x[0]).hex
                 if y != colid:
@@ -664,6 +857,136 @@ def col2grp(in_old, out_old, in_new, out_new):
     in_new.close()
     out_new.close()
 
+def _id_groups(h5file):
+    """Returns a mapping from the paths of groups with a table per id in a
+    Cyclopts database to the names of their id columns."""
+    paths = {'/Family/ResourceExchange/ExchangeArcs': 'instid',
+             '/Family/ResourceExchange/ExchangeInstSolutions': 'solnid',}
+    if '/Species' in h5file:
+        for name in h5file.root.Species._v_children.keys():
+            paths['/Species/{0}/Arcs'.format(name)] = 'instid'
+    return dict((k, v) for k, v in paths.items() \
+                    if k in h5file and isinstance(h5file.get_node(k), t.Group))
+
+def _grp2col(old, new):
+    from cyclopts.exchange_family import ResourceExchange
+    fam = ResourceExchange()
+    # offsets are recomputed for the new layout
+    offsets = [x for x in fam.register_tables(old, fam.io_prefix) \
+                   if isinstance(x, cyclopts.cyclopts_io.OffsetTable)]
+    skip = [x.path for x in offsets]
+    grps = _id_groups(old)
+    for node in old.walk_nodes(classname='Leaf'):
+        pth = node._v_pathname
+        if pth not in skip and node._v_parent._v_pathname not in grps:
+            _copy_node(node, new)
+
+    for path, idcol in grps.items():
+        tbl = None
+        for child in old.get_node(path)._f_iter_nodes(classname='Table'):
+            if tbl is None:
+                dt = np.dtype([(idcol, ('str', 16))] + child.dtype.descr)
+                tbl = cyclopts.cyclopts_io.Table(new, path, dt=dt)
+                tbl.create()
+            data = np.empty(child.nrows, dtype=dt)
+            data[idcol] = uuid.UUID(child._v_name[len('id_'):]).bytes
+            for name in child.dtype.names:
+                data[name] = child.col(name)
+            tbl.append_data(data)
+        if tbl is not None:
+            tbl.flush()
+    
+    for tbl in fam.register_tables(new, fam.io_prefix):
+        if isinstance(tbl, cyclopts.cyclopts_io.OffsetTable):
+            tbl.cond_create()
+    cyclopts.cyclopts_io.rebuild_offsets(new)
+    cyclopts.cyclopts_io.index_tables(new)
+
+def grp2col(in_old, out_old, in_new, out_new):    
+    """Make old input/output files using a group id-based schema, i.e., with a
+    table per instance or solution, into a schema with a single table of all
+    instances or solutions and offsets of the rows of each. Currently only
+    works for ExchangeFamily and StructuredSpecies."""
+    for old, new in [(in_old, in_new), (out_old, out_new)]:
+        old = t.open_file(old, mode='r')
+        new = t.open_file(new, mode='w', filters=filters())
+        _grp2col(old, new)
+        old.close()
+        new.close()
+
+def benchmark_storage(db, profiles=None, tmpdir=None):
+    """Benchmarks storage profiles by writing a copy of every table in a 
+    database with each profile and reading it back.
+
+    Parameters
+    ----------
+    db : str
+        the database to benchmark
+    profiles : list, optional
+        the profiles to benchmark, names or mappings as given to 
+        set_storage_profile(), defaults to all of STORAGE_PROFILES
+    tmpdir : str, optional
+        the directory in which to write copies, defaults to a new temporary
+        directory
+
+    Returns
+    -------
+    results : list of dicts
+        for each profile, its name, the size of the table data (MB), the write 
+        and read rates of that data (MB/s), and its compression ratio
+    """
+    profiles = sorted(STORAGE_PROFILES) if profiles is None else profiles
+    h5in = t.open_file(db, mode='r')
+    data = [(x._v_pathname, cyclopts.io_tools.with_uuids(h5in, x.read())) \
+                for x in h5in.walk_nodes(classname='Table')]
+    int_ids = cyclopts.io_tools.int_ids(h5in)
+    h5in.close()
+    mb = sum(x.nbytes for _, x in data) / float(1024**2)
+    
+    current = _storage['profile']
+    results = []
+    created = tmpdir is None
+    tmpdir = tempfile.mkdtemp() if created else tmpdir
+    fname, h5out = None, None
+    try:
+        for profile in profiles:
+            name = profile if isinstance(profile, basestring) else 'custom'
+            set_storage_profile(profile)
+            fname = os.path.join(tmpdir, 'benchmark_{0}.h5'.format(name))
+            start = time.time()
+            h5out = t.open_file(fname, mode='w', filters=filters())
+            cyclopts.io_tools.set_int_ids(h5out, int_ids)
+            for path, rows in data:
+                if path == cyclopts.io_tools.ids_path:
+                    continue # rewritten by tables with integer ids
+                tbl = cyclopts.cyclopts_io.Table(h5out, path, rows.dtype)
+                tbl.create()
+                tbl.append_data(rows)
+                tbl.flush()
+            h5out.close()
+            write = max(time.time() - start, 1e-9)
+            nbytes = os.path.getsize(fname)
+            start = time.time()
+            h5out = t.open_file(fname, mode='r')
+            for path, _ in data:
+                if path in h5out:
+                    h5out.get_node(path).read()
+            h5out.close()
+            read = max(time.time() - start, 1e-9)
+            os.remove(fname)
+            results.append({'profile': name, 'mb': mb, 'write': mb / write, 
+                            'read': mb / read, 
+                            'ratio': mb * 1024**2 / max(nbytes, 1)})
+    finally:
+        _storage['profile'] = current
+        if h5out is not None and h5out.isopen:
+            h5out.close()
+        if fname is not None and os.path.exists(fname):
+            os.remove(fname)
+        if created:
+            shutil.rmtree(tmpdir, ignore_errors=True)
+    return results
+
 def masked_filter(c, mask, unmask=False):
     """Return a subset of a collection with a mask applied"""
     if not unmask:
@@ -154,6 +154,39 @@ def test_id_tree_from_file():
             solvers = set([solver for _, solver in sis.subtrees(ist)])
             assert_equal(solvers, set(['cbc', 'greedy']))
 
+def test_plot_xy_int_ids():
+    import os
+    import uuid
+    import tempfile
+    import tables as t
+    import matplotlib.pyplot as plt
+    from cyclopts import cyclopts_io as cycio
+    from cyclopts import io_tools
+
+    fd, fname = tempfile.mkstemp(suffix='.h5')
+    os.close(fd)
+    iids = [uuid.uuid4() for i in range(2)]
+    try:
+        with t.open_file(fname, mode='w') as h5file:
+            io_tools.set_int_ids(h5file)
+            dt = np.dtype([('instid', ('str', 16)), ('x', float)])
+            tbl = cycio.Table(h5file, '/props', dt)
+            tbl.create()
+            tbl.append_data([(iids[0].bytes, 1.0), (iids[1].bytes, 2.0)])
+            tbl.flush()
+            props = h5file.root.props
+            assert_true(io_tools.is_key(props.dtype, 'instid'))
+            # result rows store uuids, which are joined with integer ids
+            plt.figure()
+            ax = sis.plot_xy(props, 'x', 
+                             {'cbc': [(iids[0].bytes, 5.0), 
+                                      (iids[1].bytes, 7.0)]})
+            assert_array_equal(ax.collections[0].get_offsets(), 
+                               [[1.0, 5.0], [2.0, 7.0]])
+            plt.close()
+    finally:
+        os.remove(fname)
+
 def test_nnodes():
     data = [{'paramid': 'a', 'instid': 'b', 'solnid': 'd', 'solver': 'x'},
             {'paramid': 'a', 'instid': 'b', 'solnid': 'e', 'solver': 'y'},
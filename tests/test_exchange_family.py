@@ -1,17 +1,21 @@
 from cyclopts.exchange_family import ResourceExchange, PathMap
 from cyclopts import exchange_family
+from cyclopts import exec_tools
 
 import numpy as np
 from numpy.testing import assert_array_equal
 import nose
-from nose.tools import assert_equal
+from nose.tools import assert_equal, assert_true
 import uuid
 import tables as t
 import os
+import pickle
 
 import cyclopts.cyclopts_io as cycio
+import cyclopts.io_tools as io_tools
 from cyclopts.problems import Solver
 from cyclopts.exchange_instance import ExGroup, ExNode, ExArc
+from cyclopts.exchange_bridge import ExFlowSolution
 from cyclopts.tools import Incrementer
 
 from utils import assert_cyc_equal
@@ -81,12 +85,12 @@ Finally, preferences for arcs are ranked in the following order: 3, 2, 1, 4,
 tested, because arcs 3 and 2 correspond to nodes 6 and 7, and are of highest
 rank.
 """   
-def test_run():
+def _test_inst(start=0):
     req = True
     bid = False
     excl = True
     
-    gid = Incrementer()
+    gid = Incrementer(start)
     rg1 = ExGroup(gid.next(), req, np.array([1], dtype='float'), [req], 1)
     rg2 = ExGroup(gid.next(), req, np.array([1.5], dtype='float'), [req], 1.5)
     rg3 = ExGroup(gid.next(), req, np.array([1, 0.4], dtype='float'), [req] * 2, 1)
@@ -95,7 +99,7 @@ def test_run():
     bg3 = ExGroup(gid.next(), bid, np.array([1], dtype='float'), [bid])
     grps = [rg1, rg2, rg3, bg1, bg2, bg3]
 
-    nid = Incrementer()
+    nid = Incrementer(start)
     ex_grp_id = Incrementer(1)
     r11 = ExNode(nid.next(), rg1.id, req, 1, excl, ex_grp_id.next())
     r21 = ExNode(nid.next(), rg2.id, req, 1.5)
@@ -109,7 +113,7 @@ def test_run():
 
     # p3 > p2 > p1 > p4 > p5
     prefs = [1.0 / 2**i for i in range(5)]
-    aid = Incrementer()
+    aid = Incrementer(start)
     a1 = ExArc(aid.next(), 
                r11.id, np.array([1], dtype='float'), 
                b11.id, np.array([1], dtype='float'),
@@ -131,6 +135,10 @@ def test_run():
                b31.id, np.array([1], dtype='float'),
                prefs[4])
     arcs = [a1, a2, a3, a4, a5]
+    return grps, nodes, arcs
+
+def test_run():
+    grps, nodes, arcs = _test_inst()
         
     stypes = ["cbc", "clp-e", "greedy"]
     exp_flows = {0: 1, 1: 0, 2: 1, 3: 0.5, 4: 0.5}
@@ -140,6 +148,150 @@ def test_run():
         soln = ResourceExchange().run_inst((grps, nodes, arcs), solver)
         for id, flow in soln.flows.iteritems():
             assert_equal(exp_flows[id], flow)
+        assert_array_equal(soln.arc_ids, sorted(exp_flows.keys()))
+        assert_array_equal(soln.arc_flows, 
+                           [exp_flows[id] for id in sorted(exp_flows.keys())])
+
+def test_run_cbc_opts():
+    inst = _test_inst()
+    exp_flows = {0: 1, 1: 0, 2: 1, 3: 0.5, 4: 0.5}
+    solver = Solver('cbc')
+    solver.threads = 2
+    solver.gap = 0
+    solver.presolve = False
+    soln = ResourceExchange().run_inst(inst, solver)
+    assert_equal(ResourceExchange().run_inst(inst, Solver('cbc')).objective, 
+                 soln.objective)
+    for id, flow in soln.flows.iteritems():
+        assert_equal(exp_flows[id], flow)
+
+def test_run_sparse_ids():
+    # ids that do not start at 0 are translated through the sparse fallback
+    start = 1000
+    inst = _test_inst(start)
+    exp_flows = {0: 1, 1: 0, 2: 1, 3: 0.5, 4: 0.5}
+    for t in ["cbc", "greedy"]:
+        soln = ResourceExchange().run_inst(inst, Solver(t))
+        assert_array_equal(soln.arc_ids, [start + i for i in range(5)])
+        for id, flow in soln.flows.iteritems():
+            assert_equal(exp_flows[id - start], flow)
+
+def test_flow_solution():
+    soln = ExFlowSolution(1.5, 3, 'exchange', 'v1')
+    assert_equal(0, len(soln.arc_ids))
+    assert_equal(0, len(soln.flows))
+    soln.arc_ids = [1, 4]
+    soln.arc_flows = [0.5, 2]
+    assert_array_equal(soln.arc_ids, [1, 4])
+    assert_array_equal(soln.arc_flows, [0.5, 2])
+    # flows are populated from the arrays on access
+    assert_equal({1: 0.5, 4: 2}, dict(soln.flows.items()))
+    soln.arc_ids = [2, 3]
+    assert_equal({2: 0.5, 3: 2}, dict(soln.flows.items()))
+    # views keep their solution alive
+    ids = soln.arc_ids
+    del soln
+    assert_array_equal(ids, [2, 3])
+
+def test_run_many():
+    inst = _test_inst()
+    fam = ResourceExchange()
+    
+    # greedy consumes the graph's capacities, so solves after it must match
+    # those of a fresh translation
+    stypes = ["cbc", "clp-e", "greedy", "cbc", "greedy", "greedy", "clp-e"]
+    exp_flows = {0: 1, 1: 0, 2: 1, 3: 0.5, 4: 0.5}
+    solns = fam.run_inst_many(inst, [Solver(t) for t in stypes])
+    assert_equal(len(stypes), len(solns))
+    for t, soln in zip(stypes, solns):
+        print("\nTesting with solver: {0}\n".format(t))
+        exp = fam.run_inst(inst, Solver(t))
+        assert_equal(exp.objective, soln.objective)
+        # marshalling is shared by all solves and translation by all solves 
+        # up to the first greedy solve
+        assert_equal(solns[0].marshal_time, soln.marshal_time)
+        assert_true(soln.solve_wall_time >= 0)
+        for id, flow in soln.flows.iteritems():
+            assert_equal(exp_flows[id], flow)
+    for soln in solns[1:3]:
+        assert_equal(solns[0].xlate_time, soln.xlate_time)
+
+def test_watched_run():
+    inst = _test_inst()
+    fam = ResourceExchange()
+    solvers = [Solver("cbc"), Solver("greedy")]
+
+    # solution state must survive the pipe from the watched process
+    exp = fam.run_inst(inst, solvers[0])
+    state = pickle.loads(pickle.dumps(exec_tools._soln_state(exp), 
+                                      pickle.HIGHEST_PROTOCOL))
+    obs = exec_tools._from_soln_state(*state)
+    assert_equal(exp.objective, obs.objective)
+    assert_equal(dict(exp.flows.items()), dict(obs.flows.items()))
+    assert_array_equal(exp.arc_ids, obs.arc_ids)
+
+    solns = exec_tools.watched_run(fam, inst, solvers, 60)
+    for solver, soln in zip(solvers, solns):
+        assert_equal(exec_tools.soln_status(soln, solver), 'ok')
+        exp = fam.run_inst(inst, solver)
+        assert_true(isinstance(soln, ExFlowSolution))
+        assert_equal(exp.objective, soln.objective)
+        assert_equal(dict(exp.flows.items()), dict(soln.flows.items()))
+        assert_array_equal(exp.arc_flows, soln.arc_flows)
+
+def test_run_columnar():
+    inst = grps, nodes, arcs = _test_inst()
+    instid = uuid.uuid4()
+    dts = exchange_family._dtypes
+    cols = (np.array([exchange_family.grp_tpl(instid, x) for x in grps],
+                     dtype=dts['ExGroup']),
+            np.array([exchange_family.node_tpl(instid, x) for x in nodes],
+                     dtype=dts['ExNode']),
+            np.array([exchange_family.arc_tpl(x) for x in arcs],
+                     dtype=dts['ExArc']))
+    caps = exchange_family.cap_offsets(cols[0], cols[2])
+    assert_array_equal(caps['cap_offsets'], [0, 1, 2, 4, 5, 7, 8])
+    assert_array_equal(caps['ucap_offsets'], [0, 1, 2, 3, 4, 6])
+    assert_array_equal(caps['vcap_offsets'], [0, 1, 3, 5, 6, 7])
+
+    fam = ResourceExchange()
+    stypes = ["greedy", "cbc", "greedy", "clp-e"]
+    exp_flows = {0: 1, 1: 0, 2: 1, 3: 0.5, 4: 0.5}
+    solns = fam.run_inst_many(cols, [Solver(t) for t in stypes])
+    for t, soln in zip(stypes, solns):
+        assert_equal(fam.run_inst(inst, Solver(t)).objective, soln.objective)
+    solns.append(fam.run_inst(cols + (caps,), Solver('cbc')))
+    for soln in solns:
+        assert_equal(len(exp_flows), len(soln.flows))
+        for id, flow in soln.flows.iteritems():
+            assert_equal(exp_flows[id], flow)
+
+def test_encode_inst():
+    grps, nodes, arcs = _test_inst()
+    instid = uuid.uuid4()
+    dts = exchange_family._dtypes
+    exp = (np.array([exchange_family.grp_tpl(instid, x) for x in grps],
+                    dtype=dts['ExGroup']),
+           np.array([exchange_family.node_tpl(instid, x) for x in nodes],
+                    dtype=dts['ExNode']),
+           np.array([exchange_family.arc_tpl(x) for x in arcs],
+                    dtype=dts['ExArc']))
+    obs = exchange_family.encode_inst(instid, grps, nodes, arcs)
+    for x, y in zip(exp, obs):
+        assert_array_equal(x, y)
+    
+    dt = exchange_family._col_dtypes['ExArc']
+    obs = exchange_family.encode_inst(instid, grps, nodes, arcs, arc_dt=dt)[2]
+    assert_equal(obs.dtype, dt)
+    assert_array_equal(obs['ucaps'], exp[2]['ucaps'])
+    assert_true((obs['instid'] == instid.bytes).all())
+    
+    paramid = uuid.uuid4()
+    exp = exchange_family.prop_tpl(instid, paramid, 'sp', grps, nodes, arcs)
+    cols = exchange_family.encode_inst(instid, grps, nodes, arcs)
+    obs = exchange_family.encoded_prop_tpl(instid, paramid, 'sp', cols[0], 
+                                           cols[1], cols[2], exp[8])
+    assert_equal(exp, obs)
 
 class TestExchangeIO:
     def cleanup(self):
@@ -159,6 +311,16 @@ class TestExchangeIO:
             self.cleanup()
 
     def test_inst_roundtrip(self):
+        self._inst_roundtrip()
+        assert_true(isinstance(self.h5file.root.ExchangeArcs, t.Table))
+        
+    def test_inst_roundtrip_grouped(self):
+        # databases with a table of arcs per instance are still read
+        self.h5file.create_group('/', 'ExchangeArcs')
+        self._inst_roundtrip()
+        assert_true(isinstance(self.h5file.root.ExchangeArcs, t.Group))
+        
+    def _inst_roundtrip(self):
         print('test file {0}'.format(self.fname))
         exp_groups = [ExGroup(1, True, np.array([1], dtype='float'), [True], 3), 
                       ExGroup(6, False, np.array([2, 3.5], dtype='float'), [False] * 2)]
@@ -193,5 +355,42 @@ class TestExchangeIO:
         for i in range(len(exp_arcs)):
             assert_cyc_equal(exp_arcs[i], obs_arcs[i])        
 
+        groups, nodes, arcs, caps = fam.read_inst_columnar(instid, manager)
+        assert_array_equal(groups['qty'], [x.qty for x in exp_groups])
+        assert_array_equal(nodes['excl_id'], [x.excl_id for x in exp_nodes])
+        assert_array_equal(arcs['pref'], [x.pref for x in exp_arcs])
+        assert_array_equal(caps['cap_offsets'], [0, 1, 3])
+        assert_array_equal(caps['vcaps'], [.295e-9, 0.1, 77, 47])
+
+        del manager        
+        self.passed = True
+
+    def test_sparse_flows(self):
+        io_tools.set_sparse_flows(self.h5file)
+        fam = exchange_family.ResourceExchange()
+        manager = cycio.IOManager(self.h5file, 
+                                  fam.register_tables(self.h5file, ''), 
+                                  fam.register_groups(self.h5file, ''))
+        inst = _test_inst()
+        paramid, instid, solnid = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+        fam.record_inst(inst, instid, paramid, 'species', manager)
+        soln = ExFlowSolution(1.5, 3, 'exchange', 'v1')
+        soln.arc_ids = np.arange(5, dtype='int32')
+        soln.arc_flows = np.array([0, 2.5, 0, 0, 1], dtype='float64')
+        fam.record_soln(soln, solnid, inst, instid, manager)
+        manager.flush_tables()
+
+        tbl = self.h5file.root.ExchangeInstSolutions
+        assert_array_equal(tbl.col('arc_id'), [1, 4])
+        obs = exchange_family._sid_to_flows(
+            solnid, manager.tables['ExchangeInstSolutions'], 5, 
+            offsets=manager.tables['ExchangeSolnOffsets'])
+        assert_array_equal(obs, soln.arc_flows)
+
+        obs = exchange_family.flow_footprint(self.h5file, prefix='')
+        assert_equal(1, obs['nsolns'])
+        assert_equal(2, obs['nonzero'])
+        assert_equal(5, obs['dense_rows'])
+        assert_equal(2, obs['sparse_rows'])
         del manager        
         self.passed = True
@@ -0,0 +1,125 @@
+from cyclopts import exec_tools
+from cyclopts.problems import ProblemFamily, ProbSolution, Solver, \
+    canonical_spec
+from cyclopts.exchange_bridge import ExFlowSolution
+from cyclopts.exchange_family import ResourceExchange
+import cyclopts.cyclopts_io as cycio
+
+import os
+import time
+import uuid
+import tempfile
+import shutil
+import tables as t
+import numpy as np
+from numpy.testing import assert_array_equal
+import nose
+from nose.tools import assert_equal, assert_true, assert_raises
+
+class SleepyFamily(ProblemFamily):
+    """A family whose 'slow' solver never finishes in time."""
+    @property
+    def name(cls):
+        return 'SleepyFamily'
+
+    def run_inst(self, inst, solver):
+        if solver.type == 'slow':
+            time.sleep(60)
+        if solver.type == 'crash':
+            os._exit(1)
+        if solver.type == 'greedy':
+            time.sleep(0.5)
+            return ProbSolution(0.5, 42, 'sleepy')
+        return ProbSolution(0.01, 42, 'sleepy')
+
+def test_watched_run():
+    fam = SleepyFamily()
+    solvers = [Solver('fast', 0.1), Solver('slow', 0.1), Solver('crash', 0.1), 
+               Solver('fast', 0.1)]
+    start = time.time()
+    solns = exec_tools.watched_run(fam, None, solvers, 0.1, grace=0.5)
+    assert_true(time.time() - start < 30)
+    assert_equal(len(solvers), len(solns))
+    assert_equal(solns[1], None)
+    assert_true(solns[2] is exec_tools.crashed)
+    for soln in [solns[0], solns[3]]:
+        assert_equal(soln.objective, 42)
+        assert_equal(soln.type, 'sleepy')
+    obs = [exec_tools.soln_status(x, y) for x, y in zip(solns, solvers)]
+    assert_equal(obs, ['ok', 'timeout', 'crash', 'ok'])
+    assert_equal(exec_tools.soln_status(ProbSolution(1.5), Solver('cbc', 1)),
+                 'limit')
+    assert_equal(exec_tools.soln_status(ProbSolution(1.5), Solver('cbc')), 'ok')
+    # only cbc stops at its time limit, others finish slow solves
+    for kind in ['greedy', 'clp', 'clp-e']:
+        assert_equal(
+            exec_tools.soln_status(ProbSolution(1.5), Solver(kind, 1)), 'ok')
+    solver = Solver('greedy', 0.1)
+    solns = exec_tools.watched_run(fam, None, [solver], 0.1, grace=5)
+    assert_equal(solns[0].time, 0.5)
+    assert_equal(exec_tools.soln_status(solns[0], solver), 'ok')
+
+def test_soln_state():
+    exp = ExFlowSolution(1.5, 3, 'exchange', 'v1')
+    exp.arc_ids = np.array([1, 4], dtype='int32')
+    exp.arc_flows = np.array([0.5, 2], dtype='float64')
+    exp.xlate_time = 0.25
+    obs = exec_tools._from_soln_state(*exec_tools._soln_state(exp))
+    assert_true(isinstance(obs, ExFlowSolution))
+    for attr in ['time', 'objective', 'type', 'cyclus_version', 'xlate_time']:
+        assert_equal(getattr(exp, attr), getattr(obs, attr))
+    assert_array_equal(exp.arc_ids, obs.arc_ids)
+    assert_array_equal(exp.arc_flows, obs.arc_flows)
+    assert_equal(dict(exp.flows.items()), dict(obs.flows.items()))
+
+def test_canonical_spec():
+    assert_equal(canonical_spec(' cbc '), 'cbc')
+    assert_equal(canonical_spec('cbc:'), 'cbc')
+    assert_equal(canonical_spec('cbc: threads = 4, gap=0.01,'), 
+                 'cbc:gap=0.01,threads=4')
+    assert_equal(canonical_spec('cbc:gap=0.01,threads=4'), 
+                 canonical_spec('cbc:threads=4,gap=0.01'))
+    assert_raises(ValueError, canonical_spec, 'cbc:thread=4')
+    # only cbc reads options other than its time limit
+    assert_equal(canonical_spec('greedy: time_limit=5'), 'greedy:time_limit=5')
+    assert_raises(ValueError, canonical_spec, 'greedy:threads=4')
+    assert_raises(ValueError, canonical_spec, 'clp:gap=0.01')
+    assert_raises(ValueError, canonical_spec, 'clp-e:presolve=off')
+
+def test_make_solvers():
+    solvers = exec_tools.make_solvers(
+        ['greedy', 'cbc:threads=4,gap=0.01', 'cbc:node_limit=10,presolve=off', 
+         'cbc:time_limit=5'], time_limit=60)
+    assert_equal([x.type for x in solvers], ['greedy', 'cbc', 'cbc', 'cbc'])
+    assert_equal([x.time_limit for x in solvers], [60, 60, 60, 5])
+    assert_equal(solvers[1].threads, 4)
+    assert_equal(solvers[1].gap, 0.01)
+    assert_equal(solvers[2].node_limit, 10)
+    assert_equal(solvers[2].presolve, False)
+    assert_equal(solvers[0].presolve, True)
+    assert_raises(ValueError, exec_tools.make_solvers, ['cbc:thread=4'])
+    assert_raises(ValueError, exec_tools.make_solvers, ['cbc:presolve=maybe'])
+
+def test_resume_ledger():
+    tmpdir = tempfile.mkdtemp()
+    fname = os.path.join(tmpdir, 'out.h5')
+    try:
+        h5out = t.open_file(fname, mode='w')
+        results = cycio.ResultTable(h5out, path='/Results')
+        results.cond_create()
+        instid = uuid.uuid4()
+        specs = ['cbc', 'cbc: threads=4, gap=0.01', 'cbc:threads=2']
+        for spec in specs:
+            results.record_soln(None, uuid.uuid4(), instid, spec, 
+                                status='timeout')
+        results.flush()
+        # the ledger is seeded from the results' full specifications
+        done = exec_tools.resume(ResourceExchange(), h5out)
+        exp = set((instid, canonical_spec(x)) for x in specs)
+        assert_equal(done, exp)
+        assert_equal(len(done), len(specs))
+        ledger = cycio.LedgerTable(h5out, path='/Ledger')
+        assert_equal(set((x, y) for x, y, _ in ledger.entries()), exp)
+        h5out.close()
+    finally:
+        shutil.rmtree(tmpdir)
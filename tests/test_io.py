@@ -8,6 +8,8 @@ from nose.tools import assert_true, assert_equal, assert_raises
 from numpy.testing import assert_array_equal
 
 from cyclopts import cyclopts_io as cycio
+from cyclopts import io_tools
+from cyclopts import tools
 
 class TestIO:
     def setUp(self):
@@ -103,6 +105,22 @@ class TestIO:
         rows = self.h5file.root.tbl[:]
         assert_array_equal(exp, rows)
 
+    def test_write_direct(self):
+        cyctbl = cycio.Table(self.h5file, self.pth, self.dt, chunksize=3, cachesize=3)
+        cyctbl.create()
+        h5tbl = self.h5file.root.tbl
+
+        data = np.empty(9, dtype=self.dt)
+        data['data'] = range(9)
+        cyctbl.append_data(data[:2])
+        cyctbl.append_data(data[2:])
+        # cached rows and 6 new rows are written in one append each
+        assert_equal(8, h5tbl.nrows)
+        assert_equal(2, cyctbl.n_writes)
+        assert_equal(9, cyctbl.n_rows())
+        cyctbl.flush()
+        assert_array_equal(data, self.h5file.root.tbl[:])
+
     def test_manager(self):
         tbls = [cycio.Table(self.h5file, self.pth, self.dt, chunksize=3, cachesize=3)]
         manager = cycio.IOManager(self.h5file, tbls)
@@ -114,3 +132,167 @@ class TestIO:
         del manager
         rows = self.h5file.root.tbl[:]
         assert_array_equal(data, rows)
+
+    def test_manager_async(self):
+        tbls = [cycio.Table(self.h5file, self.pth, self.dt, chunksize=3, cachesize=3)]
+        manager = cycio.IOManager(self.h5file, tbls, async_writes=True)
+        tbl = manager.tables['tbl']
+        data = np.empty(10, dtype=self.dt)
+        data['data'] = range(10)
+        for i in range(10):
+            tbl.append_data(data[i:i + 1])
+        assert_equal(10, tbl.n_rows())
+        manager.flush_tables()
+        assert_equal(4, tbl.n_writes)
+        assert_array_equal(data, self.h5file.root.tbl[:])
+        # the writer's thread is stopped by a flush and restarted on demand
+        assert_true(io_tools.file_lock(self.h5file) is manager.writer.lock)
+        assert_equal(manager.writer._thread, None)
+        tbl.append_data(data[:3])
+        assert_true(manager.writer._thread.is_alive())
+        manager.flush_tables()
+        assert_equal(manager.writer._thread, None)
+        assert_array_equal(data[:3], self.h5file.root.tbl[10:])
+
+    def test_offsets(self):
+        dt = np.dtype([('instid', ('str', 16)), ('data', float)])
+        iids = [uuid.uuid4() for i in range(3)]
+        cyctbl = cycio.Table(self.h5file, self.pth, dt, chunksize=2, cachesize=2)
+        cyctbl.create()
+        offsets = cycio.OffsetTable(self.h5file, '/offsets', ['tbl'])
+        offsets.create()
+        for i, iid in enumerate(iids):
+            start = cyctbl.n_rows()
+            cyctbl.append_data([(iid.bytes, float(j)) for j in range(i + 1)])
+            offsets.record(iid, {'tbl': (start, cyctbl.n_rows())})
+        cyctbl.flush()
+        offsets.flush()
+        
+        offsets = cycio.OffsetTable(self.h5file, '/offsets', ['tbl'])
+        assert_equal(offsets.lookup(iids[1], 'tbl'), (1, 3))
+        assert_equal(offsets.lookup(uuid.uuid4(), 'tbl'), None)
+        for i, iid in enumerate(iids):
+            rows = cycio.slice_rows(cyctbl, iid, *offsets.lookup(iid, 'tbl'))
+            assert_array_equal(rows['data'], range(i + 1))
+        # stale offsets are rejected
+        assert_equal(cycio.slice_rows(cyctbl, iids[1], 1, 2), None)
+        assert_equal(cycio.slice_rows(cyctbl, iids[1], 0, 3), None)
+
+        # tables at the root are not looked up by id by default
+        assert_equal(cycio.index_tables(self.h5file), 0)
+        assert_equal(cycio.index_tables(self.h5file, where=['/']), 2)
+        assert_true(self.h5file.root.tbl.cols.instid.is_indexed)
+        assert_equal(cycio.index_tables(self.h5file, where=['/']), 0)
+        rows = cycio.uuid_rows(cyctbl, iids[2])
+        assert_array_equal(rows['data'], range(3))
+
+    def test_int_ids(self):
+        io_tools.set_int_ids(self.h5file)
+        dt = np.dtype([('paramid', ('str', 16)), ('instid', ('str', 16)), 
+                       ('data', float)])
+        pids = [uuid.uuid4() for i in range(2)]
+        iids = [uuid.uuid4() for i in range(3)]
+        cyctbl = cycio.Table(self.h5file, self.pth, dt, chunksize=2, cachesize=2)
+        cyctbl.create()
+        offsets = cycio.OffsetTable(self.h5file, '/offsets', ['tbl'])
+        offsets.create()
+        for i, iid in enumerate(iids):
+            start = cyctbl.n_rows()
+            cyctbl.append_data([(pids[i % 2].bytes, iid.bytes, float(j)) \
+                                    for j in range(i + 1)])
+            offsets.record(iid, {'tbl': (start, cyctbl.n_rows())})
+        cyctbl.flush()
+        offsets.flush()
+
+        h5tbl = self.h5file.root.tbl
+        assert_equal(np.int64, h5tbl.coldtypes['instid'].type)
+        assert_equal(set(io_tools.id_keys(iids)), set(h5tbl.col('instid')))
+        assert_equal(5, self.h5file.root.Ids.nrows)
+        
+        offsets = cycio.OffsetTable(self.h5file, '/offsets', ['tbl'])
+        for i, iid in enumerate(iids):
+            rows = cycio.slice_rows(cyctbl, iid, *offsets.lookup(iid, 'tbl'))
+            assert_array_equal(rows['data'], range(i + 1))
+            rows = cycio.uuid_rows(cyctbl, iid)
+            assert_array_equal(rows['data'], range(i + 1))
+        
+        rows = io_tools.with_uuids(self.h5file, h5tbl.read())
+        assert_equal(iids[2], tools.str_to_uuid(rows['instid'][-1]))
+        obs = io_tools.param_mapping(self.h5file, self.pth, 'paramid', 'instid')
+        obs = dict((tools.str_to_uuid(k), set(io_tools.to_uuids(self.h5file, 
+                                                                 list(v)))) \
+                       for k, v in obs.items())
+        assert_equal(set([iids[0], iids[2]]), obs[pids[0]])
+        obs = io_tools.value_mapping(h5tbl, 'instid', 'paramid')
+        assert_equal([pids[1]] * 2, obs[iids[1]])
+        assert_equal(4, cycio.keep_rows(cyctbl, 'instid', [iids[1].bytes]))
+
+    def test_rebuild_offsets(self):
+        ids, rngs = cycio.id_ranges(np.array(['a', 'a', 'b', 'c', 'c', 'c']))
+        assert_array_equal(ids, ['a', 'b', 'c'])
+        assert_array_equal(rngs, [[0, 2], [2, 3], [3, 6]])
+
+        dt = np.dtype([('solnid', ('str', 16)), ('data', float)])
+        sids = [uuid.uuid4() for i in range(3)]
+        cyctbl = cycio.Table(self.h5file, self.pth, dt)
+        cyctbl.create()
+        for i, sid in enumerate(sids):
+            cyctbl.append_data([(sid.bytes, float(j)) for j in range(i + 1)])
+        cyctbl.flush()
+        offsets = cycio.OffsetTable(self.h5file, '/offsets', ['tbl'], 
+                                    idcol='solnid', paths=[self.pth])
+        offsets.create()
+        assert_equal(cycio.rebuild_offsets(self.h5file), 1)
+        assert_equal(offsets.lookup(sids[2], 'tbl'), (3, 6))
+
+        cycio.keep_rows(cyctbl, 'solnid', [sids[0].bytes, sids[2].bytes])
+        offsets.rebuild()
+        assert_equal(offsets.lookup(sids[1], 'tbl'), None)
+        rows = cycio.offset_rows(cyctbl, sids[2], offsets, 'tbl', 
+                                 colname='solnid')
+        assert_array_equal(rows['data'], range(3))
+        assert_true(cycio.is_group(self.h5file, '/'))
+        assert_true(not cycio.is_group(self.h5file, self.pth))
+
+    def test_cache_key(self):
+        cyctbl = cycio.Table(self.h5file, self.pth, self.dt)
+        cyctbl.create()
+        key = cycio.cache_key(self.h5file, 'a', 1)
+        assert_equal(key, (os.path.abspath(self.db), 'a', 1))
+        assert_equal(cycio.cache_key(cyctbl, 'a', 1), key)
+        assert_equal(cycio.cache_key(self.h5file.root.tbl, 'a', 1), key)
+        # the same ids in another file have another key
+        db = ".tmp_{0}".format(uuid.uuid4())
+        with t.open_file(db, mode='w') as h5file:
+            assert_true(cycio.cache_key(h5file, 'a', 1) != key)
+        os.remove(db)
+
+def test_lru_cache():
+    cache = cycio.LRUCache(maxbytes=200)
+    loads = []
+    def load(key):
+        loads.append(key)
+        return np.zeros(10) # 80 bytes
+    for key in ['a', 'b', 'a', 'c', 'b']:
+        cache.get(key, lambda: load(key))
+    # 'b' is evicted by 'c' as 'a' was used more recently
+    assert_equal(loads, ['a', 'b', 'c', 'b'])
+    assert_equal(cache.hits, 1)
+    assert_equal(cache.misses, 4)
+    assert_equal(cache.evictions, 2)
+    assert_equal(cache.nbytes, 160)
+    cache.resize(100)
+    assert_equal(cache.stats()['entries'], 1)
+    cache.get('b', lambda: load('b'))
+    assert_equal(cache.hits, 2)
+    cache.resize(0)
+    cache.get('b', lambda: load('b'))
+    assert_equal(cache.stats()['entries'], 0)
+
+def test_lru_cache_read_only():
+    cache = cycio.LRUCache(maxbytes=200)
+    for size in [200, 0]:
+        cache.resize(size)
+        value = cache.get(size, lambda: (np.zeros(2), {'x': np.zeros(2)}))
+        assert_raises(ValueError, value[0].__setitem__, 0, 1.0)
+        assert_raises(ValueError, value[1]['x'].__setitem__, 0, 1.0)
@@ -3,6 +3,8 @@ from cyclopts import tools
 from cyclopts import condor
 
 from cyclopts.structured_species.request import StructuredRequest
+from cyclopts.exchange_family import ResourceExchange, inst_read_times
+from cyclopts import cyclopts_io as cycio
 
 import os
 import shutil
@@ -43,8 +45,16 @@ def test_exec():
     objs = defaultdict(dict)
     for row in h5node.iterrows():
         objs[row['instid']][row['solver']] = row['objective']
+    solnids = set(h5node.cols.solnid[:])
+    timings = h5file.get_node('/Timings')[:]
     h5file.close()
     
+    # each solution has its phase timings recorded
+    assert_equal(solnids, set(timings['solnid']))
+    for col in ['read', 'marshal', 'translate', 'solve_cpu', 'solve_wall', 
+                'extract', 'record']:
+        assert_true((timings[col] >= 0).all())
+
     # check that all solvers get the same answer
     for iid, solvers in objs.items():
         assert_almost_equal(solvers['cbc'], solvers['greedy'])
@@ -53,6 +63,170 @@ def test_exec():
     if os.path.exists(db):
         os.remove(db)
 
+def test_exec_jobs():
+    infile = 'test_in.h5'
+    ninst = 4
+
+    base = os.path.dirname(os.path.abspath(__file__))
+    db = os.path.join(base, "tmp_{0}.h5".format(str(uuid.uuid4())))
+    outdb = os.path.join(base, "tmp_{0}.h5".format(str(uuid.uuid4())))
+    shutil.copy(os.path.join(base, 'files', infile), db)
+    solvers = "greedy, cbc"
+    cmd = ("exec --db={0} --outdb={1} --family_class ResourceExchange "
+           "--family_module cyclopts.exchange_family "
+           "--solvers {2} --jobs 3").format(db, outdb, solvers)
+    parser = cycmain.gen_parser()
+    cycmain.execute(parser.parse_args(args=cmd.split()))
+
+    h5file = t.open_file(outdb, 'r')
+    h5node = h5file.get_node('/Results')
+    assert_equal(h5node.nrows, ninst * len(solvers.split()))
+    objs = defaultdict(dict)
+    for row in h5node.iterrows():
+        objs[row['instid']][row['solver']] = row['objective']
+    h5node = h5file.get_node(
+        '/Family/ResourceExchange/ExchangeInstSolutionProperties')
+    assert_equal(h5node.nrows, ninst * len(solvers.split()))
+    h5file.close()
+
+    assert_equal(len(objs), ninst)
+    for iid, solvers in objs.items():
+        assert_almost_equal(solvers['cbc'], solvers['greedy'])
+    # all shards are cleaned up
+    assert_equal(len([x for x in os.listdir(base) \
+                          if x.startswith('.cyclopts_shards_')]), 0)
+
+    for f in [db, outdb]:
+        if os.path.exists(f):
+            os.remove(f)
+
+def test_exec_time_limit():
+    infile = 'test_in.h5'
+    ninst = 4
+
+    base = os.path.dirname(os.path.abspath(__file__))
+    db = os.path.join(base, "tmp_{0}.h5".format(str(uuid.uuid4())))
+    shutil.copy(os.path.join(base, 'files', infile), db)
+    solvers = "greedy, cbc"
+    cmd = ("exec --db={0} --family_class ResourceExchange "
+           "--family_module cyclopts.exchange_family "
+           "--solvers {1} --time-limit 300").format(db, solvers)
+    parser = cycmain.gen_parser()
+    cycmain.execute(parser.parse_args(args=cmd.split()))
+
+    h5file = t.open_file(db, 'r')
+    h5node = h5file.get_node('/Results')
+    assert_equal(h5node.nrows, ninst * len(solvers.split()))
+    assert_true((h5node.cols.status[:] == 'ok').all())
+    h5node = h5file.get_node(
+        '/Family/ResourceExchange/ExchangeInstSolutionProperties')
+    assert_equal(h5node.nrows, ninst * len(solvers.split()))
+    h5file.close()
+
+    if os.path.exists(db):
+        os.remove(db)
+
+def test_exec_resume():
+    infile = 'test_in.h5'
+    ninst = 4
+
+    base = os.path.dirname(os.path.abspath(__file__))
+    db = os.path.join(base, "tmp_{0}.h5".format(str(uuid.uuid4())))
+    shutil.copy(os.path.join(base, 'files', infile), db)
+    solvers = "greedy, cbc"
+    nsolns = ninst * len(solvers.split())
+    cmd = ("exec --db={0} --family_class ResourceExchange "
+           "--family_module cyclopts.exchange_family "
+           "--solvers {1}").format(db, solvers)
+    parser = cycmain.gen_parser()
+    cycmain.execute(parser.parse_args(args=cmd.split()))
+
+    # drop the last 3 ledger entries as if the run was killed before they were
+    # committed
+    h5file = t.open_file(db, 'a')
+    h5file.get_node('/Ledger').truncate(nsolns - 3)
+    h5file.close()
+
+    cycmain.execute(parser.parse_args(args=(cmd + ' --resume').split()))
+    
+    h5file = t.open_file(db, 'r')
+    ledger = h5file.get_node('/Ledger')[:]
+    assert_equal(len(ledger), nsolns)
+    assert_equal(len(set(zip(ledger['instid'], ledger['solver']))), nsolns)
+    results = h5file.get_node('/Results')[:]
+    assert_equal(set(results['solnid']), set(ledger['solnid']))
+    h5node = h5file.get_node(
+        '/Family/ResourceExchange/ExchangeInstSolutionProperties')
+    assert_equal(set(h5node.cols.solnid[:]), set(ledger['solnid']))
+    h5node = h5file.get_node('/Family/ResourceExchange/ExchangeInstSolutions')
+    assert_equal(len(h5node._v_children), nsolns)
+    h5file.close()
+
+    if os.path.exists(db):
+        os.remove(db)
+
+def test_exec_prefetch():
+    infile = 'test_in.h5'
+    ninst = 4
+
+    base = os.path.dirname(os.path.abspath(__file__))
+    db = os.path.join(base, "tmp_{0}.h5".format(str(uuid.uuid4())))
+    shutil.copy(os.path.join(base, 'files', infile), db)
+    solvers = "greedy, cbc"
+    for opts in ["--prefetch 2", "--prefetch 1 --threads 2"]:
+        cmd = ("exec --db={0} --family_class ResourceExchange "
+               "--family_module cyclopts.exchange_family "
+               "--solvers {1} {2}").format(db, solvers, opts)
+        parser = cycmain.gen_parser()
+        cycmain.execute(parser.parse_args(args=cmd.split()))
+
+    h5file = t.open_file(db, 'r')
+    h5node = h5file.get_node('/Results')
+    assert_equal(h5node.nrows, 2 * ninst * len(solvers.split()))
+    objs = defaultdict(lambda: defaultdict(set))
+    for row in h5node.iterrows():
+        objs[row['instid']][row['solver']].add(round(row['objective'], 6))
+    assert_equal(h5file.get_node('/Ledger').nrows, h5node.nrows)
+    h5file.close()
+
+    # both executions find the same solutions
+    assert_equal(len(objs), ninst)
+    for iid, solvers in objs.items():
+        for solver, obj in solvers.items():
+            assert_equal(len(obj), 1)
+
+    if os.path.exists(db):
+        os.remove(db)
+
+def test_exec_threads():
+    infile = 'test_in.h5'
+    ninst = 4
+
+    base = os.path.dirname(os.path.abspath(__file__))
+    db = os.path.join(base, "tmp_{0}.h5".format(str(uuid.uuid4())))
+    shutil.copy(os.path.join(base, 'files', infile), db)
+    solvers = "greedy, cbc"
+    cmd = ("exec --db={0} --family_class ResourceExchange "
+           "--family_module cyclopts.exchange_family "
+           "--solvers {1} --threads 3").format(db, solvers)
+    parser = cycmain.gen_parser()
+    cycmain.execute(parser.parse_args(args=cmd.split()))
+
+    h5file = t.open_file(db, 'r')
+    h5node = h5file.get_node('/Results')
+    assert_equal(h5node.nrows, ninst * len(solvers.split()))
+    objs = defaultdict(dict)
+    for row in h5node.iterrows():
+        objs[row['instid']][row['solver']] = row['objective']
+    h5file.close()
+
+    assert_equal(len(objs), ninst)
+    for iid, solvers in objs.items():
+        assert_almost_equal(solvers['cbc'], solvers['greedy'])
+
+    if os.path.exists(db):
+        os.remove(db)
+
 def test_convert():
     base = os.path.dirname(os.path.abspath(__file__))
     rc = os.path.join(base, 'files', 'test.rc')    
@@ -80,6 +254,111 @@ def test_convert():
     if os.path.exists(db):
         os.remove(db)
 
+def test_convert_jobs():
+    base = os.path.dirname(os.path.abspath(__file__))
+    rc = os.path.join(base, 'files', 'test.rc')    
+    serial = os.path.join(base, "tmp_{0}.h5".format(str(uuid.uuid4())))
+    parallel = os.path.join(base, "tmp_{0}.h5".format(str(uuid.uuid4())))
+
+    parser = cycmain.gen_parser()
+    cmd = "convert --rc {0} --db {1} -n 2 --seed 42"
+    cycmain.convert(parser.parse_args(args=cmd.format(rc, serial).split()))
+    cmd += " --jobs 3"
+    cycmain.convert(parser.parse_args(args=cmd.format(rc, parallel).split()))
+
+    # a parallel conversion matches a serial one with the same seed
+    exp = t.open_file(serial, 'r')
+    obs = t.open_file(parallel, 'r')
+    tbls = [x._v_pathname for x in exp.walk_nodes('/', classname='Table')]
+    assert_greater(len(tbls), 0)
+    for path in tbls:
+        assert_array_equal(exp.get_node(path)[:], obs.get_node(path)[:])
+    exp.close()
+    obs.close()
+    
+    for db in [serial, parallel]:
+        if os.path.exists(db):
+            os.remove(db)
+
+def test_convert_point_seed():
+    base = os.path.dirname(os.path.abspath(__file__))
+    rc = os.path.join(base, "tmp_{0}.rc".format(str(uuid.uuid4())))
+    with open(os.path.join(base, 'files', 'test.rc')) as f:
+        lines = f.read()
+    with open(rc, 'w') as f:
+        f.write(lines + '\nseed = 7\n')
+    dbs = [os.path.join(base, "tmp_{0}.h5".format(str(uuid.uuid4()))) \
+               for i in range(2)]
+
+    # without --seed, conversions of points with the same seed are identical
+    parser = cycmain.gen_parser()
+    cmd = "convert --rc {0} --db {1} -n 2"
+    for db in dbs:
+        cycmain.convert(parser.parse_args(args=cmd.format(rc, db).split()))
+    exp, obs = [t.open_file(db, 'r') for db in dbs]
+    tbls = [x._v_pathname for x in exp.walk_nodes('/', classname='Table')]
+    assert_greater(len(tbls), 0)
+    for path in tbls:
+        assert_array_equal(exp.get_node(path)[:], obs.get_node(path)[:])
+    exp.close()
+    obs.close()
+    
+    for fname in dbs + [rc]:
+        if os.path.exists(fname):
+            os.remove(fname)
+
+def test_convert_virtual():
+    base = os.path.dirname(os.path.abspath(__file__))
+    rc = os.path.join(base, 'files', 'test.rc')    
+    stored = os.path.join(base, "tmp_{0}.h5".format(str(uuid.uuid4())))
+    virtual = os.path.join(base, "tmp_{0}.h5".format(str(uuid.uuid4())))
+
+    parser = cycmain.gen_parser()
+    cmd = "convert --rc {0} --db {1} -n 2 --seed 42"
+    cycmain.convert(parser.parse_args(args=cmd.format(rc, stored).split()))
+    cmd += " --virtual"
+    cycmain.convert(parser.parse_args(args=cmd.format(rc, virtual).split()))
+
+    fam = ResourceExchange()
+    path = '{0}/{1}'.format(fam.io_prefix, fam.property_table_name)
+    exp = t.open_file(stored, 'r')
+    obs = t.open_file(virtual, 'r')
+    instids = tools.collect_instids(h5file=exp, path=path)
+    assert_equal(instids, tools.collect_instids(h5file=obs, path=path))
+    
+    # only properties are stored, and instances are regenerated as they were
+    arcs = '{0}/ExchangeArcs'.format(fam.io_prefix)
+    assert_true(arcs not in obs or obs.get_node(arcs).nrows == 0)
+    assert_equal(exp.get_node(path).nrows, obs.get_node(path).nrows)
+    assert_true(inst_read_times(exp, instids)['match'])
+    managers = [cycio.IOManager(x, fam.register_tables(x, fam.io_prefix), 
+                                fam.register_groups(x, fam.io_prefix)) \
+                    for x in [exp, obs]]
+    for iid in instids:
+        x, y = [fam._read_inst_columnar(iid, m) for m in managers]
+        for name in ['id', 'uid', 'vid', 'ucaps', 'vcaps', 'pref']:
+            assert_array_equal(x[2][name], y[2][name])
+        for name in x[3]:
+            assert_array_equal(x[3][name], y[3][name])
+
+    # an instance and its species' arc rows are regenerated once
+    maxbytes = cycio.inst_cache.maxbytes
+    cycio.inst_cache.resize(256 * 1024**2)
+    try:
+        iid = instids[0]
+        inst, rows = fam.regen_inst(iid, obs)
+        assert_true(fam.read_inst_columnar(iid, managers[1]) is inst)
+        assert_true(fam.regen_inst(iid, obs)[1] is rows)
+        assert_equal(len(rows), len(inst[2]))
+    finally:
+        cycio.inst_cache.resize(maxbytes)
+    exp.close()
+    obs.close()
+    
+    for db in [stored, virtual]:
+        if os.path.exists(db):
+            os.remove(db)
+
 def test_combine():
     localbase = os.path.dirname(os.path.abspath(__file__))
     localdir = 'example_run'
@@ -141,6 +420,46 @@ def test_pp():
     if os.path.exists(h5pp):
         os.remove(h5pp)    
 
+def test_pp_virtual():
+    base = os.path.dirname(os.path.abspath(__file__))
+    rc = os.path.join(base, 'files', 'test.rc')
+    tmp = lambda: os.path.join(base, "tmp_{0}.h5".format(str(uuid.uuid4())))
+    stored, virtual = tmp(), tmp()
+    outs, pps = [tmp(), tmp()], [tmp(), tmp()]
+
+    parser = cycmain.gen_parser()
+    cmd = "convert --rc {0} --db {1} -n 2 --seed 42"
+    cycmain.convert(parser.parse_args(args=cmd.format(rc, stored).split()))
+    cmd += " --virtual"
+    cycmain.convert(parser.parse_args(args=cmd.format(rc, virtual).split()))
+
+    # post processing regenerates the arcs of virtual instances
+    for db, out, pp in zip([stored, virtual], outs, pps):
+        cmd = ("exec --db={0} --outdb={1} --family_class ResourceExchange "
+               "--family_module cyclopts.exchange_family "
+               "--solvers cbc").format(db, out)
+        cycmain.execute(parser.parse_args(args=cmd.split()))
+        cmd = ("pp --species_module cyclopts.structured_species.request "
+               "--species_class StructuredRequest "
+               "--indb {0} --outdb {1} --ppdb {2}").format(db, out, pp)
+        cycmain.post_process(parser.parse_args(args=cmd.split()))
+
+    paths = ['/Family/ResourceExchange/PostProcess',
+             '/Species/StructuredRequest/PostProcess']
+    exp, obs = [t.open_file(x, 'r') for x in pps]
+    for path in paths:
+        x, y = exp.get_node(path)[:], obs.get_node(path)[:]
+        assert_greater(len(x), 0)
+        assert_equal(len(x), len(y))
+        for name in x.dtype.names[1:]:
+            assert_array_equal(np.sort(x[name]), np.sort(y[name]))
+    exp.close()
+    obs.close()
+
+    for db in [stored, virtual] + outs + pps:
+        if os.path.exists(db):
+            os.remove(db)
+
 @timeout()
 def test_collect():
     user = 'gidden'
@@ -3,6 +3,7 @@ from cyclopts.random_request_species import RandomRequest, RandomRequestPoint, \
 
 import numpy as np
 import os
+import random
 
 import nose
 from nose.tools import assert_equal, assert_almost_equal, assert_true, \
@@ -166,3 +167,40 @@ def test_rxtr_req_build_changes():
     s.n_sup_constr = Param(1)
     s.n_req_constr = Param(1)
     
+
+def test_batch_sample():
+    rng = np.random.RandomState(42)
+    n = 5000
+    assert_equal(Param(3).sample(n, rng).tolist(), [3] * n)
+    assert_true(BoolParam(1).sample(n, rng).all())
+    assert_false(BoolParam(-1).sample(n, rng).any())
+    assert_almost_equal(0.5, BoolParam(0.5).sample(n, rng).mean(), places=1)
+    coeffs = CoeffParam(1e-10, 2.0).sample(n, rng)
+    assert_equal(len(coeffs), n)
+    assert_greater(coeffs.min(), 0)
+    assert_less_equal(coeffs.max(), 2)
+    assert_almost_equal(1.0, coeffs.mean(), places=1)
+    assert_equal(SupConstrParam(0.5).sample(n, rng).tolist(), [0.5] * n)
+    fracs = set(SupConstrParam(0.5, rand=True).sample(n, rng).tolist())
+    assert_equal(fracs, set([0.5, 0.75, 1]))
+
+def test_build_rng():
+    s = RandomRequestPoint()
+    s.n_req_constr = Param(2)
+    s.n_sup_constr = Param(3)
+    s.exclusive = BoolParam(0.5)
+    insts = []
+    for i in range(2):
+        # the structure of an instance is drawn from the random module
+        random.seed(7)
+        rng = np.random.RandomState(7)
+        insts.append(RandomRequestBuilder(s, rng=rng).build())
+    (_, exp_nodes, exp), (_, obs_nodes, obs) = insts
+    assert_equal(len(exp_nodes), len(obs_nodes))
+    assert_equal(len(exp), len(obs))
+    assert_equal([x.excl for x in exp_nodes], [x.excl for x in obs_nodes])
+    for x, y in zip(exp, obs):
+        assert_equal(x.ucaps[0], 1)
+        assert_equal(list(x.ucaps), list(y.ucaps))
+        assert_equal(list(x.vcaps), list(y.vcaps))
+        assert_equal(x.pref, y.pref)
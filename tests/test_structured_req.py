@@ -1,19 +1,71 @@
 from cyclopts.structured_species import request as spmod
 
 import uuid
+import numpy as np
 import math
+import copy
 import os
-from collections import namedtuple
+from collections import namedtuple, defaultdict
 
 from nose.tools import assert_equal, assert_almost_equal, assert_true, assert_false
 from numpy.testing import assert_array_almost_equal
 
 from cyclopts import tools as cyctools
+import cyclopts.exchange_instance as exinst
 from cyclopts.exchange_family import ResourceExchange
 from cyclopts.structured_species import data
 from cyclopts.structured_species import tools as strtools
 from cyclopts.problems import Solver
 
+def _generate_supply(sp, point, commod, requester, supplier):
+    """The arcs of one supplier to one reactor for one commodity, generated an
+    arc at a time as a reference for StructuredRequest._gen_arcs()."""
+    r = requester
+    s = supplier
+    commod_pref = data.rxtr_pref_basis[r.kind][commod]
+    loc_pref = strtools.loc_pref(r.loc, s.loc, point.f_loc, point.n_reg)
+    pref = commod_pref + loc_pref * point.r_l_c
+    rnodes = r.commod_to_nodes[commod]
+    arcs = []
+    enr = r.enr(commod)
+
+    # req coeffs have full orders take into relative fissile material
+    req_coeffs = r.coeffs(commod)
+
+    # sup coeffs act on the quantity of fissile material 
+    qty = r.req_qty(commod)
+    sup_coeffs = s.coeffs(qty, enr)
+    for i in range(len(rnodes)):
+        req = True
+        nid = sp.nids.next()
+        node = exinst.ExNode(nid, s.group.id, not req, qty)
+        s.nodes.append(node)
+        arcid = sp.arcids.next()
+        arcs.append(exinst.ExArc(
+                arcid,
+                rnodes[i].id, req_coeffs,
+                nid, sup_coeffs,
+                pref))
+    return arcs
+
+def _get_arcs(sp, point, reactors, suppliers):
+    """All arcs of an instance, generated a supply at a time."""
+    arcs = []
+    for r_kind, r_ary in reactors.items():
+        for r in r_ary:
+            for commod in spmod.rxtr_commods(r.kind, point.f_fc):
+                for s in suppliers[data.commod_to_sup[commod]]:
+                    arcs.append(_generate_supply(sp, point, commod, r, s))
+    return np.concatenate(arcs)          
+
+def _supply(sp, point, requester, supplier):
+    """The supplier nodes and arcs of one supplier to one reactor, generated
+    by StructuredRequest._gen_arcs()."""
+    suppliers = defaultdict(list, {supplier.kind: [supplier]})
+    nodes, arcs, _ = sp._gen_arcs(point, {requester.kind: [requester]}, 
+                                  suppliers)
+    return nodes, arcs
+
 def test_pnt():
     p = spmod.Point({'foo': 'bar', 'n_rxtr': 100})
     assert_equal(p.n_rxtr, 100) # not default
@@ -229,14 +281,14 @@ def test_supplier():
     
 def assert_rcoeffs_equal(arc, commod, rkind, skind, n):
     r_coeffs = [1 / data.relative_qtys[rkind][commod]]
-    assert_array_almost_equal(arc.ucaps, r_coeffs)
+    assert_array_almost_equal(arc['ucaps'][:1], r_coeffs)
 
 def assert_scoeffs_equal(arc, commod, rkind, skind, n, enr):
     qty = data.fuel_unit * data.core_vol_frac[rkind] * \
         data.relative_qtys[rkind][commod] / n
     s_coeffs = [data.converters[skind]['proc'](qty, enr, commod) / qty,
                 data.converters[skind]['inv'](qty, enr, commod) / qty]
-    assert_array_almost_equal(arc.vcaps, s_coeffs)
+    assert_array_almost_equal(arc['vcaps'][:2], s_coeffs)
 
 def test_one_supply():
     gids = cyctools.Incrementer()
@@ -250,17 +302,18 @@ def test_one_supply():
     r = spmod.Reactor(rkind, p, gids, nids)
     s = spmod.Supplier(skind, p, gids)
 
-    arcs = sp._generate_supply(p, commod, r, s)
+    nodes, arcs = _supply(sp, p, r, s)
     assert_equal(len(arcs), 1)
-    assert_equal(len(s.nodes), 1)    
+    assert_equal(len(nodes), 1)    
 
     a = arcs[0]
-    n_s = s.nodes[0]
+    n_s = nodes[0]
     n_r = r.commod_to_nodes[commod][0]
-    assert_equal(a.uid, n_r.id)
-    assert_equal(a.vid, n_s.id)
+    assert_equal(a['uid'], n_r.id)
+    assert_equal(a['vid'], n_s['id'])
+    assert_equal(n_s['gid'], s.group.id)
 
-    assert_almost_equal(n_s.qty, r.req_qty(commod))
+    assert_almost_equal(n_s['qty'], r.req_qty(commod))
 
     assert_rcoeffs_equal(a, commod, rkind, skind, 1)
     assert_scoeffs_equal(a, commod, rkind, skind, 1, r.enr(commod))    
@@ -277,10 +330,10 @@ def test_th_supply():
     skind = data.Supports.uox
     commod = data.Commodities.uox
     s = spmod.Supplier(skind, p, gids)
-    arcs = sp._generate_supply(p, commod, r, s)
+    nodes, arcs = _supply(sp, p, r, s)
     assert_equal(len(arcs), data.n_assemblies[rkind])
-    assert_equal(len(s.nodes), data.n_assemblies[rkind])    
-    assert_almost_equal(s.nodes[0].qty, r.req_qty(commod))
+    assert_equal(len(nodes), data.n_assemblies[rkind])    
+    assert_almost_equal(nodes[0]['qty'], r.req_qty(commod))
     assert_rcoeffs_equal(arcs[0], commod, rkind, skind, data.n_assemblies[rkind])
     assert_scoeffs_equal(arcs[0], commod, rkind, skind, data.n_assemblies[rkind], 
                          r.enr(commod))    
@@ -289,11 +342,11 @@ def test_th_supply():
     skind = data.Supports.th_mox
     commod = data.Commodities.th_mox
     s = spmod.Supplier(skind, p, gids)
-    arcs = sp._generate_supply(p, commod, r, s)
+    nodes, arcs = _supply(sp, p, r, s)
     n = int(math.ceil(0.25 * data.n_assemblies[rkind])) 
     assert_equal(len(arcs), n)
-    assert_equal(len(s.nodes), n)    
-    assert_almost_equal(s.nodes[0].qty, r.req_qty(commod))
+    assert_equal(len(nodes), n)    
+    assert_almost_equal(nodes[0]['qty'], r.req_qty(commod))
     assert_rcoeffs_equal(arcs[0], commod, rkind, skind, data.n_assemblies[rkind])
     assert_scoeffs_equal(arcs[0], commod, rkind, skind, data.n_assemblies[rkind], 
                          r.enr(commod))    
@@ -302,10 +355,10 @@ def test_th_supply():
     skind = data.Supports.f_mox
     commod = data.Commodities.f_mox
     s = spmod.Supplier(skind, p, gids)
-    arcs = sp._generate_supply(p, commod, r, s)
+    nodes, arcs = _supply(sp, p, r, s)
     assert_equal(len(arcs), n)
-    assert_equal(len(s.nodes), n)    
-    assert_almost_equal(s.nodes[0].qty, r.req_qty(commod))
+    assert_equal(len(nodes), n)    
+    assert_almost_equal(nodes[0]['qty'], r.req_qty(commod))
     assert_rcoeffs_equal(arcs[0], commod, rkind, skind, data.n_assemblies[rkind])
     assert_scoeffs_equal(arcs[0], commod, rkind, skind, data.n_assemblies[rkind], 
                          r.enr(commod))    
@@ -322,10 +375,10 @@ def test_fmox_supply():
     skind = data.Supports.uox
     commod = data.Commodities.uox
     s = spmod.Supplier(skind, p, gids)
-    arcs = sp._generate_supply(p, commod, r, s)
+    nodes, arcs = _supply(sp, p, r, s)
     assert_equal(len(arcs), data.n_assemblies[rkind])
-    assert_equal(len(s.nodes), data.n_assemblies[rkind])    
-    assert_almost_equal(s.nodes[0].qty, r.req_qty(commod))
+    assert_equal(len(nodes), data.n_assemblies[rkind])    
+    assert_almost_equal(nodes[0]['qty'], r.req_qty(commod))
     assert_rcoeffs_equal(arcs[0], commod, rkind, skind, data.n_assemblies[rkind])
     assert_scoeffs_equal(arcs[0], commod, rkind, skind, data.n_assemblies[rkind], 
                          r.enr(commod))    
@@ -334,10 +387,10 @@ def test_fmox_supply():
     skind = data.Supports.th_mox
     commod = data.Commodities.th_mox
     s = spmod.Supplier(skind, p, gids)
-    arcs = sp._generate_supply(p, commod, r, s)
+    nodes, arcs = _supply(sp, p, r, s)
     assert_equal(len(arcs), data.n_assemblies[rkind])
-    assert_equal(len(s.nodes), data.n_assemblies[rkind])    
-    assert_almost_equal(s.nodes[0].qty, r.req_qty(commod))
+    assert_equal(len(nodes), data.n_assemblies[rkind])    
+    assert_almost_equal(nodes[0]['qty'], r.req_qty(commod))
     assert_rcoeffs_equal(arcs[0], commod, rkind, skind, data.n_assemblies[rkind])
     assert_scoeffs_equal(arcs[0], commod, rkind, skind, data.n_assemblies[rkind], 
                          r.enr(commod))    
@@ -346,10 +399,10 @@ def test_fmox_supply():
     skind = data.Supports.f_mox
     commod = data.Commodities.f_mox
     s = spmod.Supplier(skind, p, gids)
-    arcs = sp._generate_supply(p, commod, r, s)
+    nodes, arcs = _supply(sp, p, r, s)
     assert_equal(len(arcs), data.n_assemblies[rkind])
-    assert_equal(len(s.nodes), data.n_assemblies[rkind])    
-    assert_almost_equal(s.nodes[0].qty, r.req_qty(commod))
+    assert_equal(len(nodes), data.n_assemblies[rkind])    
+    assert_almost_equal(nodes[0]['qty'], r.req_qty(commod))
     assert_rcoeffs_equal(arcs[0], commod, rkind, skind, data.n_assemblies[rkind])
     assert_scoeffs_equal(arcs[0], commod, rkind, skind, data.n_assemblies[rkind], 
                          r.enr(commod))    
@@ -358,10 +411,10 @@ def test_fmox_supply():
     skind = data.Supports.f_thox
     commod = data.Commodities.f_thox
     s = spmod.Supplier(skind, p, gids)
-    arcs = sp._generate_supply(p, commod, r, s)
+    nodes, arcs = _supply(sp, p, r, s)
     assert_equal(len(arcs), data.n_assemblies[rkind])
-    assert_equal(len(s.nodes), data.n_assemblies[rkind])    
-    assert_almost_equal(s.nodes[0].qty, r.req_qty(commod))
+    assert_equal(len(nodes), data.n_assemblies[rkind])    
+    assert_almost_equal(nodes[0]['qty'], r.req_qty(commod))
     assert_rcoeffs_equal(arcs[0], commod, rkind, skind, data.n_assemblies[rkind])
     assert_scoeffs_equal(arcs[0], commod, rkind, skind, data.n_assemblies[rkind], 
                          r.enr(commod))    
@@ -378,10 +431,10 @@ def test_fmox_supply():
     skind = data.Supports.uox
     commod = data.Commodities.uox
     s = spmod.Supplier(skind, p, gids)
-    arcs = sp._generate_supply(p, commod, r, s)
+    nodes, arcs = _supply(sp, p, r, s)
     assert_equal(len(arcs), data.n_assemblies[rkind])
-    assert_equal(len(s.nodes), data.n_assemblies[rkind])    
-    assert_almost_equal(s.nodes[0].qty, r.req_qty(commod))
+    assert_equal(len(nodes), data.n_assemblies[rkind])    
+    assert_almost_equal(nodes[0]['qty'], r.req_qty(commod))
     assert_rcoeffs_equal(arcs[0], commod, rkind, skind, data.n_assemblies[rkind])
     assert_scoeffs_equal(arcs[0], commod, rkind, skind, data.n_assemblies[rkind], 
                          r.enr(commod))    
@@ -390,10 +443,10 @@ def test_fmox_supply():
     skind = data.Supports.th_mox
     commod = data.Commodities.th_mox
     s = spmod.Supplier(skind, p, gids)
-    arcs = sp._generate_supply(p, commod, r, s)
+    nodes, arcs = _supply(sp, p, r, s)
     assert_equal(len(arcs), data.n_assemblies[rkind])
-    assert_equal(len(s.nodes), data.n_assemblies[rkind])    
-    assert_almost_equal(s.nodes[0].qty, r.req_qty(commod))
+    assert_equal(len(nodes), data.n_assemblies[rkind])    
+    assert_almost_equal(nodes[0]['qty'], r.req_qty(commod))
     assert_rcoeffs_equal(arcs[0], commod, rkind, skind, data.n_assemblies[rkind])
     assert_scoeffs_equal(arcs[0], commod, rkind, skind, data.n_assemblies[rkind], 
                          r.enr(commod))    
@@ -402,10 +455,10 @@ def test_fmox_supply():
     skind = data.Supports.f_mox
     commod = data.Commodities.f_mox
     s = spmod.Supplier(skind, p, gids)
-    arcs = sp._generate_supply(p, commod, r, s)
+    nodes, arcs = _supply(sp, p, r, s)
     assert_equal(len(arcs), data.n_assemblies[rkind])
-    assert_equal(len(s.nodes), data.n_assemblies[rkind])    
-    assert_almost_equal(s.nodes[0].qty, r.req_qty(commod))
+    assert_equal(len(nodes), data.n_assemblies[rkind])    
+    assert_almost_equal(nodes[0]['qty'], r.req_qty(commod))
     assert_rcoeffs_equal(arcs[0], commod, rkind, skind, data.n_assemblies[rkind])
     assert_scoeffs_equal(arcs[0], commod, rkind, skind, data.n_assemblies[rkind], 
                          r.enr(commod))    
@@ -414,10 +467,10 @@ def test_fmox_supply():
     skind = data.Supports.f_thox
     commod = data.Commodities.f_thox
     s = spmod.Supplier(skind, p, gids)
-    arcs = sp._generate_supply(p, commod, r, s)
+    nodes, arcs = _supply(sp, p, r, s)
     assert_equal(len(arcs), data.n_assemblies[rkind])
-    assert_equal(len(s.nodes), data.n_assemblies[rkind])    
-    assert_almost_equal(s.nodes[0].qty, r.req_qty(commod))
+    assert_equal(len(nodes), data.n_assemblies[rkind])    
+    assert_almost_equal(nodes[0]['qty'], r.req_qty(commod))
     assert_rcoeffs_equal(arcs[0], commod, rkind, skind, data.n_assemblies[rkind])
     assert_scoeffs_equal(arcs[0], commod, rkind, skind, data.n_assemblies[rkind], 
                          r.enr(commod))    
@@ -519,6 +572,36 @@ def test_thox_recycle():
     assert_equal(len(nodes), rnodes_exp + snodes_exp)
     assert_equal(len(arcs), snodes_exp)
     
+def test_gen_arcs():
+    # bulk arcs are those of one supply at a time
+    for d in [{'n_rxtr': 7, 'f_fc': 2, 'f_loc': 2, 'n_reg': 3, 'f_rxtr': 1, 
+               'r_l_c': 0.7}, 
+              {'n_rxtr': 5, 'f_fc': 1, 'f_loc': 1, 'n_reg': 10}]:
+        sp = spmod.StructuredRequest()
+        p = spmod.Point(d)
+        sp.nids = cyctools.Incrementer()
+        sp.gids = cyctools.Incrementer()
+        sp.arcids = cyctools.Incrementer()
+        reactors = sp._get_reactors(p)
+        suppliers = sp._get_suppliers(p)
+        nids, arcids = copy.deepcopy(sp.nids), copy.deepcopy(sp.arcids)
+        exp = _get_arcs(sp, p, reactors, suppliers)
+        sp.nids, sp.arcids = nids, arcids
+        nodes, obs, rows = sp._gen_arcs(p, reactors, suppliers)
+
+        assert_equal(len(exp), len(obs))
+        assert_equal([x.id for x in exp], obs['id'].tolist())
+        assert_equal([x.uid for x in exp], obs['uid'].tolist())
+        assert_equal([x.vid for x in exp], obs['vid'].tolist())
+        assert_array_almost_equal([x.pref for x in exp], obs['pref'])
+        assert_array_almost_equal([x.ucaps for x in exp], obs['ucaps'][:, :1])
+        assert_array_almost_equal([x.vcaps for x in exp], obs['vcaps'][:, :2])
+        assert_equal(rows['arcid'].tolist(), obs['id'].tolist())
+        snodes = [n for ary in suppliers.values() for s in ary for n in s.nodes]
+        assert_equal([x.id for x in snodes], nodes['id'].tolist())
+        assert_equal([x.gid for x in snodes], nodes['gid'].tolist())
+        assert_array_almost_equal([x.qty for x in snodes], nodes['qty'])
+
 def test_mininmal_run():
     fname = 'structured_request_conv.py'
     base = os.path.dirname(os.path.abspath(__file__))
@@ -5,13 +5,14 @@ from nose.tools import assert_equal, assert_not_equal, assert_almost_equal, \
 from numpy.testing import assert_array_almost_equal
 
 import uuid
+import copy
 import math
 import os
 from collections import Sequence, namedtuple
 import random
 
 from cyclopts import tools as cyctools
-from cyclopts.exchange_family import ResourceExchange
+from cyclopts.exchange_family import ResourceExchange, cap_offsets
 from cyclopts.structured_species import data as data
 from cyclopts.structured_species import tools as strtools
 from cyclopts.problems import Solver
@@ -19,6 +20,45 @@ import cyclopts.exchange_instance as exinst
 
 from utils import assert_cyc_equal
 
+def _gen_arc(aid, point, commod, rx_node_id, rxtr, reqr):
+    """An arc generated one at a time as a reference for 
+    StructuredSupply._build_structure()."""
+    commod_pref = data.sup_pref_basis[reqr.kind][commod]
+    loc_pref = strtools.loc_pref(rxtr.loc, reqr.loc, point.f_loc, point.n_reg)
+    pref = commod_pref + loc_pref * point.r_l_c
+    # unit capacity for total mass constraint first
+    rq_coeffs = [1., reqr.coeff(rxtr.enr(commod), rxtr.kind, commod)] \
+        if not reqr.kind == data.Supports.repo else [1.]
+    arc = exinst.ExArc(aid,
+                       reqr.commod_to_nodes[commod].id, rq_coeffs,
+                       rx_node_id, [1],
+                       pref)
+    return arc
+
+def _gen_structure(sp, point, reactors, requesters):
+    """The groups, nodes, and arcs of an instance, generated an assembly at a
+    time. The species' realization must be set."""
+    grps, nodes, arcs = [], [], []
+    for rx_kind, rx_ary in reactors.items():
+        for rxtr in rx_ary:
+            for commod, nassems in sp._rlztn.assem_dists[rx_kind].items():
+                for i in range(nassems):
+                    excl_id = sp.excl_ids.next()
+                    gid = sp.gids.next()
+                    grp = rxtr.gen_group(gid)
+                    grps.append(grp)
+                    for rq_kind in sp.commod_to_reqrs[commod]:
+                        if rq_kind not in requesters:
+                            continue
+                        for reqr in requesters[rq_kind]:
+                            nid = sp.nids.next()
+                            node = rxtr.gen_node(nid, gid, excl_id)
+                            arc = _gen_arc(sp.arcids.next(), point, commod, 
+                                           nid, rxtr, reqr) 
+                            nodes.append(node)
+                            arcs.append(arc)
+    return grps, nodes, arcs
+
 def test_basics():
     sp = spmod.StructuredSupply()    
     exp = 'StructuredSupply'
@@ -179,7 +219,6 @@ def test_reactor():
     assert_cyc_equal(obs, exp)
         
 def test_arc():
-    aid, vid = 42, 52
     p = spmod.Point({'f_loc': 0})
     commod = data.Commodities.f_thox
 
@@ -189,21 +228,32 @@ def test_arc():
     gids = cyctools.Incrementer()
     nids = cyctools.Incrementer()    
     
+    # one assembly of the commodity, offered to a requester of each kind
     kinds = [data.Supports.f_thox, data.Supports.repo,]
-    uids = [1, 4 + 1] # commod index of sup_pref_basis
     ucaps = [[1., rxtr.enr(commod) / 100 * data.relative_qtys[rxtr.kind][commod]],
              [1.],]
-    print(len(kinds), len(uids), len(ucaps))
+    sp = spmod.StructuredSupply()
+    sp._rlztn = namedtuple('Realization', ['assem_dists'])(
+        {kind: {commod: 1}})
+    sp.commod_to_reqrs = {commod: kinds}
+    reqrs = [spmod.Requester(x, gids, nids) for x in kinds]
+    requesters = dict((x.kind, [x]) for x in reqrs)
+    groups, nodes, arcs, _ = sp._build_structure(p, {kind: [rxtr]}, 
+                                                 requesters)
+    caps = cap_offsets(groups, arcs)
+    offs = caps['ucap_offsets']
+
+    assert_equal(len(arcs), len(kinds))
     for i in range(len(kinds)):
-        print(len(kinds), len(uids), len(ucaps))
-        uid, kind, caps = uids[i], kinds[i], ucaps[i]
-        reqr = spmod.Requester(kind, gids, nids)    
-        obs = spmod.StructuredSupply.gen_arc(aid, p, commod, vid, rxtr, reqr)
-        exp = exinst.ExArc(aid, 
-                           uid, caps, 
-                           vid, [1], 
-                           data.sup_pref_basis[kind][commod])
-        assert_cyc_equal(obs, exp)
+        reqr, exp = reqrs[i], ucaps[i]
+        assert_equal(arcs['uid'][i], reqr.commod_to_nodes[commod].id)
+        assert_equal(arcs['vid'][i], nodes['id'][i])
+        assert_array_almost_equal(caps['ucaps'][offs[i]:offs[i + 1]], exp)
+        assert_array_almost_equal(
+            caps['vcaps'][caps['vcap_offsets'][i]:caps['vcap_offsets'][i + 1]],
+            [1.])
+        assert_almost_equal(arcs['pref'][i], 
+                            data.sup_pref_basis[reqr.kind][commod])
     
 def test_primary_consumer_supplier():
     # This test confirms that for each primary supplier and consumer, a single
@@ -290,6 +340,39 @@ def test_rlztn_reset():
     print('r5', r5.n_rxtrs)
     assert_equal(other_rxtr_exp, r5.n_rxtrs[0]) # bug fixed
     
+def test_build_structure():
+    # bulk structure is that of one assembly at a time
+    for d in [{'n_rxtr': 7, 'f_fc': 2, 'f_loc': 2, 'n_reg': 3, 'f_rxtr': 1, 
+               'r_l_c': 0.7}, 
+              {'n_rxtr': 5, 'f_fc': 1, 'f_loc': 1, 'n_reg': 10}]:
+        sp = spmod.StructuredSupply()
+        p = spmod.Point(d)
+        sp.commod_to_reqrs = spmod.commod_to_reqrs(p.f_fc)
+        sp._rlztn = sp.pnt_to_realization(p)
+        sp.instid, sp.arc_tbl = None, None
+        reactors = sp._get_reactors()
+        requesters = sp._get_requesters()
+        ids = copy.deepcopy((sp.nids, sp.gids, sp.excl_ids, sp.arcids))
+        exp_grps, exp_nodes, exp = _gen_structure(sp, p, reactors, requesters)
+        sp.nids, sp.gids, sp.excl_ids, sp.arcids = ids
+        grps, nodes, obs, rows = sp._build_structure(p, reactors, requesters)
+
+        assert_equal([x.id for x in exp_grps], grps['id'].tolist())
+        assert_array_almost_equal([x.caps for x in exp_grps], 
+                                  grps['caps'][:, :1])
+        for attr in ['id', 'gid', 'excl_id']:
+            assert_equal([getattr(x, attr) for x in exp_nodes], 
+                         nodes[attr].tolist())
+        assert_array_almost_equal([x.qty for x in exp_nodes], nodes['qty'])
+        assert_equal(len(exp), len(obs))
+        for attr in ['id', 'uid', 'vid']:
+            assert_equal([getattr(x, attr) for x in exp], obs[attr].tolist())
+        assert_array_almost_equal([x.pref for x in exp], obs['pref'])
+        assert_array_almost_equal(
+            [list(x.ucaps) + [0.] * (2 - len(x.ucaps)) for x in exp], 
+            obs['ucaps'][:, :2])
+        assert_equal(rows['arcid'].tolist(), obs['id'].tolist())
+
 def test_repository_run():
     # This test confirms that flows to a constrainted repository behave as
     # expected.
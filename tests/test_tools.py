@@ -2,6 +2,7 @@ from cyclopts.tools import Incrementer, combine, RunControl
 from cyclopts.params import Param, BoolParam
 
 import operator
+import numpy as np
 import shutil
 import os
 import uuid
@@ -162,6 +163,42 @@ def test_collect_instids():
     
     h5file.close()    
 
+def test_storage_profiles():
+    dt = np.dtype([('instid', ('str', 16)), ('data', float)])
+    assert_equal('inst', tools.table_kind(dt))
+    assert_equal('default', tools.table_kind(np.dtype([('data', float)])))
+    try:
+        tools.set_storage_profile('compact')
+        assert_equal(9, tools.storage('inst').complevel)
+        assert_equal(16, tools.storage('param').chunk_kb)
+        tools.set_storage_profile({'default': {'complevel': 1}, 
+                                   'soln': {'chunk_kb': 64}})
+        assert_equal(tools.StorageSettings('zlib', 1, True, 64), 
+                     tools.storage('soln'))
+        assert_equal(1, tools.filters('inst').complevel)
+        assert_raises(ValueError, tools.set_storage_profile, 'fastest')
+    finally:
+        tools.set_storage_profile()
+    assert_equal(4, tools.filters().complevel)
+
+def test_benchmark_storage():
+    base = os.path.dirname(os.path.abspath(__file__))
+    db = os.path.join(base, 'files', 'test_in.h5')
+    tmpdir = os.path.join(base, 'tmp_{0}'.format(uuid.uuid4()))
+    os.mkdir(tmpdir)
+    try:
+        obs = tools.benchmark_storage(db, profiles=['default', 'compact'],
+                                      tmpdir=tmpdir)
+        assert_equal(['default', 'compact'], [x['profile'] for x in obs])
+        # copies are removed, and a given directory is kept
+        assert_equal([], os.listdir(tmpdir))
+        # an error partway through leaves no copies
+        assert_raises(ValueError, tools.benchmark_storage, db,
+                      profiles=['default', 'fastest'], tmpdir=tmpdir)
+        assert_equal([], os.listdir(tmpdir))
+    finally:
+        shutil.rmtree(tmpdir)
+
 def test_n_permutations():
     x = "foo"
     assert_equal(1, tools.n_permutations(x))